@@ -1,12 +1,11 @@
 import os
 import sys
+import time
 import logging
-import threading
 
-from PyQt5.QtCore import QEvent
+from PyQt5.QtCore import QEvent, QRunnable, QThreadPool
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QComboBox, QRadioButton, \
-    QPushButton, QTextEdit, QGridLayout, QStatusBar, QFileDialog, QListWidget, QMessageBox
-from stock_option_strategy._utils.enums import TimeFrame
+    QPushButton, QTextEdit, QGridLayout, QStatusBar, QFileDialog, QListWidget, QMessageBox, QProgressBar
 from stock_option_strategy._cli import initialize_config
 
 # Setup logging to log into 'stock_app.log' file with the specified format
@@ -20,24 +19,83 @@ class CustomEvent(QEvent):
         super().__init__(CustomEvent.EVENT_TYPE)
         self.callback = callback
 
+
+class Task(QRunnable):
+    # Runs a function on a QThreadPool, unless its batch was cancelled while it waited in the queue
+    def __init__(self, fn, *args, batch=None):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.batch = batch
+
+    def run(self):
+        if self.batch is not None and self.batch.cancelled:
+            return
+        self.fn(*self.args)
+
+
+class PredictionBatch:
+    # The tickers of one "Predict" click, with the settings read from the widgets when it was started
+    def __init__(self, tickers, prob, timeframe, is_diff):
+        self.tickers = tickers
+        self.prob = prob
+        self.timeframe = timeframe
+        self.is_diff = is_diff
+        self.done = 0
+        self.failed = {}
+        self.cancelled = False
+        self.started = time.perf_counter()
+
+
 # Business Logic Handler
 class StockAlgorithm:
+    def __init__(self, cache_ttl=60.0):
+        from stock_option_strategy._data.cache import TTLCache
+
+        # (ticker, timeframe, probability) -> the predictions of both widths, so repeated requests and width
+        # changes render without building the IronCondor again. Entries expire like the cached quotes.
+        self.results = TTLCache(maxsize=512, ttl=cache_ttl)
+
+    @staticmethod
+    def _key(ticker, prob, timeframe):
+        return ticker.strip().upper(), timeframe.strip().upper(), prob.strip()
+
+    def get_cached_details(self, ticker, prob, timeframe, is_diff):
+        predictions = self.results.get(self._key(ticker, prob, timeframe))
+        if predictions is None:
+            return None
+        return predictions["different" if is_diff else "same"]
+
     def get_stock_details(self, ticker, prob, timeframe, is_diff):
+        from stock_option_strategy._data.horizon import resolve_timeframe
         from stock_option_strategy._data.iron_condor import IronCondor
 
-        try:
-            if timeframe == "Weekly":
-                Ic = IronCondor(ticker, TimeFrame.WEEKLY.get_enum(), prob=prob)
-            else:
-                Ic = IronCondor(ticker, TimeFrame.MONTHLY.get_enum(), prob=prob)
+        # Errors are raised to the caller, which tells the user what went wrong, see describe_error
+        key = self._key(ticker, prob, timeframe)
+        predictions = self.results.get(key)
+        if predictions is None:
+            data_enum, horizon = resolve_timeframe(timeframe)
+            Ic = IronCondor(ticker, data_enum, prob=prob, horizon=horizon)
+            predictions = {"same": Ic.get_same_width_option_price(),
+                           "different": Ic.get_different_width_option_price()}
+            self.results.put(key, predictions)
+        return predictions["different" if is_diff else "same"]
+
+    def prefetch(self, tickers, timeframe):
+        # Validate and price all tickers with one batch quote lookup, then load the stored data of the existing
+        # ones with one batch query, fetching the missing ones, so that later predictions are served from the caches
+        from stock_option_strategy._data.horizon import resolve_timeframe
+        from stock_option_strategy._data.iron_condor import IronCondor
+        from stock_option_strategy._data.stock_db import StockDB
+        from stock_option_strategy._data.quotes import get_quote_provider
 
-            if not is_diff:
-                return Ic.get_same_width_option_price()
-            else:
-                return Ic.get_different_width_option_price()
-        except ValueError as e:
-            print(e)
-            return {}
+        quotes = get_quote_provider().get_quotes(tickers)
+        tickers = [ticker for ticker in tickers if quotes[ticker].exists]
+        data_enum, horizon = resolve_timeframe(timeframe)
+        if horizon is None:
+            StockDB(None, data_enum).getMany(tickers, IronCondor.required_fields(data_enum))
+        else:
+            StockDB(None, data_enum).ensureMany(tickers)
 
     def save_predictions(self, filename, data):
         # Save the prediction data to a file
@@ -53,6 +111,29 @@ def show_error_message(message):
     error_dialog.setIcon(QMessageBox.Critical)
     error_dialog.exec_()
 
+
+def describe_error(error):
+    # The message shown for a failed prediction: what went wrong and what the user can do about it
+    from concurrent.futures import CancelledError
+    from stock_option_strategy._data.http_client import AlphaVantageRequestError, AlphaVantageThrottleError, \
+        AlphaVantageUnavailableError
+    from stock_option_strategy._data.rate_limit import QuotaExhaustedError
+
+    if isinstance(error, AlphaVantageThrottleError):
+        return "AlphaVantage is throttling requests. Please wait a minute and try again"
+    if isinstance(error, AlphaVantageRequestError):
+        return f"AlphaVantage rejected the ticker: {error}"
+    if isinstance(error, QuotaExhaustedError):
+        return f"{error}. Please try again tomorrow"
+    if isinstance(error, (AlphaVantageUnavailableError, ConnectionError, TimeoutError)):
+        return f"AlphaVantage could not be reached, please check the network connection: {error}"
+    if isinstance(error, CancelledError):
+        return "The prediction was cancelled"
+    if isinstance(error, ValueError):
+        # e.g. an unknown ticker or an invalid probability or timeframe
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+
 class StockAlgorithm_GUI(QWidget):
 
     def __init__(self):
@@ -62,11 +143,16 @@ class StockAlgorithm_GUI(QWidget):
         self.generateCounter = 0
 
         self.stock_algorithm = StockAlgorithm()  # Business logic handler
+        # A bounded pool for the predictions and prefetches, instead of a new thread per click
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(4)
+        self.batch = None
 
         # Initialize UI components
         self.init_input_elements()
         self.init_output_elements()
         self.init_ui()
+        self.prefetch_tickers()
     def customEvent(self, a0: 'QEvent') -> None:
         if a0.type() == CustomEvent.EVENT_TYPE:
             a0.callback()
@@ -79,7 +165,9 @@ class StockAlgorithm_GUI(QWidget):
         self.add_output_elements_to_grid(grid)
 
         layout.addLayout(grid)
+        layout.addWidget(self.progress)
         layout.addWidget(self.result_box)
+        layout.addWidget(self.statusBar)
 
         self.setLayout(layout)
 
@@ -94,6 +182,8 @@ class StockAlgorithm_GUI(QWidget):
         self.lbl_prob = QLabel("Probability of Success:")
         self.combo_prob = QComboBox()
         self.combo_prob.addItems(["50%", "60%", "70%", "80%", "90%"])
+        # any probability can be typed in, e.g. "73%"
+        self.combo_prob.setEditable(True)
 
         self.lbl_timeframe = QLabel("Timeframe (days):")
         self.data_combo = QComboBox()
@@ -107,11 +197,18 @@ class StockAlgorithm_GUI(QWidget):
     def init_output_elements(self):
         self.btn_generate = QPushButton("Predict Data")
         self.btn_generate.clicked.connect(self.generate_predictions)
+        self.btn_predict_all = QPushButton("Predict All Tickers")
+        self.btn_predict_all.clicked.connect(self.predict_all)
+        self.btn_cancel = QPushButton("Cancel")
+        self.btn_cancel.clicked.connect(self.cancel_predictions)
+        self.btn_cancel.setEnabled(False)
         self.btn_save = QPushButton("Save to File")
         self.btn_save.clicked.connect(self.save_to_file)
 
         self.result_box = QTextEdit()
         self.result_box.setReadOnly(True)
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
         self.statusBar = QStatusBar()
 
     def add_input_elements_to_grid(self, grid):
@@ -127,7 +224,9 @@ class StockAlgorithm_GUI(QWidget):
         grid.addWidget(self.radio_differentWidth, 4, 1)
 
     def add_output_elements_to_grid(self, grid):
-        grid.addWidget(self.btn_generate, 5, 0, 1, 2)
+        grid.addWidget(self.btn_generate, 5, 0)
+        grid.addWidget(self.btn_predict_all, 5, 1)
+        grid.addWidget(self.btn_cancel, 5, 2)
         grid.addWidget(self.btn_save, 6, 0, 1, 2)
 
     def add_ticker_to_list(self):
@@ -135,37 +234,103 @@ class StockAlgorithm_GUI(QWidget):
         if ticker:
             self.list_tickers.addItem(ticker)
             self.edit_ticker.clear()
+            self.prefetch_tickers([ticker])
 
     def handle_data_combo_change(self):
         index = self.data_combo.currentIndex()
         self.radio_sameWidth.setEnabled(index == 0)
         self.radio_differentWidth.setChecked(index == 1)
+        self.prefetch_tickers()
 
-    def generate_predictions(self):
-        self.generateCounter += 1
-        ticker = self.list_tickers.currentItem().text()
-        prob = self.combo_prob.currentText()
+    def prefetch_tickers(self, tickers=None):
+        if tickers is None:
+            tickers = [self.list_tickers.item(i).text() for i in range(self.list_tickers.count())]
         timeframe = self.data_combo.currentText()
+        self.pool.start(Task(self.threaded_prefetch, tickers, timeframe))
 
-        # Perform long-running tasks in a thread to keep GUI responsive
-        threading.Thread(target=self.threaded_prediction, args=(ticker, prob, timeframe)).start()
-
-    def threaded_prediction(self, ticker, prob, timeframe):
-
+    def threaded_prefetch(self, tickers, timeframe):
         try:
-            Stock_data = self.stock_algorithm.get_stock_details(ticker, prob, timeframe, self.radio_differentWidth.isEnabled())
-            if Stock_data:
-                # Make sure to update the GUI from the main thread
-                QApplication.postEvent(self, CustomEvent(lambda: self.printTextOutput(Stock_data)))
+            self.stock_algorithm.prefetch(tickers, timeframe)
+        except Exception as e:
+            logging.exception("Error prefetching tickers: %s", e)
+
+    def generate_predictions(self):
+        item = self.list_tickers.currentItem()
+        if item is None:
+            show_error_message("Please select a ticker first.")
+            return
+        self.start_batch([item.text()])
+
+    def predict_all(self):
+        self.start_batch([self.list_tickers.item(i).text() for i in range(self.list_tickers.count())])
+
+    def start_batch(self, tickers):
+        # The widgets are only read here, in the main thread; the workers get plain values
+        self.cancel_predictions()
+        batch = PredictionBatch(tickers, self.combo_prob.currentText(), self.data_combo.currentText(),
+                                self.radio_differentWidth.isChecked())
+        self.batch = batch
+        self.progress.setRange(0, len(tickers))
+        self.progress.setValue(0)
+        self.progress.setVisible(len(tickers) > 1)
+        self.btn_cancel.setEnabled(True)
+
+        for ticker in tickers:
+            cached = self.stock_algorithm.get_cached_details(ticker, batch.prob, batch.timeframe, batch.is_diff)
+            if cached is not None:
+                self.prediction_finished(batch, ticker, cached)
             else:
-                QApplication.postEvent(self, CustomEvent(
-                    lambda: show_error_message("Ticker not found. Please try another ticker")))
+                # Perform long-running tasks on the pool to keep GUI responsive
+                self.pool.start(Task(self.threaded_prediction, batch, ticker, batch=batch))
+
+    def cancel_predictions(self):
+        # Queued tickers are skipped; those already running finish in the background and are only cached
+        batch = self.batch
+        if batch is None or batch.cancelled or batch.done == len(batch.tickers):
+            return
+        batch.cancelled = True
+        self.btn_cancel.setEnabled(False)
+        self.progress.setVisible(False)
+        self.statusBar.showMessage(f"Cancelled after {batch.done} of {len(batch.tickers)} tickers.")
+
+    def threaded_prediction(self, batch, ticker):
+        error = None
+        try:
+            Stock_data = self.stock_algorithm.get_stock_details(ticker, batch.prob, batch.timeframe, batch.is_diff)
         except Exception as e:
-            QApplication.postEvent(self, CustomEvent(
-                lambda: show_error_message("An error occurred while generating predictions.")))
-            logging.exception("Error generating predictions: %s", e)
+            logging.exception("Error generating predictions for %s: %s", ticker, e)
+            Stock_data, error = None, describe_error(e)
+        # Make sure to update the GUI from the main thread
+        QApplication.postEvent(self, CustomEvent(lambda: self.prediction_finished(batch, ticker, Stock_data, error)))
+
+    def prediction_finished(self, batch, ticker, stock_data, error=None):
+        if batch.cancelled:
+            return
+        batch.done += 1
+        if stock_data:
+            self.printTextOutput(stock_data)
+        else:
+            batch.failed[ticker] = error or "No prediction could be made"
+        self.progress.setValue(batch.done)
+        if batch.done < len(batch.tickers):
+            self.statusBar.showMessage(f"Predicted {batch.done} of {len(batch.tickers)} tickers...")
+            return
+
+        self.btn_cancel.setEnabled(False)
+        self.progress.setVisible(False)
+        elapsed = time.perf_counter() - batch.started
+        self.statusBar.showMessage(f"Predicted {len(batch.tickers) - len(batch.failed)} of {len(batch.tickers)} "
+                                   f"tickers in {elapsed:.1f}s.")
+        if batch.failed:
+            if len(batch.tickers) == 1:
+                show_error_message(batch.failed[ticker])
+            else:
+                failures = "\n".join(f"{symbol}: {message}" for symbol, message in batch.failed.items())
+                show_error_message(f"No prediction for:\n{failures}\n"
+                                   f"Please check the 'stock_app.log' file for more details.")
 
     def printTextOutput(self, stock_data):
+        self.generateCounter += 1
         self.result_box.append(f"{self.generateCounter}. Stock Prediction")
         for idx, (hdr, std) in enumerate(stock_data.items(), start=1):
             self.result_box.append(f"       {idx}. {hdr}: {std}")
@@ -186,6 +351,12 @@ class StockAlgorithm_GUI(QWidget):
             logging.exception("Failed to save file: %s",e)
             QMessageBox.critical(self,"Save Failed",f"An error occurred while saving the file: {e}")
 
+    def closeEvent(self, a0) -> None:
+        # Drop the queued work so the application doesn't wait for it on exit
+        self.cancel_predictions()
+        self.pool.clear()
+        super().closeEvent(a0)
+
     # Custom Event to handle thread-safe GUI updates
 
 class StockApp:
@@ -0,0 +1,95 @@
+"""
+    Compares the stored size and decode time of the document and packed layouts, on synthetic AlphaVantage payloads.
+
+    Each document is encoded to BSON the way pymongo sends it. Decoding times bson.decode plus, for the packed
+    layout, turning the binaries into a PackedSeries per year and NumPy arrays. "predict" decodes only the fields a
+    prediction loads and looks up its widths. "series" builds the full (dates, closes) arrays of a decoded document,
+    which the horizon predictions and the backtest read.
+
+    Usage:
+        python benchmarks/document_size.py [--years 5 30] [--repeat 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bson
+import numpy as np
+
+from benchmarks.fakes import FakeAlphaVantageClient
+from benchmarks.pipeline import write_config
+from stock_option_strategy._cli import initialize_config
+from stock_option_strategy._data import http_client
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.iron_condor import IronCondor
+from stock_option_strategy._data.packed import pack_stock, unpack_stock
+from stock_option_strategy._data.quantiles import QuantileTable
+from stock_option_strategy._utils.enums import TimeFrame
+
+
+def legacy_series(stock: dict, duration: str):
+    # what StorageBackend.read_series does with the legacy bar dicts
+    bars = sorted((day, close) for year, year_data in stock.items() if year.isdigit()
+                  for day, close in year_data.get(duration, {}).items())
+    return (np.array([day for day, _ in bars], dtype="datetime64[D]"),
+            np.array([close for _, close in bars], dtype=np.float64))
+
+
+def packed_series(stock: dict, duration: str):
+    series = [stock[year][duration] for year in sorted(year for year in stock if year.isdigit())]
+    return (np.concatenate([year.days for year in series]).astype("datetime64[D]"),
+            np.concatenate([year.closes for year in series]))
+
+
+def median_ms(operation, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the document and packed layouts.")
+    parser.add_argument("--years", type=int, nargs="+", default=[5, 30])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    initialize_config(write_config(tempfile.mkdtemp(), "document"))
+    print(f"{'timeframe':<10}{'years':>6}{'layout':>13}{'bytes':>10}{'ratio':>7}{'decode ms':>11}{'predict ms':>12}"
+          f"{'series ms':>11}")
+    for timeframe in ("DAILY", "WEEKLY", "MONTHLY"):
+        data_enum = TimeFrame[timeframe].get_enum()
+        for years in args.years:
+            http_client.set_client(FakeAlphaVantageClient(data_enum, years))
+            stock = AlphaData(data_enum, "SYM").addData()["SYM"]
+            loaded = {field.split(".")[0] for field in IronCondor.required_fields(data_enum)}
+            fields = {key: value for key, value in stock.items() if key in loaded}
+            legacy = bson.encode({"_id": "SYM", "SYM": stock})
+            legacy_fields = bson.encode({"_id": "SYM", "SYM": fields})
+            rows = [("document", legacy, lambda: bson.decode(legacy)["SYM"],
+                     lambda: bson.decode(legacy_fields)["SYM"], legacy_series)]
+            for codec in ("none", "zlib"):
+                encoded = bson.encode({"_id": "SYM", "SYM": pack_stock(stock, timeframe, codec)})
+                encoded_fields = bson.encode({"_id": "SYM", "SYM": pack_stock(fields, timeframe, codec)})
+                rows.append((f"packed/{codec}", encoded,
+                             lambda encoded=encoded: unpack_stock(bson.decode(encoded)["SYM"], timeframe),
+                             lambda encoded=encoded_fields: unpack_stock(bson.decode(encoded)["SYM"], timeframe),
+                             packed_series))
+            for layout, encoded, decode, decode_fields, series in rows:
+                decoded = decode()
+                print(f"{timeframe:<10}{years:>6}{layout:>13}{len(encoded):>10}{len(legacy) / len(encoded):>7.2f}"
+                      f"{median_ms(decode, args.repeat):>11.3f}"
+                      f"{median_ms(lambda: QuantileTable.from_document(decode_fields()).call(70), args.repeat):>12.3f}"
+                      f"{median_ms(lambda: series(decoded, timeframe), args.repeat):>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+    Offline stand-ins used by the benchmarks: synthetic AlphaVantage payloads, a client serving them and an
+    in-memory replacement for the MongoDB database.
+"""
+import copy
+import datetime
+import json
+
+import numpy as np
+import pymongo
+
+from stock_option_strategy._utils.enums import StockEnum
+
+BARS_PER_YEAR = {"DAILY": 252, "WEEKLY": 52, "MONTHLY": 12}
+STEP_DAYS = {"DAILY": 1, "WEEKLY": 7, "MONTHLY": 30}
+
+
+def synthetic_series(data_enum: StockEnum, years: int, seed: int, last_date: datetime.date = None) -> dict:
+    """
+        Builds an AlphaVantage-shaped adjusted time series: a random walk of `years` years of bars, newest first.
+
+        Args:
+            data_enum (StockEnum): The timeframe of the series.
+            years (int): The length of the history.
+            seed (int): The random seed, so runs are comparable.
+            last_date (datetime.date, optional): The newest bar, defaults to yesterday so IronCondor sees the data
+                as fresh and never refreshes it.
+    """
+    rng = np.random.default_rng(seed)
+    count = BARS_PER_YEAR[data_enum.duration] * years
+    closes = 100.0 * np.cumprod(1 + rng.normal(0.0005, 0.02, count))
+    day = last_date or datetime.date.today() - datetime.timedelta(days=1)
+    step = datetime.timedelta(days=STEP_DAYS[data_enum.duration])
+    series = {}
+    for close in closes:
+        series[day.isoformat()] = {"1. open": f"{close:.4f}", "2. high": f"{close:.4f}", "3. low": f"{close:.4f}",
+                                   "4. close": f"{close:.4f}", "5. adjusted close": f"{close:.4f}",
+                                   "6. volume": "1000000", "7. dividend amount": "0.0000"}
+        day -= step
+    return series
+
+
+class FakeAlphaVantageClient:
+
+    def __init__(self, data_enum: StockEnum, years: int, distinct: int = 8):
+        """
+            Answers AlphaVantage queries with synthetic payloads instead of calling the API.
+
+            Args:
+                data_enum (StockEnum): The timeframe served.
+                years (int): The length of every history.
+                distinct (int): The number of different payloads generated; symbols share them round-robin to
+                    keep memory bounded with many tickers.
+        """
+        self.data_enum = data_enum
+        self.payloads = [{data_enum.data_name: synthetic_series(data_enum, years, seed)} for seed in range(distinct)]
+        self.bodies = [json.dumps(payload).encode() for payload in self.payloads]
+        self.calls = 0
+
+    def query(self, params: dict, priority=None) -> dict:
+        self.calls += 1
+        return self.payloads[hash(params["symbol"]) % len(self.payloads)]
+
+    def stream(self, params: dict, parse, priority=None, chunk_size: int = 1 << 16):
+        """Serves the payload as JSON text in chunks, the way AlphaVantageClient.stream reads the response."""
+        self.calls += 1
+        body = self.bodies[hash(params["symbol"]) % len(self.bodies)]
+        return parse(body[start:start + chunk_size] for start in range(0, len(body), chunk_size))
+
+
+class RecordedReplaceOne(pymongo.ReplaceOne):
+    """A pymongo.ReplaceOne that also keeps the arguments it was built with, which pymongo only stores privately."""
+
+    def __init__(self, filter, replacement, upsert=False, **kwargs):
+        super().__init__(filter, replacement, upsert, **kwargs)
+        self.filter = filter
+        self.replacement = replacement
+        self.upsert = upsert
+
+
+class InMemoryCollection:
+    """The subset of a pymongo collection used by the document layout, kept in a dict of deep copies."""
+
+    def __init__(self):
+        self.docs = {}
+
+    @staticmethod
+    def _ids(query):
+        value = query["_id"]
+        return value["$in"] if isinstance(value, dict) else [value]
+
+    @staticmethod
+    def _project(doc, projection):
+        if projection is None or all(key == "_id" for key in projection):
+            return copy.deepcopy(doc) if projection is None else {"_id": doc["_id"]}
+        result = {"_id": doc["_id"]}
+        for path in projection:
+            source, target, keys = doc, result, path.split(".")
+            for key in keys[:-1]:
+                if not isinstance(source.get(key), dict):
+                    break
+                source, target = source[key], target.setdefault(key, {})
+            else:
+                if keys[-1] in source:
+                    target[keys[-1]] = copy.deepcopy(source[keys[-1]])
+        return result
+
+    def find(self, query, projection=None):
+        return [self._project(self.docs[_id], projection) for _id in self._ids(query) if _id in self.docs]
+
+    def count_documents(self, query, limit=0):
+        return len(self.find(query, {"_id": 1}))
+
+    def replace_one(self, query, doc, upsert=False):
+        if upsert or query["_id"] in self.docs:
+            self.docs[query["_id"]] = copy.deepcopy(doc)
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            if not isinstance(request, RecordedReplaceOne):
+                raise TypeError(f"InMemoryCollection can't replay {type(request).__name__} requests")
+            self.replace_one(request.filter, request.replacement, request.upsert)
+
+    def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            return
+        for path, value in update["$set"].items():
+            target, keys = doc, path.split(".")
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = copy.deepcopy(value)
+
+    def delete_many(self, query):
+        self.docs.clear()
+
+
+class InMemoryDatabase(dict):
+
+    def __missing__(self, name):
+        collection = self[name] = InMemoryCollection()
+        return collection
+
+
+class InMemoryClient:
+    """
+        Stands in for MongoClientWrapper; pass it to db_client.set_db_client().
+
+        The bulk writes are built with pymongo.ReplaceOne, looked up when they are sent, so it is replaced with
+        RecordedReplaceOne for the collections to replay. A real collection takes either.
+    """
+
+    def __init__(self):
+        pymongo.ReplaceOne = RecordedReplaceOne
+        self.db = InMemoryDatabase()
@@ -0,0 +1,57 @@
+"""
+    Measures the cold import time of the package entry points, each in a fresh interpreter.
+
+    Usage:
+        python benchmarks/import_time.py [--repeat 5] [--budget 200]
+
+    Exits with status 1 if the median of any target exceeds the budget (in milliseconds).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    "stock_option_strategy",
+    "stock_option_strategy._data.alphavantage",
+    "stock_option_strategy._data.stock_db",
+    "stock_option_strategy._data.iron_condor",
+]
+
+
+def measure(module: str, repeat: int) -> list:
+    """Returns the wall time of `python -c "import <module>"` minus a bare interpreter start, in ms."""
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        return (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(repeat):
+        baseline = run("pass")
+        timings.append(run(f"import {module}") - baseline)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the package.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=200.0, help="The allowed median per target, in ms")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in TARGETS:
+        timings = measure(module, args.repeat)
+        median = statistics.median(timings)
+        over_budget |= median > args.budget
+        print(f"{module:45s} median {median:7.1f} ms  min {min(timings):7.1f} ms"
+              f"{'  OVER BUDGET' if median > args.budget else ''}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+    Compares the vectorized ingest with the row-by-row loop AlphaData.addData ran before, on synthetic AlphaVantage
+    payloads.
+
+    "loop" is a port of that loop: it walks the decoded JSON bar by bar, building the per-year dicts and pushing
+    each price through a two-element stack. "parse" and "build" are parse_series and build_document, the same work
+    split into its two steps. The "addData" columns time the whole document including the probability table, the
+    old way (z-scores of the raw percent change lists) and the new way (AlphaData.addData on an already decoded
+    payload).
+
+    Usage:
+        python benchmarks/ingest.py [--years 5 25] [--repeat 30]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from benchmarks.fakes import FakeAlphaVantageClient
+from benchmarks.pipeline import write_config
+from stock_option_strategy._cli import initialize_config
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.ingest import build_document, parse_series
+from stock_option_strategy._utils.enums import TimeFrame
+
+
+def _empty_year(duration: str) -> dict:
+    return {duration: {},
+            "WidthData": {"positiveWidth": [], "negativeWidth": [], "avgPosWidth": 0, "avgNegWidth": 0,
+                          "MaxPosWidth": 0, "MaxNegWidth": 0},
+            "PercentWidthData": {"positivePC": [], "negativePC": [], "avgPosPC": 0, "avgNegPC": 0, "MaxPosPC": 0,
+                                 "MaxNegPC": 0}}
+
+
+def _avg(values: list):
+    return round(sum(values) / len(values), 2) if values else 0
+
+
+def _close_year(year_data: dict):
+    width_data, pc_data = year_data["WidthData"], year_data["PercentWidthData"]
+    width_data["avgPosWidth"] = _avg(width_data["positiveWidth"])
+    width_data["avgNegWidth"] = _avg(width_data["negativeWidth"])
+    width_data["MaxPosWidth"] = max(width_data["positiveWidth"], default=0)
+    width_data["MaxNegWidth"] = min(width_data["negativeWidth"], default=0)
+    pc_data["avgNegPC"] = _avg(pc_data["negativePC"])
+    pc_data["avgPosPC"] = _avg(pc_data["positivePC"])
+    pc_data["MaxPosPC"] = max(pc_data["positivePC"], default=0)
+    pc_data["MaxNegPC"] = min(pc_data["negativePC"], default=0)
+
+
+def legacy_loop(symbol: str, duration: str, series: dict, curr_year: str) -> dict:
+    """The bar-by-bar document of the old AlphaData.addData, without the probability table."""
+    stock = {curr_year: _empty_year(duration)}
+    price_stack, temp_year = [], curr_year
+    for key, value in series.items():
+        year, price = key.split("-")[0], float(value["5. adjusted close"])
+        if year not in stock:
+            _close_year(stock[temp_year])
+            stock[year] = _empty_year(duration)
+            temp_year = year
+        stock[year][duration][key] = price
+        price_stack.append(price)
+        if len(price_stack) == 2:
+            older, newer = price_stack.pop(), price_stack.pop()
+            change = 0 if older == 0 else round((newer - older) / older * 100, 2)
+            side = "negative" if newer - older < 0 else "positive"
+            stock[year]["WidthData"][f"{side}Width"].append(newer - older)
+            stock[year]["PercentWidthData"][f"{side}PC"].append(change)
+    return {"_id": symbol, symbol: stock}
+
+
+def _without_outliers(values: list) -> list:
+    data = np.array(values)
+    z_scores = (data - data.mean()) / data.std()
+    return sorted(np.delete(data, np.where(np.abs(z_scores) > 3)).tolist())
+
+
+def legacy_add_data(symbol: str, duration: str, series: dict, curr_year: str) -> dict:
+    """legacy_loop plus the old probability table."""
+    document = legacy_loop(symbol, duration, series, curr_year)
+    stock = document[symbol]
+    positive, negative = [], []
+    for year in list(stock)[1:]:
+        positive.extend(stock[year]["PercentWidthData"]["positivePC"])
+        negative.extend(stock[year]["PercentWidthData"]["negativePC"])
+    positive, negative = _without_outliers(positive), _without_outliers(negative)
+    probabilities = {"Call": {}, "Put": {}}
+    for probability in [50, 60, 70, 80, 90, 99]:
+        probabilities["Call"][f"{probability}%"] = positive[int(len(positive) * probability / 100)]
+        probabilities["Put"][f"{probability}%"] = sorted(negative, reverse=True)[int(len(negative) * probability
+                                                                                      / 100)]
+    probabilities["Call"]["OverallAvgPosPC"] = _avg(positive)
+    probabilities["Put"]["OverallAvgNegPC"] = _avg(negative)
+    stock["Probabilities"] = probabilities
+    return document
+
+
+def median_ms(operation, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the vectorized ingest with the old loop.")
+    parser.add_argument("--years", type=int, nargs="+", default=[5, 25])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    initialize_config(write_config(tempfile.mkdtemp(), "document"))
+    curr_year = AlphaData.current_year()
+    print(f"{'timeframe':<10}{'years':>6}{'bars':>7}{'loop ms':>9}{'parse ms':>10}{'build ms':>10}{'speedup':>9}"
+          f"{'old addData':>13}{'addData':>9}{'speedup':>9}")
+    for timeframe in ("DAILY", "WEEKLY", "MONTHLY"):
+        data_enum = TimeFrame[timeframe].get_enum()
+        for years in args.years:
+            client = FakeAlphaVantageClient(data_enum, years, distinct=1)
+            series = client.payloads[0][data_enum.data_name]
+            dates, closes, date_keys = parse_series(series)
+            loop = median_ms(lambda: legacy_loop("SYM", timeframe, series, curr_year), args.repeat)
+            parse = median_ms(lambda: parse_series(series), args.repeat)
+            build = median_ms(lambda: build_document("SYM", data_enum, dates, closes, curr_year, date_keys),
+                              args.repeat)
+            old = median_ms(lambda: legacy_add_data("SYM", timeframe, series, curr_year), args.repeat)
+            new = median_ms(lambda: AlphaData(data_enum, "SYM", client=client, stream=False).addData(), args.repeat)
+            print(f"{timeframe:<10}{years:>6}{len(series):>7}{loop:>9.2f}{parse:>10.2f}{build:>10.2f}"
+                  f"{loop / (parse + build):>8.1f}x{old:>13.2f}{new:>9.2f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
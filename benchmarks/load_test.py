@@ -0,0 +1,211 @@
+"""
+    Load test of the prediction server (python -m stock_option_strategy serve) against offline stand-ins.
+
+    The server runs in a child process on synthetic AlphaVantage payloads, the in-memory MongoDB stand-in and fixed
+    quotes. Every AlphaVantage download is delayed by --download-latency to stand in for the network. Clients keep
+    their connections alive and send requests as fast as the server answers.
+
+    Usage:
+        python benchmarks/load_test.py                                  # 2000 requests over 32 connections
+        python benchmarks/load_test.py --requests 10000 --concurrency 64
+        python benchmarks/load_test.py --url http://127.0.0.1:8765      # an already running server
+
+    It reports a cold predict() call for comparison, then per phase the requests per second, latency percentiles
+    and how the server answered the loads: from the hot cache, by joining an in-flight load, or by loading.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeAlphaVantageClient, InMemoryClient
+from benchmarks.pipeline import percentile, write_config
+from stock_option_strategy._utils.enums import TimeFrame
+
+PROBABILITIES = ["50%", "60%", "70%", "73%", "80%", "90%"]
+
+
+class SlowAlphaVantageClient(FakeAlphaVantageClient):
+    """Delays every download like a real AlphaVantage call."""
+
+    def __init__(self, data_enum, years: int, latency: float):
+        super().__init__(data_enum, years)
+        self.latency = latency
+
+    def stream(self, params: dict, parse, priority=None, chunk_size: int = 1 << 16):
+        time.sleep(self.latency)
+        return super().stream(params, parse, priority, chunk_size)
+
+
+def setup_offline(directory: str, symbols: list, timeframe: str, years: int, latency: float):
+    from stock_option_strategy._cli import initialize_config
+    from stock_option_strategy._data import db_client, http_client, quotes
+
+    initialize_config(write_config(directory, "document"))
+    http_client.set_client(SlowAlphaVantageClient(TimeFrame[timeframe].get_enum(), years, latency))
+    quotes.set_quote_provider(quotes.FakeQuoteProvider({symbol: 100.0 + index for index, symbol in enumerate(symbols)}))
+    db_client.set_db_client(InMemoryClient())
+
+
+def run_server(ready, symbols: list, timeframe: str, years: int, latency: float, workers: int):
+    from stock_option_strategy._server import PredictionServer
+
+    setup_offline(tempfile.mkdtemp(), symbols, timeframe, years, latency)
+    server = PredictionServer(max_workers=workers)
+
+    async def main():
+        await server.start("127.0.0.1", 0)
+        ready.put(server.port)
+        await server._server.serve_forever()
+
+    asyncio.run(main())
+
+
+def cold_predict(symbols: list, timeframe: str, years: int, latency: float) -> float:
+    """Times predict() on fresh tickers in this process, the way every caller pays for it without the server."""
+    from stock_option_strategy._cli import predict
+
+    setup_offline(tempfile.mkdtemp(), symbols, timeframe, years, latency)
+    latencies = []
+    for symbol in symbols[:3]:
+        start = time.perf_counter()
+        predict(symbol, timeframe, "70%")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)[len(latencies) // 2]
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 client connection."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+                          f"\r\n".encode() + payload)
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(head.split(" ", 2)[1])
+        length = next(int(line.split(":", 1)[1]) for line in head.split("\r\n")
+                      if line.lower().startswith("content-length:"))
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def phase(host: str, port: int, requests: list, concurrency: int) -> dict:
+    """Sends (method, path, body) requests over `concurrency` connections, returning throughput and latencies."""
+    queue = iter(requests)
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        connection = Connection(host, port)
+        try:
+            for method, path, body in queue:
+                began = time.perf_counter()
+                status, _ = await connection.request(method, path, body)
+                latencies.append((time.perf_counter() - began) * 1000)
+                errors += status != 200
+        finally:
+            connection.close()
+
+    before = await stats(host, port)
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    total = time.perf_counter() - start
+    after = await stats(host, port)
+    latencies.sort()
+    return {"requests": len(latencies), "errors": errors, "req_per_sec": len(latencies) / total,
+            "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            **{name: after.get(name, 0) - before.get(name, 0) for name in ("hot", "coalesced", "loads")}}
+
+
+async def stats(host: str, port: int) -> dict:
+    connection = Connection(host, port)
+    try:
+        return (await connection.request("GET", "/stats"))[1]
+    finally:
+        connection.close()
+
+
+def predict_path(symbol: str, timeframe: str, probability: str) -> str:
+    return f"/predict?ticker={symbol}&timeframe={timeframe}&probability={quote(probability)}"
+
+
+async def load_test(host: str, port: int, symbols: list, timeframe: str, total: int, concurrency: int) -> dict:
+    rng = random.Random(0)
+    results = {}
+    # every connection asks for the same few cold tickers at once: one load each, the rest join it
+    results["cold burst"] = await phase(host, port, [("GET", predict_path(symbols[index % 4], timeframe, "70%"), None)
+                                                     for index in range(concurrency * 4)], concurrency)
+    results["warm up"] = await phase(host, port, [("POST", "/predict_multiple",
+                                                   [[symbol, timeframe, "70%"] for symbol in symbols])], 1)
+    results["warm predict"] = await phase(host, port, [("GET", predict_path(rng.choice(symbols), timeframe,
+                                                                            rng.choice(PROBABILITIES)), None)
+                                                       for _ in range(total)], concurrency)
+    results["warm predict_multiple x10"] = await phase(
+        host, port, [("POST", "/predict_multiple", [[rng.choice(symbols), timeframe, rng.choice(PROBABILITIES)]
+                                                    for _ in range(10)]) for _ in range(total // 10)], concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction server offline.")
+    parser.add_argument("--requests", type=int, default=2000, help="The requests of each warm phase")
+    parser.add_argument("--concurrency", type=int, default=32, help="The number of client connections")
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--timeframe", choices=["WEEKLY", "MONTHLY"], default="WEEKLY")
+    parser.add_argument("--years", type=int, default=20, help="The history of every synthetic ticker")
+    parser.add_argument("--download-latency", type=float, default=0.5,
+                        help="The seconds every synthetic AlphaVantage download takes")
+    parser.add_argument("--workers", type=int, default=8, help="The server's load threads")
+    parser.add_argument("--url", help="Test a running server instead, e.g. http://127.0.0.1:8765")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{index}" for index in range(args.tickers)]
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        print(f"cold predict() in-process: {cold_predict(symbols, args.timeframe, args.years, args.download_latency):.0f} ms")
+        ready = multiprocessing.Queue()
+        process = multiprocessing.Process(target=run_server, args=(ready, symbols, args.timeframe, args.years,
+                                                                   args.download_latency, args.workers), daemon=True)
+        process.start()
+        host, port = "127.0.0.1", ready.get(timeout=60)
+
+    try:
+        results = asyncio.run(load_test(host, port, symbols, args.timeframe, args.requests, args.concurrency))
+    finally:
+        if process is not None:
+            process.terminate()
+
+    print(f"{'phase':<27}{'requests':>9}{'errors':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'hot':>7}{'joined':>7}{'loads':>7}")
+    for name, result in results.items():
+        print(f"{name:<27}{result['requests']:>9}{result['errors']:>7}{result['req_per_sec']:>9.0f}"
+              f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['hot']:>7}{result['coalesced']:>7}{result['loads']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+    Offline benchmark of the ingest -> store -> read -> predict pipeline.
+
+    Every stage runs against synthetic AlphaVantage payloads, an in-memory MongoDB stand-in (or the columnar layout
+    in a temporary directory) and a fixed-price quote provider, so no network or database is needed.
+
+    Usage:
+        python benchmarks/pipeline.py                              # quick profile, print the results
+        python benchmarks/pipeline.py --save-baseline baseline.json
+        python benchmarks/pipeline.py --baseline baseline.json     # exits with 1 on a regression
+        python benchmarks/pipeline.py --profile full --layout columnar
+
+    Per stage and size it reports throughput, latency percentiles and the peak memory traced by tracemalloc.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeAlphaVantageClient, InMemoryClient
+from stock_option_strategy._cli import initialize_config
+from stock_option_strategy._data import db_client, http_client, quotes, stock_db
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.iron_condor import IronCondor
+from stock_option_strategy._data.stock_db import StockDB
+from stock_option_strategy._utils.enums import TimeFrame
+
+PROFILES = {
+    "quick": {"tickers": [1, 100], "years": [5, 30], "timeframes": ["DAILY", "WEEKLY", "MONTHLY"]},
+    "full": {"tickers": [1, 100, 1000], "years": [5, 30], "timeframes": ["DAILY", "WEEKLY", "MONTHLY"]},
+}
+STAGES = ["ingest", "store", "read", "predict"]
+
+
+def write_config(directory: str, layout: str) -> str:
+    path = os.path.join(directory, "config.toml")
+    with open(path, "w") as file:
+        file.write('[alphavantage]\napi_key = "benchmark"\n\n'
+                   f'[database]\nuri = "mongodb://localhost:1/MyStockDB"\nlayout = "{layout}"\n'
+                   f'path = "{os.path.join(directory, "data").replace(os.sep, "/")}"\n')
+    return path
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def timed(operation, items: list) -> dict:
+    """Runs operation over items, returning throughput and latency percentiles. Like timeit, GC is paused meanwhile."""
+    latencies = []
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for item in items:
+            began = time.perf_counter()
+            operation(item)
+            latencies.append((time.perf_counter() - began) * 1000)
+        total = time.perf_counter() - start
+    finally:
+        gc.enable()
+    latencies.sort()
+    return {"ops_per_sec": len(items) / total if total else 0.0, "p50_ms": statistics.median(latencies),
+            "p95_ms": percentile(latencies, 95), "p99_ms": percentile(latencies, 99)}
+
+
+def calibrate() -> float:
+    """
+        Times a fixed pure-Python workload, in ms. Results are compared relative to it, so a slower or busier
+        machine doesn't read as a regression.
+    """
+    def workload():
+        total = 0
+        for value in range(200000):
+            total += value * value
+        return total
+
+    return best_of([timed(lambda _: workload(), [None]) for _ in range(5)])["p50_ms"]
+
+
+def traced_peak(operation, items: list, reset=None) -> float:
+    """Runs operation over items again under tracemalloc, returning the peak traced memory in MB."""
+    if reset is not None:
+        reset()
+    tracemalloc.start()
+    try:
+        for item in items:
+            operation(item)
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def best_of(runs: list) -> dict:
+    """Combines repeated timings, keeping the best value of each metric to damp scheduling noise."""
+    return {"ops_per_sec": max(run["ops_per_sec"] for run in runs),
+            **{name: min(run[name] for run in runs) for name in ("p50_ms", "p95_ms", "p99_ms")}}
+
+
+def run_case(timeframe: str, years: int, tickers: int, trace_memory: bool, min_ops: int, repeat: int) -> dict:
+    data_enum = TimeFrame[timeframe].get_enum()
+    symbols = [f"SYM{index}" for index in range(tickers)]
+    # small cases cycle through their tickers so the percentiles rest on enough samples
+    items = symbols * -(-min_ops // tickers)
+    http_client.set_client(FakeAlphaVantageClient(data_enum, years))
+    quotes.set_quote_provider(quotes.FakeQuoteProvider({symbol: 100.0 for symbol in symbols}))
+    db_client.set_db_client(InMemoryClient())
+    db = StockDB(None, data_enum)
+    db.store.delete_all()
+    fields = IronCondor.required_fields(data_enum)
+
+    documents = {}
+
+    def ingest(symbol):
+        documents[symbol] = AlphaData(data_enum, symbol).addData()[symbol]
+
+    def store(symbol):
+        db.store.write(symbol, documents[symbol])
+
+    def read(symbol):
+        stock_db.read_cache.clear()
+        db.getData(symbol, fields)
+
+    def predict(symbol):
+        iron_condor = IronCondor(symbol, data_enum, prob="70%")
+        iron_condor.get_same_width_option_price()
+        iron_condor.get_different_width_option_price()
+
+    results = {}
+    calibration_ms = calibrate()
+    for stage, operation in zip(STAGES, [ingest, store, read, predict]):
+        results[stage] = best_of([timed(operation, items) for _ in range(repeat)])
+        results[stage]["calibration_ms"] = calibration_ms
+        if trace_memory:
+            results[stage]["peak_mb"] = traced_peak(operation, symbols, stock_db.read_cache.clear)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+        Returns a message for every metric that got worse than the baseline by more than the tolerance, after
+        scaling the baseline timings by how much slower the calibration workload ran.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        speed = metrics["calibration_ms"] / base["calibration_ms"] if base.get("calibration_ms") else 1.0
+        expected_ops = base["ops_per_sec"] / speed
+        if metrics["ops_per_sec"] < expected_ops / (1 + tolerance):
+            regressions.append(f"{key}: throughput {metrics['ops_per_sec']:.1f}/s vs {expected_ops:.1f}/s")
+        for name in ("p50_ms", "p95_ms"):
+            expected = base[name] * speed
+            if metrics[name] > expected * (1 + tolerance):
+                regressions.append(f"{key}: {name} {metrics[name]:.3f} vs {expected:.3f}")
+        if "peak_mb" in metrics and "peak_mb" in base and metrics["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 0.5:
+            regressions.append(f"{key}: peak memory {metrics['peak_mb']:.1f} MB vs {base['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingest -> store -> read -> predict pipeline offline.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--layout", choices=["document", "columnar", "packed"], default="document")
+    parser.add_argument("--baseline", help="A JSON file of earlier results to compare against")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="The allowed slowdown, 0.2 for 20%%; widen it on noisy shared runners such as CI")
+    parser.add_argument("--min-ops", type=int, default=50, help="The fewest operations timed per stage")
+    parser.add_argument("--repeat", type=int, default=3, help="How often each stage is timed, the best run counts")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        initialize_config(write_config(directory, args.layout))
+        print(f"{'case':42s} {'ops/s':>10s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'peak MB':>9s}")
+        for timeframe in profile["timeframes"]:
+            for years in profile["years"]:
+                for tickers in profile["tickers"]:
+                    case = run_case(timeframe, years, tickers, not args.no_memory, args.min_ops,
+                                    args.repeat)
+                    for stage, metrics in case.items():
+                        key = f"{args.layout}/{stage}/{timeframe}/{years}y/{tickers}t"
+                        results[key] = metrics
+                        print(f"{key:42s} {metrics['ops_per_sec']:10.1f} {metrics['p50_ms']:9.3f} "
+                              f"{metrics['p95_ms']:9.3f} {metrics['p99_ms']:9.3f} {metrics.get('peak_mb', 0.0):9.2f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Saved the baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
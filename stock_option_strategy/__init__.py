@@ -21,7 +21,7 @@
 # 3. This notice may not be removed or altered from any source distribution.
 
 # Import predict function directly, as it probably doesn't trigger imports from the data folder
-from ._cli import predict, initialize_config, predict_multiple_stocks
+from ._cli import predict, initialize_config, predict_multiple_stocks, iter_predictions, predict_grid, backtest
 
-__all__ = ['predict', 'initialize_config', 'predict_multiple_stocks']
+__all__ = ['predict', 'initialize_config', 'predict_multiple_stocks', 'iter_predictions', 'predict_grid', 'backtest']
 
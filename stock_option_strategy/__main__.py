@@ -0,0 +1,86 @@
+import argparse
+import sys
+
+
+def _refresh(args) -> int:
+    from stock_option_strategy._cli import initialize_config
+    from stock_option_strategy._data.refresh import Checkpoint, read_universe, refresh_universe
+    from stock_option_strategy._utils.enums import TimeFrame
+
+    initialize_config(args.config)
+    symbols = read_universe(args.universe)
+    data_enum = TimeFrame[args.timeframe.upper()].get_enum()
+    checkpoint_path = args.checkpoint or f"{args.universe}.{data_enum.duration.lower()}.checkpoint"
+    checkpoint = Checkpoint(checkpoint_path)
+    if args.restart:
+        checkpoint.clear()
+
+    def progress(symbol, error):
+        if error is not None:
+            print(f"{symbol}: {error}", file=sys.stderr, flush=True)
+        elif args.verbose:
+            print(f"{symbol}: ok", flush=True)
+
+    print(f"Refreshing {len(symbols)} {data_enum.duration.lower()} tickers from {args.universe}, "
+          f"checkpoint {checkpoint_path}", flush=True)
+    result = refresh_universe(symbols, data_enum, checkpoint, max_workers=args.workers, incremental=not args.full,
+                              retry_failed=args.retry_failed, resume_within=args.resume_hours * 3600,
+                              progress=progress, force=args.force)
+    print(result.summary())
+    if result.stopped:
+        return 2
+    return 1 if result.failed else 0
+
+
+def _serve(args) -> int:
+    from stock_option_strategy._cli import initialize_config
+    from stock_option_strategy._server import serve
+
+    initialize_config(args.config)
+    print(f"Serving predictions on http://{args.host}:{args.port}", flush=True)
+    serve(args.host, args.port, max_workers=args.workers, cache_ttl=args.cache_ttl)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m stock_option_strategy",
+                                     description="Commands of stock-option-strategy.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser("refresh", help="Refresh the stored data of a ticker universe",
+                                  description="Refresh the stored data of every ticker in a universe file, resuming "
+                                              "from the checkpoint of an interrupted run. Exits with 1 if some "
+                                              "tickers failed and 2 if the run stopped early.")
+    refresh.add_argument("--universe", required=True, help="A file of tickers, one per line or comma separated")
+    refresh.add_argument("--timeframe", type=str.upper, choices=["DAILY", "WEEKLY", "MONTHLY"], default="WEEKLY")
+    refresh.add_argument("--config", help="The config.toml, found like initialize_config() when left out")
+    refresh.add_argument("--workers", type=int, default=4, help="How many tickers are refreshed at once")
+    refresh.add_argument("--checkpoint", help="The progress file, <universe>.<timeframe>.checkpoint by default")
+    refresh.add_argument("--restart", action="store_true", help="Ignore the progress of an earlier run")
+    refresh.add_argument("--resume-hours", type=float, default=12,
+                         help="Resume from the progress recorded within this many hours, 12 by default")
+    refresh.add_argument("--retry-failed", action="store_true",
+                         help="Also retry the tickers AlphaVantage rejected in an earlier run")
+    refresh.add_argument("--full", action="store_true", help="Download the whole history of every ticker")
+    refresh.add_argument("--force", action="store_true",
+                         help="Also refresh the tickers whose stored bars are current by the trading calendar")
+    refresh.add_argument("--verbose", action="store_true", help="Print every refreshed ticker")
+    refresh.set_defaults(run=_refresh)
+
+    server = commands.add_parser("serve", help="Serve predictions over HTTP/JSON",
+                                 description="Serve predict and predict_multiple_stocks over HTTP/JSON, keeping the "
+                                             "loaded data of every ticker hot between requests.")
+    server.add_argument("--host", default="127.0.0.1", help="The interface to listen on, 127.0.0.1 by default")
+    server.add_argument("--port", type=int, default=8765)
+    server.add_argument("--config", help="The config.toml, found like initialize_config() when left out")
+    server.add_argument("--workers", type=int, default=8, help="How many tickers are loaded at once")
+    server.add_argument("--cache-ttl", type=float, default=60.0,
+                        help="How long loaded data is served before it is loaded again, in seconds")
+    server.set_defaults(run=_serve)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
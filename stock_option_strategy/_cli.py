@@ -1,6 +1,8 @@
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import stock_option_strategy.config as conf
+from stock_option_strategy._utils import metrics
 import os
 def initialize_config(config_path: str=None):
     """
@@ -35,106 +37,315 @@ def initialize_config(config_path: str=None):
             raise FileNotFoundError("Configuration file not found. Please provide a valid path to your configuration file.")
 
     conf._settings._config_reader = conf._settings._ConfigReader(config_path)
+    sink_name = conf._settings.get_metrics_sink()
+    if sink_name:
+        metrics.configure(sink_name)
 
 
-def predict_multiple_stocks(stock_list: list):
+def predict_multiple_stocks(stock_list: list, max_workers: int = 8):
     """
         Predicts the option prices for multiple stocks using the Iron Condor strategy based on given parameters for each stock.
 
+        Requests for the same ticker and timeframe are merged, so each dataset is loaded once and reused for every
+        probability asked for, and the merged requests run in parallel.
+
         Parameters:
         - stock_list (list): A list of lists, where each inner list contains parameters for a single stock prediction:
           ['Ticker', 'Timeframe', 'Probability'].
+        - max_workers (int, optional): The number of tickers predicted concurrently. Defaults to 8.
 
         Returns:
-        - list: A list of dictionaries with the prediction results or error messages for each stock.
+        - list: A list of dictionaries with the prediction results or error messages for each stock, in input order.
+    """
+    predictions = [None] * len(stock_list)
+    for index, result in iter_predictions(stock_list, max_workers):
+        predictions[index] = result
+    return predictions
+
+
+def iter_predictions(stock_list: list, max_workers: int = 8):
     """
-    predictions = []
+        Same as predict_multiple_stocks, but yields the results as soon as they are ready.
+
+        Parameters:
+        - stock_list (list): A list of ['Ticker', 'Timeframe', 'Probability'] lists.
+        - max_workers (int, optional): The number of tickers predicted concurrently. Defaults to 8.
 
-    # Loop through each set of stock parameters in the list
-    for stock_params in stock_list:
+        Yields:
+        - tuple[int, dict]: The position of the request in stock_list and its prediction result or error message.
+    """
+    groups = {}
+    for index, stock_params in enumerate(stock_list):
         if len(stock_params) != 3:
             # Handle incorrect parameter count
-            predictions.append(
-                {"Error": "Invalid number of parameters provided. Expected ['Ticker', 'Timeframe', 'Probability']."})
+            yield index, {"Error": "Invalid number of parameters provided. Expected ['Ticker', 'Timeframe', 'Probability']."}
             continue
 
         ticker, timeframe, probability = stock_params
-
-        # Call the existing predict function with the current set of parameters
         try:
-            result = predict(ticker, timeframe, probability)
-            # Assuming predict() now returns a dictionary or an error message string
-            if isinstance(result, str):
-                predictions.append({"Ticker": ticker, "Error": result})
-            else:
-                predictions.append(result)
+            error = _validate_request(timeframe, probability)
+            key = None if error else (ticker.upper(), timeframe.upper())
         except Exception as e:
-            # Catch any unexpected errors during prediction
-            predictions.append({"Ticker": ticker, "Error": f"An error occurred during prediction: {str(e)}"})
+            # e.g. a ticker, timeframe or probability that isn't a string
+            error = f"An error occurred during prediction: {str(e)}"
+        if error:
+            yield index, {"Ticker": ticker, "Error": error}
+            continue
+        groups.setdefault(key, []).append((index, ticker, probability))
 
-    return predictions
+    if not groups:
+        return
 
-def predict(ticker: str, timeframe: str="MONTHLY", probability: str="70%"):
+    _prefetch(groups, max_workers)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups))))
+    try:
+        futures = [executor.submit(_predict_group, ticker, timeframe, entries)
+                   for (ticker, timeframe), entries in groups.items()]
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def predict_grid(tickers: list, timeframe: str = "MONTHLY", probabilities: list = ("70%",), max_workers: int = 4):
     """
-        Predicts the option prices using the Iron Condor strategy for a given stock ticker, timeframe, and probability.
+        Predicts the Iron Condor strikes of many tickers at many probabilities at once, for screening.
+
+        Unlike predict_multiple_stocks, the result is numeric: the strikes of both width modes are (tickers,
+        probabilities) NumPy arrays, computed in one vectorized pass over the loaded distributions.
 
         Parameters:
-        - ticker (str): The stock ticker symbol.
-        - timeframe (str): The prediction timeframe, either 'MONTHLY' or 'WEEKLY'.
-        - probability (str): The probability as a percentage, e.g., '70%'.
+        - tickers (list): The stock ticker symbols.
+        - timeframe (str): The prediction timeframe, 'MONTHLY', 'WEEKLY' or trading days such as '45D'.
+        - probabilities (list): The probabilities as percentages, e.g. ['50%', '70%', '90%'].
+        - max_workers (int, optional): How many missing tickers are fetched from AlphaVantage at once.
 
         Returns:
-        - str: A message with the prediction result or an error message.
+        - StrikeGrid: The grid. Use .records() for the same dictionaries as predict, or .to_frame() for pandas.
 
         Raises:
         - RuntimeError: If the configuration is not initialized.
-        - ValueError: For invalid timeframe or probability format.
+        - ValueError: For an invalid timeframe or probability.
     """
+    if conf._settings._config_reader is None:
+        raise RuntimeError("Configuration not initialized. Please call initialize_config() first.")
+    for probability in probabilities:
+        error = _validate_request(timeframe, probability)
+        if error:
+            raise ValueError(error)
 
-    def validate_timeframe(tf: str) -> bool:
-        """
-        Validates the given timeframe.
+    from stock_option_strategy._data.horizon import resolve_timeframe
+    from stock_option_strategy._strategies.strike_grid import load_strike_grid
 
-        Parameters:
-        - timeframe (str): The timeframe to validate.
+    data_enum, horizon = resolve_timeframe(timeframe)
+    with metrics.span("predict.grid", timeframe=timeframe.upper()):
+        return load_strike_grid(tickers, data_enum, probabilities, max_workers=max_workers, horizon=horizon)
 
-        Returns:
-        - bool: True if the timeframe is valid, False otherwise.
-        """
-        return tf.upper() in ["MONTHLY", "WEEKLY"]
 
-    def validate_probability(prob: str) -> bool:
-        """
-        Validates the given probability format.
+def backtest(tickers: list, timeframe: str = "MONTHLY", probabilities: list = ("60%", "70%", "80%", "90%"),
+             max_workers: int = None):
+    """
+        Replays the Iron Condor predictions over the stored history of many tickers and reports how often the price
+        at expiry actually stayed within the strikes.
+
+        Each past prediction only uses the bars before it, so the hit rate of a probability shows how well the
+        model was calibrated. The history is sampled like the predictions sample it: 'MONTHLY' and 'WEEKLY' test
+        every disjoint pair of bars their probabilities come from, leaving out the moves of the prediction's own
+        year, and horizons such as '45D' every consecutive 45 day window. The tickers are spread over a process
+        pool.
 
         Parameters:
-        - probability (str): The probability to validate.
+        - tickers (list): The stock ticker symbols.
+        - timeframe (str): The prediction timeframe, 'MONTHLY', 'WEEKLY' or trading days such as '45D'.
+        - probabilities (list): The probabilities as percentages, e.g. ['60%', '70%', '80%'].
+        - max_workers (int, optional): The number of processes, defaults to the CPU count.
 
         Returns:
-        - bool: True if the probability format is valid, False otherwise.
-        """
-        return prob.endswith("%") or not prob[:-1].isdigit()
+        - BacktestReport: The results. Use .summary() for the hit rates per probability, or .results for each
+          ticker's counts.
 
+        Raises:
+        - RuntimeError: If the configuration is not initialized.
+        - ValueError: For an invalid timeframe or probability.
+    """
     if conf._settings._config_reader is None:
         raise RuntimeError("Configuration not initialized. Please call initialize_config() first.")
+    for probability in probabilities:
+        error = _validate_request(timeframe, probability)
+        if error:
+            raise ValueError(error)
+
+    from stock_option_strategy._data.horizon import resolve_timeframe
+    from stock_option_strategy._strategies.backtest import load_backtest
+
+    data_enum, horizon = resolve_timeframe(timeframe)
+    with metrics.span("predict.backtest", timeframe=timeframe.upper()):
+        return load_backtest(tickers, data_enum, probabilities, horizon, max_workers=max_workers)
+
+
+def _prefetch(groups: dict, max_workers: int):
+    """
+        Validates and prices every requested ticker with one batch quote lookup, then loads the stored data of the
+        existing ones with one batch query per timeframe, warming both caches.
+    """
+    try:
+        if conf._settings._config_reader is None:
+            return
+        from stock_option_strategy._data.horizon import resolve_timeframe
+        from stock_option_strategy._data.iron_condor import IronCondor
+        from stock_option_strategy._data.stock_db import StockDB
+        from stock_option_strategy._data.quotes import get_quote_provider
+
+        with metrics.span("predict.prefetch"):
+            quotes = get_quote_provider().get_quotes([ticker for ticker, _ in groups])
+            by_timeframe, by_series = {}, {}
+            for ticker, timeframe in groups:
+                if quotes[ticker].exists:
+                    data_enum, horizon = resolve_timeframe(timeframe)
+                    target = by_timeframe if horizon is None else by_series
+                    target.setdefault(data_enum, set()).add(ticker)
+            for data_enum, tickers in by_timeframe.items():
+                StockDB(None, data_enum).getMany(list(tickers), IronCondor.required_fields(data_enum), max_workers)
+            for data_enum, tickers in by_series.items():
+                # horizons read the whole series, so only make sure it is stored
+                StockDB(None, data_enum).ensureMany(list(tickers), max_workers)
+    except Exception:
+        # best effort only, each prediction still loads its own data
+        pass
+
+
+def _predict_group(ticker: str, timeframe: str, entries: list) -> list:
+    """Predicts every probability requested for one ticker and timeframe, returning (index, result) pairs."""
+    try:
+        if conf._settings._config_reader is None:
+            raise RuntimeError("Configuration not initialized. Please call initialize_config() first.")
+        probabilities = list(dict.fromkeys(probability for _, _, probability in entries))
+        with metrics.span("predict", timeframe=timeframe):
+            by_probability = dict(zip(probabilities, _predict_probabilities(ticker, timeframe, probabilities)))
+    except Exception as e:
+        # Catch any unexpected errors during prediction
+        return [(index, {"Ticker": requested, "Error": f"An error occurred during prediction: {str(e)}"})
+                for index, requested, _ in entries]
+
+    results = []
+    for index, requested, probability in entries:
+        result = by_probability[probability]
+        if isinstance(result, str):
+            results.append((index, {"Ticker": requested, "Error": result}))
+        else:
+            results.append((index, result))
+    return results
+
 
-    from stock_option_strategy._data.iron_condor import IronCondor, TimeFrame
+def _validate_request(timeframe: str, probability: str):
+    """
+        Validates the timeframe and probability of a prediction request.
+
+        Returns:
+        - str: An error message, or None if the request is valid.
+    """
     # Validate timeframe
-    if timeframe.upper() not in ["MONTHLY", "WEEKLY"]:
-        return "Invalid timeframe. Please enter either 'Monthly' or 'Weekly'."
+    if timeframe.upper() not in ["MONTHLY", "WEEKLY"] and not _is_horizon(timeframe):
+        return "Invalid timeframe. Please enter 'Monthly', 'Weekly' or a number of trading days such as '45D'."
 
     # Validate probability format
-    if not validate_probability(probability):
+    if not (probability.endswith("%") or not probability[:-1].isdigit()):
         return "Invalid probability format. Please enter the probability as a percentage, e.g., '70%'."
+    return None
+
+
+def _is_horizon(timeframe: str) -> bool:
+    from stock_option_strategy._data.horizon import parse_horizon
+
+    try:
+        return parse_horizon(timeframe) is not None
+    except ValueError:
+        return False
+
 
+def _predict_probabilities(ticker: str, timeframe: str, probabilities: list) -> list:
+    """
+        Loads the Iron Condor data of a ticker once and predicts it for each probability.
+
+        Returns:
+        - list: A result dictionary or an error message for each probability.
+    """
     try:
-        ticker = ticker.upper()
-        iron_condor = IronCondor(ticker, TimeFrame[timeframe.upper()].get_enum(), prob=probability)
-        return iron_condor.get_different_width_option_price()
-    except KeyError:
-        return f"Invalid timeframe or probability. Please enter 'Monthly' or 'Weekly' as the timeframe. and probability format is 70%. {traceback.format_exc()}"
+        iron_condor = _load_iron_condor(ticker, timeframe, probabilities[0])
     except Exception as e:
-        return f"An error occurred: {str(e)}"
+        return [_load_error(e)] * len(probabilities)
+    return _price_probabilities(iron_condor, timeframe, probabilities)
+
+
+def _load_iron_condor(ticker: str, timeframe: str, probability: str = "70%"):
+    """
+        Loads the Iron Condor data of a ticker for a timeframe; it can then be priced for any probability.
+
+        Raises:
+        - ValueError: If the ticker does not exist.
+        - KeyError: For an invalid timeframe.
+    """
+    from stock_option_strategy._data.horizon import resolve_timeframe
+    from stock_option_strategy._data.iron_condor import IronCondor
+
+    with metrics.span("predict.load", timeframe=timeframe.upper()):
+        data_enum, horizon = resolve_timeframe(timeframe)
+        return IronCondor(ticker.upper(), data_enum, prob=probability, horizon=horizon)
+
+
+def _load_error(error: Exception) -> str:
+    """Returns the message a prediction reports when its data could not be loaded."""
+    if isinstance(error, KeyError):
+        details = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        return f"Invalid timeframe or probability. Please enter 'Monthly' or 'Weekly' as the timeframe. and probability format is 70%. {details}"
+    return f"An error occurred: {str(error)}"
+
+
+def _price_probabilities(iron_condor, timeframe: str, probabilities: list) -> list:
+    """
+        Prices loaded Iron Condor data for each probability.
+
+        Returns:
+        - list: A result dictionary or an error message for each probability.
+    """
+    results = []
+    for probability in probabilities:
+        try:
+            iron_condor.prob = probability
+            with metrics.span("predict.price", timeframe=timeframe.upper()):
+                results.append(iron_condor.get_different_width_option_price())
+        except KeyError:
+            results.append(f"Invalid timeframe or probability. Please enter 'Monthly' or 'Weekly' as the timeframe. and probability format is 70%. {traceback.format_exc()}")
+        except Exception as e:
+            results.append(f"An error occurred: {str(e)}")
+    return results
+
+
+def predict(ticker: str, timeframe: str="MONTHLY", probability: str="70%"):
+    """
+        Predicts the option prices using the Iron Condor strategy for a given stock ticker, timeframe, and probability.
+
+        Parameters:
+        - ticker (str): The stock ticker symbol.
+        - timeframe (str): The prediction timeframe, 'MONTHLY', 'WEEKLY' or a number of trading days such as '45D'.
+        - probability (str): The probability as a percentage, e.g., '70%'.
+
+        Returns:
+        - str: A message with the prediction result or an error message.
+
+        Raises:
+        - RuntimeError: If the configuration is not initialized.
+        - ValueError: For invalid timeframe or probability format.
+    """
+    if conf._settings._config_reader is None:
+        raise RuntimeError("Configuration not initialized. Please call initialize_config() first.")
+
+    error = _validate_request(timeframe, probability)
+    if error:
+        return error
+
+    with metrics.span("predict", timeframe=timeframe.upper()):
+        return _predict_probabilities(ticker, timeframe, [probability])[0]
     
 if __name__ == "__main__":
         pass
\ No newline at end of file
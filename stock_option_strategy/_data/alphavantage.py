@@ -1,205 +1,86 @@
-import sys
-import traceback
 from datetime import date
-import requests
 from stock_option_strategy.config._settings import get_api_key
 from stock_option_strategy._utils.enums import *
-from typing import List
-import numpy as np
-from scipy.stats import zscore
+from stock_option_strategy._data.http_client import AlphaVantageClient, AlphaVantageRequestError, get_client
+from stock_option_strategy._data.rate_limit import Priority
+from stock_option_strategy._utils import metrics
+from stock_option_strategy._data.series_stream import parse_series_file, parse_series_stream
+from stock_option_strategy._data.ingest import parse_series, build_document, merge_percent_summaries, \
+    summary_distribution, probability_table
 
 class AlphaData:
-    curr_year = str(date.today().year)
 
-    def __init__(self, data_enum: StockEnum, symbol):
-
-        self.price_stack = []
+    @staticmethod
+    def current_year() -> str:
+        """Returns the year that leads the documents, read on every call so a long-running process rolls over."""
+        return str(date.today().year)
+
+    def __init__(self, data_enum: StockEnum, symbol, outputsize="full", client: AlphaVantageClient = None,
+                 priority: Priority = Priority.INTERACTIVE, stream: bool = True, source: str = None):
+        """
+            Fetches the adjusted time series of a symbol from AlphaVantage, or reads a saved response from a file.
+
+            Interactive fetches jump ahead of bulk ones queued on the shared API quota. By default the response is
+            parsed while it downloads and only the dates and prices are kept, so the JSON tree of a full history is
+            never held in memory.
+
+            Args:
+                stream (bool): Parse the response incrementally; False decodes it whole into json_object.
+                source (str, optional): A saved AlphaVantage response (.json or .json.gz) to read instead of
+                    calling the API, e.g. a cached download.
+
+            Raises:
+                AlphaVantageError: If the series could not be fetched.
+        """
         self.data = {}
         self.symbol = symbol
         self.data_enum = data_enum
-        self.json_object = requests.get(f'https://www.alphavantage.co/query?function={self.data_enum.api_name}&outputsize=full&symbol={symbol}&apikey={get_api_key()}').json()
+        self.json_object = None
+        self._bars = None
+        if source is not None:
+            with metrics.span("alphavantage.read_file", timeframe=data_enum.duration):
+                self._bars = parse_series_file(source, data_enum.data_name)
+            return
+
+        client = client or get_client()
+        params = {"function": self.data_enum.api_name, "outputsize": outputsize, "symbol": symbol,
+                  "apikey": get_api_key()}
+        with metrics.span("alphavantage.download", timeframe=data_enum.duration, outputsize=outputsize):
+            if stream:
+                self._bars = client.stream(params, lambda chunks: parse_series_stream(chunks, data_enum.data_name),
+                                           priority)
+            else:
+                self.json_object = client.query(params, priority)
 
     #region adds all the necessary _data of a stock ticker from all the years
     def addData(self):
-        try:
-            temp_year = self.curr_year
-            self.data = {"_id": self.symbol,
-                         self.symbol:
-                             {
-                                temp_year:
-                                    {
-                                        self.data_enum.duration: {},
-                                        "WidthData": {"positiveWidth": [], "negativeWidth": [], "avgPosWidth": 0,
-                                                      "avgNegWidth": 0, "MaxPosWidth": 0, "MaxNegWidth": 0},
-                                        "PercentWidthData": {"positivePC": [], "negativePC": [], "avgPosPC": 0, "avgNegPC": 0,
-                                                             "MaxPosPC": 0, "MaxNegPC": 0}
-                                    }
-                            }
-
-                         }
-            for key, value in self.json_object[self.data_enum.data_name].items():
-
-                year = key.split("-")[0]
-                price = float(value['5. adjusted close'])
-
-                if year not in self.data[self.symbol]:
-
-                    self.__calcData(temp_year)
-                    self.data[self.symbol][year] = {self.data_enum.duration: {},
-                                                    "WidthData": {"positiveWidth": [], "negativeWidth": [],
-                                                                  "avgPosWidth": 0, "avgNegWidth": 0, "MaxPosWidth": 0,
-                                                                  "MaxNegWidth": 0},
-                                                    "PercentWidthData": {"positivePC": [], "negativePC": [],
-                                                                         "avgPosPC": 0, "avgNegPC": 0, "MaxPosPC": 0,
-                                                                         "MaxNegPC": 0}
-                                                    }
-
-                    temp_year = year
-
-                self.data[self.symbol][year][self.data_enum.duration][key] = price
-                self.__addPrice(price, year)
-
-            self.__add_prob_data()
-        except Exception as e:
-            print(traceback.format_exc())
-            print(f"Exception: {e}")
-            sys.exit(-1)
-
+        dates, closes, date_keys = self.getBars()
+        curr_year = self.current_year()
+        with metrics.span("alphavantage.build", timeframe=self.data_enum.duration):
+            self.data = build_document(self.symbol, self.data_enum, dates, closes, curr_year, date_keys)
+        with metrics.span("alphavantage.probabilities", timeframe=self.data_enum.duration):
+            self.__add_prob_data(curr_year)
         return self.data
 
     #endregion
 
-    #region Helper Methods to add to the database
-    def __addPrice(self, val, year):
-        try:
-            if len(self.price_stack) < 2:
-                self.price_stack.append(val)
-
-            if len(self.price_stack) == 2:
-                prev_price = self.price_stack.pop()
-                curr_price = self.price_stack.pop()
-
-                width = curr_price - prev_price
-                perChange = self.__percentChange(prev_price, curr_price)
-                if width < 0:
-                    self.data[self.symbol][year]["WidthData"]["negativeWidth"].append(width)
-                    self.data[self.symbol][year]["PercentWidthData"]["negativePC"].append(perChange)
-
-                else:
-                    self.data[self.symbol][year]["WidthData"]["positiveWidth"].append(width)
-                    self.data[self.symbol][year]["PercentWidthData"]["positivePC"].append(perChange)
-        except Exception as e:
-            print(traceback.format_exc())
-            print(f"Exception: {e}")
-            sys.exit(-1)
-
-    def __calcData(self, curr_year):
-
-        try:
-            #calculate avg Positive and Negative Width
-            self.data[self.symbol][curr_year]["WidthData"]["avgPosWidth"]  = self.__getAvg(self.data[self.symbol][curr_year]["WidthData"]["positiveWidth"])
-            self.data[self.symbol][curr_year]["WidthData"]["avgNegWidth"]  = self.__getAvg(self.data[self.symbol][curr_year]["WidthData"]["negativeWidth"])
-
-            #calculate max and min Width
-            self.data[self.symbol][curr_year]["WidthData"]["MaxPosWidth"]  = max(self.data[self.symbol][curr_year]["WidthData"]["positiveWidth"],default=0)
-            self.data[self.symbol][curr_year]["WidthData"]["MaxNegWidth"]  = min(self.data[self.symbol][curr_year]["WidthData"]["negativeWidth"],default=0)
-
-            #calculate avg Percentage Change
-            self.data[self.symbol][curr_year]["PercentWidthData"]["avgNegPC"]  = self.__getAvg(self.data[self.symbol][curr_year]["PercentWidthData"]["negativePC"])
-            self.data[self.symbol][curr_year]["PercentWidthData"]["avgPosPC"]  = self.__getAvg(self.data[self.symbol][curr_year]["PercentWidthData"]["positivePC"])
-
-            #calculate max and min Percentage Change
-            self.data[self.symbol][curr_year]["PercentWidthData"]["MaxPosPC"]  = max(self.data[self.symbol][curr_year]["PercentWidthData"]["positivePC"],default=0)
-            self.data[self.symbol][curr_year]["PercentWidthData"]["MaxNegPC"]  = min(self.data[self.symbol][curr_year]["PercentWidthData"]["negativePC"],default=0)
-
-        except Exception as e:
-            print(traceback.format_exc())
-            print(f"Exception: {e}")
-            sys.exit(-1)
-    #endregion
-
-    def __addProbKeys(self):
-        self.data[self.symbol].setdefault("Probabilities", {})
-        self.data[self.symbol]["Probabilities"].setdefault("Call", {})
-        self.data[self.symbol]["Probabilities"].setdefault("Put", {})
-
-    def __add_prob_data(self):
-        temp_posProb_PC = []
-        temp_negProb_PC = []
-        db_keys = list(self.data[self.symbol].keys())[1:]
-        for year in db_keys:
-            try:
-                temp_posProb_PC.extend(self.data[self.symbol][year]["PercentWidthData"]["positivePC"])
-                temp_negProb_PC.extend(self.data[self.symbol][year]["PercentWidthData"]["negativePC"])
-            except Exception as e:
-                print(e)
-
-        updated_without_outliers_POS = self.__remove_outliers_zscore(temp_posProb_PC)
-        updated_without_outliers_NEG = self.__remove_outliers_zscore(temp_negProb_PC)
-
-        self.__addProbKeys()
-        listOf_Probs = [50,60,70,80,90,99]
-        for probs in listOf_Probs:
-            self.data[self.symbol]["Probabilities"]["Call"].setdefault(f"{probs}%", None)
-            self.data[self.symbol]["Probabilities"]["Put"].setdefault(f"{probs}%", None)
-            self.data[self.symbol]["Probabilities"]["Call"][f"{probs}%"] = self.__calc_positive_prob(updated_without_outliers_POS, probs)
-            self.data[self.symbol]["Probabilities"]["Put"][f"{probs}%"] = self.__calc_negative_prob(updated_without_outliers_NEG, probs)
-
-        self.data[self.symbol]["Probabilities"]["Call"].setdefault("OverallAvgPosPC", None)
-        self.data[self.symbol]["Probabilities"]["Put"].setdefault("OverallAvgNegPC", None)
-
-        self.data[self.symbol]["Probabilities"]["Call"]["OverallAvgPosPC"] = self.__getAvg(updated_without_outliers_POS)
-        self.data[self.symbol]["Probabilities"]["Put"]["OverallAvgNegPC"] = self.__getAvg(updated_without_outliers_NEG)
-
-    @staticmethod
-    #region helper methods to calculate _data
-    def __percentChange(t0, t1):
-        if t0==0:
-            return 0
-        return round(((t1-t0)/t0) * 100,2)
-
-    @staticmethod
-    def __getAvg(data):
-        if len(data) == 0:
-            return 0
-        return round(sum(data)/len(data),2)
-
-    @staticmethod
-    def __calc_negative_prob(percentData, percentage):
-        percentData.sort(reverse=True)
-        # Calculate the index corresponding to the given percentage
-        index = int(len(percentData) * (percentage / 100))
-
-        # Get the number at the calculated index
-        return percentData[index]
-
-    @staticmethod
-    def __calc_positive_prob(percentData, percentage):
-        # Sort the _data in ascending order
-        percentData.sort()
-        if percentage == 100:
-            return percentData[-1]
-        # Calculate the index corresponding to the given percentage
-        index = int(len(percentData) * (percentage / 100))
-
-        # Get the number at the calculated index
-        return percentData[index]
-
-    #endregion
-
-    @staticmethod
-    def __remove_outliers_zscore(Pdata, threshold=3) -> List:
-        # Convert the list of floats to a NumPy array
-        temp_data = np.array(Pdata)
-
-        # Calculate the z-scores for each element in the array
-        z_scores = zscore(temp_data)
-
-        # Identify the indices of the outliers based on the threshold
-        outlier_indices = np.where(np.abs(z_scores) > threshold)
-
-        # Remove the outliers from the _data array
-        data_without_outliers = np.delete(temp_data, outlier_indices)
-
-        return sorted(list(data_without_outliers))
-
+    def getBars(self):
+        """
+            Parses the fetched series into NumPy arrays without building the document.
+
+            Returns:
+                tuple[np.ndarray, np.ndarray, list]: The bar dates, prices and date strings, newest first.
+        """
+        if self._bars is not None:
+            return self._bars
+        series = self.json_object.get(self.data_enum.data_name)
+        if series is None:
+            raise AlphaVantageRequestError(f"AlphaVantage returned no {self.data_enum.data_name} for {self.symbol}")
+        with metrics.span("alphavantage.parse", timeframe=self.data_enum.duration):
+            return parse_series(series)
+
+    def __add_prob_data(self, curr_year: str):
+        positive, negative = merge_percent_summaries(self.data[self.symbol], curr_year)
+        distribution = summary_distribution(positive, negative)
+        self.data[self.symbol]["Probabilities"] = probability_table(distribution)
+        self.data[self.symbol]["Distribution"] = distribution
@@ -0,0 +1,206 @@
+import numpy as np
+from pymongo import ASCENDING, DESCENDING, DeleteMany, InsertOne, ReplaceOne, UpdateOne
+
+from stock_option_strategy._data.storage import StorageBackend
+from stock_option_strategy._utils.enums import StockEnum
+
+# the bar collections whose index this process already ensured
+_indexed_collections = set()
+
+
+class BarStore(StorageBackend):
+    BARS_COLLECTION = "StockBars"
+    SUMMARY_COLLECTION = "StockSummaries"
+
+    def __init__(self, db_client, data_enum: StockEnum):
+        """
+            Normalized storage for stock data: one small document per bar plus one summary document per symbol.
+
+            Bars live in StockBars as {symbol, timeframe, date, close} under a unique (symbol, timeframe, date)
+            index. The summary in StockSummaries holds everything else of the legacy document (the per-year
+            WidthData and PercentWidthData, Probabilities and Distribution) under "stock", so documents stay
+            small however long the history grows. Reads hand back the legacy document shape. The bar index is
+            created by the first BarStore of a process per collection.
+
+            Args:
+                db_client (MongoClientWrapper): The database client.
+                data_enum (StockEnum): The timeframe stored.
+        """
+        self.data_enum = data_enum
+        self.timeframe = data_enum.duration
+        self.bars = db_client.db[self.BARS_COLLECTION]
+        self.summaries = db_client.db[self.SUMMARY_COLLECTION]
+        if self.bars not in _indexed_collections:
+            self.bars.create_index([("symbol", ASCENDING), ("timeframe", ASCENDING), ("date", DESCENDING)],
+                                   unique=True)
+            _indexed_collections.add(self.bars)
+
+    def _summary_id(self, symbol):
+        return f"{symbol}:{self.timeframe}"
+
+    def _bar_filter(self, symbol, since_date=None, until_date=None):
+        bar_filter = {"symbol": symbol, "timeframe": self.timeframe}
+        if since_date or until_date:
+            bar_filter["date"] = {}
+            if since_date:
+                bar_filter["date"]["$gte"] = since_date
+            if until_date:
+                bar_filter["date"]["$lte"] = until_date
+        return bar_filter
+
+    def _bar_inserts(self, symbol, stock: dict) -> list:
+        return [InsertOne({"symbol": symbol, "timeframe": self.timeframe, "date": day, "close": close})
+                for year, year_data in stock.items() if year.isdigit()
+                for day, close in year_data.get(self.timeframe, {}).items()]
+
+    def _summary(self, stock: dict) -> dict:
+        return {key: ({name: value for name, value in entry.items() if name != self.timeframe}
+                      if key.isdigit() else entry)
+                for key, entry in stock.items()}
+
+    def exists(self, symbol) -> bool:
+        return self.summaries.count_documents({"_id": self._summary_id(symbol)}, limit=1) != 0
+
+    def exists_many(self, symbols) -> set:
+        """Returns which of the symbols are stored, in one query."""
+        ids = [self._summary_id(symbol) for symbol in symbols]
+        return {doc["symbol"] for doc in self.summaries.find({"_id": {"$in": ids}}, {"symbol": 1})}
+
+    def read(self, symbol, fields: tuple = None):
+        """
+            Reads a symbol in the legacy document shape.
+
+            Args:
+                symbol (str): The stock symbol.
+                fields (tuple, optional): Dotted paths to load, as for StockDB.getData. "<year>.<duration>" paths
+                    are served from the bars collection, everything else from the summary.
+
+            Returns:
+                dict: The symbol's data, or None if it isn't stored.
+        """
+        return self.read_many([symbol], fields).get(symbol)
+
+    def read_many(self, symbols, fields: tuple = None) -> dict:
+        """
+            Reads several symbols in the legacy document shape with one summary query and one bars query.
+
+            Returns:
+                dict: The data of every stored symbol, keyed by symbol.
+        """
+        ids = [self._summary_id(symbol) for symbol in symbols]
+        if fields is None:
+            projection = {"symbol": 1, "stock": 1}
+            bar_years = None
+        else:
+            bar_years = [field.split(".")[0] for field in fields if field.endswith(f".{self.timeframe}")]
+            projection = {"symbol": 1, **{f"stock.{field}": 1 for field in fields
+                                          if not field.endswith(f".{self.timeframe}")}}
+        stocks = {doc["symbol"]: doc.get("stock", {}) for doc in self.summaries.find({"_id": {"$in": ids}}, projection)}
+        if not stocks or bar_years == []:
+            return stocks
+
+        bar_filter = self._bar_filter(None, *((f"{min(bar_years)}-01-01", f"{max(bar_years)}-12-31") if bar_years else ()))
+        bar_filter["symbol"] = {"$in": list(stocks)}
+        for bar in self.bars.find(bar_filter, {"_id": 0, "symbol": 1, "date": 1, "close": 1}).sort("date", DESCENDING):
+            stock = stocks[bar["symbol"]]
+            stock.setdefault(bar["date"][:4], {}).setdefault(self.timeframe, {})[bar["date"]] = bar["close"]
+        return stocks
+
+    def read_recent(self, symbol, since_year: str):
+        """
+            Reads every stored year's PercentWidthData and the bars of the years >= since_year.
+
+            Returns:
+                dict: {year: {"PercentWidthData", "bars"}}, or None if the symbol isn't stored.
+        """
+        projection = {"_id": 0, "stock": 1}
+        summary = self.summaries.find_one({"_id": self._summary_id(symbol)}, projection)
+        if summary is None:
+            return None
+        years = {year: {"PercentWidthData": data["PercentWidthData"], "bars": None}
+                 for year, data in summary["stock"].items() if year.isdigit()}
+        for bar in self.bars.find(self._bar_filter(symbol, f"{since_year}-01-01"), {"_id": 0, "date": 1, "close": 1}) \
+                .sort("date", DESCENDING):
+            year = years.setdefault(bar["date"][:4], {"PercentWidthData": {}, "bars": None})
+            if year["bars"] is None:
+                year["bars"] = {}
+            year["bars"][bar["date"]] = bar["close"]
+        return years
+
+    def read_series(self, symbol):
+        """Reads every bar of a symbol straight from the bars collection, oldest first."""
+        if not self.exists(symbol):
+            return None
+        bars = list(self.bars.find(self._bar_filter(symbol), {"_id": 0, "date": 1, "close": 1}).sort("date", ASCENDING))
+        return (np.array([bar["date"] for bar in bars], dtype="datetime64[D]"),
+                np.array([bar["close"] for bar in bars], dtype=np.float64))
+
+    def write(self, symbol, stock: dict):
+        """
+            Replaces everything stored for a symbol with a legacy-shaped stock document, in two bulk writes.
+
+            The bars are written before the summary, which is what marks a symbol as stored, so an interrupted
+            first write never leaves a summary without bars. The next write deletes any bars it left behind.
+        """
+        self.bars.bulk_write([DeleteMany(self._bar_filter(symbol))] + self._bar_inserts(symbol, stock), ordered=True)
+        self.summaries.bulk_write([ReplaceOne({"_id": self._summary_id(symbol)},
+                                              {"symbol": symbol, "timeframe": self.timeframe,
+                                               "stock": self._summary(stock)}, upsert=True)])
+
+    def replace_years(self, symbol, years: dict, extra: dict):
+        """
+            Replaces the bars and summaries of some years and sets other top-level entries such as Probabilities.
+
+            Args:
+                symbol (str): The stock symbol.
+                years (dict): The rebuilt years, keyed by year.
+                extra (dict): Other entries of the stock document to set.
+        """
+        first_year = min(years)
+        self.bars.bulk_write([DeleteMany(self._bar_filter(symbol, f"{first_year}-01-01"))]
+                             + self._bar_inserts(symbol, years), ordered=True)
+        changes = {f"stock.{key}": value for key, value in {**self._summary(years), **extra}.items()}
+        self.summaries.bulk_write([UpdateOne({"_id": self._summary_id(symbol)}, {"$set": changes})])
+
+    def delete_all(self):
+        self.bars.delete_many({"timeframe": self.timeframe})
+        self.summaries.delete_many({"timeframe": self.timeframe})
+
+
+def migrate_to_bars(db_client, data_enum: StockEnum, batch_size: int = 50) -> int:
+    """
+        Copies every legacy one-document-per-symbol entry of a timeframe into the bar layout.
+
+        The legacy collection is left untouched, so the migration can be re-run and verified before switching over.
+
+        Args:
+            db_client (MongoClientWrapper): The database client.
+            data_enum (StockEnum): The timeframe to migrate.
+            batch_size (int): The number of legacy documents fetched per round trip.
+
+        Returns:
+            int: The number of symbols migrated.
+    """
+    store = BarStore(db_client, data_enum)
+    migrated = 0
+    for doc in db_client.db[data_enum.collection_name].find({}, batch_size=batch_size):
+        symbol = doc["_id"]
+        store.write(symbol, doc[symbol])
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    import argparse
+    from stock_option_strategy._cli import initialize_config
+    from stock_option_strategy._data.db_client import get_db_client
+    from stock_option_strategy._utils.enums import TimeFrame
+
+    parser = argparse.ArgumentParser(description="Migrate stored stock documents to the bar layout.")
+    parser.add_argument("--timeframe", choices=["weekly", "monthly", "daily"], default="weekly")
+    parser.add_argument("--config", default=None, help="Path of the config.toml file")
+    args = parser.parse_args()
+
+    initialize_config(args.config)
+    count = migrate_to_bars(get_db_client(), TimeFrame[args.timeframe.upper()].get_enum())
+    print(f"Migrated {count} symbols to the bar layout")
@@ -0,0 +1,284 @@
+import json
+import os
+import re
+import tempfile
+from urllib.parse import quote
+
+import numpy as np
+
+from stock_option_strategy._data.storage import StorageBackend
+from stock_option_strategy._utils.enums import StockEnum
+
+BAR_DTYPE = np.dtype([("date", "datetime64[D]"), ("close", np.float64)])
+# device names Windows reserves whatever the extension
+_RESERVED_NAMES = {"CON", "PRN", "AUX", "NUL"} | {f"{name}{digit}" for name in ("COM", "LPT") for digit in range(1, 10)}
+
+
+def file_name(symbol: str) -> str:
+    """
+        Escapes a symbol into a file name that is valid on every platform, e.g. "BRK/B" into "BRK%2FB".
+
+        Everything but letters, digits and "-_.~" is percent-encoded, so a symbol can't reach outside the data
+        directory. A leading "." and the first letter of a name Windows reserves, such as CON, are encoded too.
+        Distinct symbols keep distinct names.
+
+        Raises:
+            ValueError: If the symbol is empty.
+    """
+    if not symbol:
+        raise ValueError("The symbol must not be empty")
+    name = quote(symbol, safe="")
+    if name[0] == "." or name.split(".")[0].upper() in _RESERVED_NAMES:
+        name = f"%{ord(name[0]):02X}{name[1:]}"
+    return name
+
+
+def _write_new(directory, prefix, suffix, write) -> str:
+    """Writes a new file with a unique name in directory and returns its path, removing it again if writing fails."""
+    fd, path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        if os.path.exists(path):
+            os.unlink(path)
+        raise
+    return path
+
+
+def _atomic_write(path, write):
+    """Writes a file through a temporary sibling renamed over it, so readers see the old or the new file, never a torn one."""
+    tmp_path = _write_new(os.path.dirname(path), "", ".tmp", write)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ColumnarStore(StorageBackend):
+
+    def __init__(self, root: str, data_enum: StockEnum):
+        """
+            Local storage without MongoDB: one memory-mapped file of bars per (symbol, timeframe), a small index
+            and a JSON summary.
+
+            The bars are raw (date, close) records sorted by date, so a year is a binary-searched slice of the mapped
+            file. The index names the bar file and how many of its rows are live, and is replaced atomically after
+            the rows are written; rows past that count are ignored. The summary holds the rest of the legacy
+            document: the per-year WidthData and PercentWidthData, Probabilities and Distribution, and is replaced
+            atomically as well.
+
+            Bar files are never rewritten in place, so the views read_bars and read_series hand out stay valid.
+            An update that only adds bars after the stored ones appends them to the bar file. One that changes a
+            stored bar, such as an in-progress weekly or monthly bar, or a full write, writes the live rows to a
+            new bar file instead and removes the old one once the index points past it. Where a file that is
+            still mapped can't be removed (Windows), it stays until a later write of the symbol removes it.
+
+            Args:
+                root (str): The directory holding the data, one subdirectory per timeframe.
+                data_enum (StockEnum): The timeframe stored.
+        """
+        self.data_enum = data_enum
+        self.timeframe = data_enum.duration
+        self.directory = os.path.join(os.path.expanduser(root), self.timeframe)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _index_path(self, symbol):
+        return os.path.join(self.directory, f"{file_name(symbol)}.index")
+
+    def _summary_path(self, symbol):
+        return os.path.join(self.directory, f"{file_name(symbol)}.json")
+
+    def _read_index(self, symbol):
+        try:
+            with open(self._index_path(symbol), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def _load_records(self, symbol, attempts: int = 3):
+        """Maps the live rows of a symbol's bar file, returning the index read alongside, or (None, None)."""
+        for attempt in range(attempts):
+            index = self._read_index(symbol)
+            if index is None:
+                return None, None
+            if not index["rows"]:
+                return np.empty(0, dtype=BAR_DTYPE), index
+            try:
+                return np.memmap(os.path.join(self.directory, index["file"]), dtype=BAR_DTYPE, mode="r",
+                                 shape=(index["rows"],)), index
+            except FileNotFoundError:
+                # a writer moved the bars to a new file and removed this one after the index was read
+                if attempt == attempts - 1:
+                    raise
+        return None, None
+
+    def read_bars(self, symbol):
+        """
+            Maps the bars of a symbol without copying them.
+
+            Returns:
+                tuple[np.ndarray, np.ndarray]: Read-only views of the dates and closes, oldest first, or None if the
+                symbol isn't stored.
+        """
+        records, _ = self._load_records(symbol)
+        if records is None:
+            return None
+        return records["date"], records["close"]
+
+    def read_series(self, symbol):
+        # the mapped views themselves: bar files are never replaced while mapped, so StockDB can cache them
+        return self.read_bars(symbol)
+
+    def _read_summary(self, symbol):
+        try:
+            with open(self._summary_path(symbol), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _by_year(dates, closes, since_date=None, until_date=None) -> dict:
+        """Groups the bars within [since_date, until_date) by year, newest first like the legacy documents."""
+        start, end = 0, len(dates)
+        if since_date is not None:
+            start = np.searchsorted(dates, np.datetime64(since_date))
+        if until_date is not None:
+            end = np.searchsorted(dates, np.datetime64(until_date))
+        dates = dates[start:end][::-1]
+        keys = np.datetime_as_string(dates).tolist()
+        values = closes[start:end][::-1].tolist()
+        # one dict per run of bars in the same year
+        year_of = dates.astype("datetime64[Y]")
+        edges = [0, *(np.flatnonzero(year_of[1:] != year_of[:-1]) + 1).tolist(), len(keys)]
+        return {keys[first][:4]: dict(zip(keys[first:last], values[first:last]))
+                for first, last in zip(edges, edges[1:]) if last > first}
+
+    def exists_many(self, symbols) -> set:
+        return {symbol for symbol in symbols if os.path.exists(self._summary_path(symbol))}
+
+    def read_many(self, symbols, fields: tuple = None) -> dict:
+        stocks = {}
+        for symbol in symbols:
+            summary = self._read_summary(symbol)
+            if summary is None:
+                continue
+            if fields is None:
+                bar_years = [year for year in summary if year.isdigit()]
+                stock = summary
+            else:
+                bar_years = [field.split(".")[0] for field in fields if field.endswith(f".{self.timeframe}")]
+                stock = {}
+                for field in fields:
+                    if field.endswith(f".{self.timeframe}"):
+                        continue
+                    self.__project(summary, stock, field.split("."))
+
+            bars = self.read_bars(symbol) if bar_years else None
+            if bars is not None:
+                since_date = None if fields is None else f"{min(bar_years)}-01-01"
+                until_date = None if fields is None else f"{int(max(bar_years)) + 1}-01-01"
+                for year, year_bars in self._by_year(*bars, since_date, until_date).items():
+                    if year in bar_years:
+                        stock.setdefault(year, {})[self.timeframe] = year_bars
+            stocks[symbol] = stock
+        return stocks
+
+    @staticmethod
+    def __project(source: dict, target: dict, path: list):
+        # copies source[path] into target under the same nested keys, if it exists
+        key = path[0]
+        if key not in source:
+            return
+        if len(path) == 1:
+            target[key] = source[key]
+        elif isinstance(source[key], dict):
+            ColumnarStore.__project(source[key], target.setdefault(key, {}), path[1:])
+
+    def read_recent(self, symbol, since_year: str):
+        summary = self._read_summary(symbol)
+        if summary is None:
+            return None
+        years = {year: {"PercentWidthData": data["PercentWidthData"], "bars": None}
+                 for year, data in summary.items() if year.isdigit()}
+        bars = self.read_bars(symbol)
+        if bars is not None:
+            for year, year_bars in self._by_year(*bars, f"{since_year}-01-01").items():
+                years.setdefault(year, {"PercentWidthData": {}})["bars"] = year_bars
+        return years
+
+    def _to_records(self, stock: dict) -> np.ndarray:
+        bars = [(day, close) for year, year_data in stock.items() if year.isdigit()
+                for day, close in year_data.get(self.timeframe, {}).items()]
+        records = np.array(bars, dtype=BAR_DTYPE)
+        records.sort(order="date")
+        return records
+
+    def _summary(self, stock: dict) -> dict:
+        return {key: ({name: value for name, value in entry.items() if name != self.timeframe}
+                      if key.isdigit() else entry)
+                for key, entry in stock.items()}
+
+    def _write_index(self, symbol, index: dict):
+        _atomic_write(self._index_path(symbol), lambda file: file.write(json.dumps(index).encode()))
+
+    def _write_bars(self, symbol, records: np.ndarray):
+        """Writes the records to a new bar file, points the index at it and removes the symbol's other bar files."""
+        name = file_name(symbol)
+        path = _write_new(self.directory, f"{name}.", ".bars", lambda file: file.write(records.tobytes()))
+        self._write_index(symbol, {"file": os.path.basename(path), "rows": len(records)})
+        # mkstemp's random part has no dots, so this doesn't match the files of a symbol like "BRK.B" for "BRK"
+        stale = re.compile(rf"{re.escape(name)}\.[a-z0-9_]+\.bars")
+        for entry in os.listdir(self.directory):
+            if entry != os.path.basename(path) and stale.fullmatch(entry):
+                try:
+                    os.unlink(os.path.join(self.directory, entry))
+                except OSError:
+                    # still mapped on Windows, removed by a later write
+                    pass
+
+    def _append_bars(self, symbol, index: dict, records: np.ndarray):
+        """Appends records after the live rows of the current bar file, then swaps in an index counting them."""
+        with open(os.path.join(self.directory, index["file"]), "r+b") as file:
+            # rows past the live ones were left by an interrupted write and aren't mapped by anyone
+            file.seek(index["rows"] * BAR_DTYPE.itemsize)
+            file.write(records.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        self._write_index(symbol, {"file": index["file"], "rows": index["rows"] + len(records)})
+
+    def _write_summary(self, symbol, summary: dict):
+        _atomic_write(self._summary_path(symbol), lambda file: file.write(json.dumps(summary).encode()))
+
+    def write(self, symbol, stock: dict):
+        # bars first, so a symbol only counts as stored once both files are in place
+        self._write_bars(symbol, self._to_records(stock))
+        self._write_summary(symbol, self._summary(stock))
+
+    def replace_years(self, symbol, years: dict, extra: dict):
+        # The rebuilt years replace the stored bars from the first of them on. Stored bars they repeat unchanged
+        # stay where they are and only the newer ones are appended; otherwise the live rows move to a new file.
+        records = self._to_records(years)
+        stored, index = self._load_records(symbol)
+        if stored is None:
+            self._write_bars(symbol, records)
+        else:
+            keep = np.searchsorted(stored["date"], np.datetime64(f"{min(years)}-01-01"))
+            overlap = len(stored) - keep
+            if overlap <= len(records) and np.array_equal(stored[keep:], records[:overlap]):
+                self._append_bars(symbol, index, records[overlap:])
+            else:
+                self._write_bars(symbol, np.concatenate([stored[:keep], records]))
+
+        summary = self._read_summary(symbol) or {}
+        summary.update(self._summary(years))
+        summary.update(extra)
+        self._write_summary(symbol, summary)
+
+    def delete_all(self):
+        for name in os.listdir(self.directory):
+            if name.endswith((".bars", ".index", ".json")):
+                os.unlink(os.path.join(self.directory, name))
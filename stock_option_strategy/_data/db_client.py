@@ -1,4 +1,5 @@
-from pymongo import MongoClient
+import threading
+
 from stock_option_strategy.config._settings import get_database_uri
 class MongoClientWrapper:
     def __init__(self, connection_string: str, database_name: str = "MyStockDB"):
@@ -8,8 +9,42 @@ class MongoClientWrapper:
         :param connection_string: The MongoDB connection string.
         :param database_name: The name of the database to connect to.
         """
+        from pymongo import MongoClient
+
         client = MongoClient(connection_string)
         self.db = client[database_name]
 
 
-DB_Client = MongoClientWrapper(get_database_uri())
\ No newline at end of file
+_db_client: MongoClientWrapper = None
+_db_client_lock = threading.Lock()
+
+
+def get_db_client() -> MongoClientWrapper:
+    """
+    Returns the database client shared by the whole process, connecting on first use.
+
+    Importing this module doesn't connect, so the package can be imported before initialize_config() and
+    short-lived processes that never touch the database don't pay for pymongo.
+    """
+    global _db_client
+    if _db_client is None:
+        with _db_client_lock:
+            if _db_client is None:
+                _db_client = MongoClientWrapper(get_database_uri())
+    return _db_client
+
+
+def set_db_client(db_client: MongoClientWrapper):
+    """
+    Replaces the shared database client, e.g. with an in-memory stand-in for offline runs.
+    """
+    global _db_client
+    with _db_client_lock:
+        _db_client = db_client
+
+
+def __getattr__(name):
+    # keeps "from stock_option_strategy._data.db_client import DB_Client" working, now created on first access
+    if name == "DB_Client":
+        return get_db_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,89 @@
+import datetime
+import threading
+
+from stock_option_strategy._data import trading_calendar
+from stock_option_strategy._utils.enums import StockEnum
+
+
+class FreshnessPolicy:
+
+    def __init__(self, ttl: float = 24 * 3600, publish_delay: float = 30 * 60):
+        """
+            Decides whether a stored series can be behind AlphaVantage, from the NYSE calendar, so data is only
+            refreshed once a newer bar can exist.
+
+            A session's bar exists once the session closed (1 pm on early closes) and publish_delay passed. Over
+            weekends, holidays and before the close nothing newer exists, so nothing is refreshed.
+
+            A daily series is stale as soon as a session closed after its newest bar. The newest weekly or monthly
+            bar is the period in progress, dated by its latest session, which AlphaVantage moves along every day.
+            Such a series is stale once its period's final session closed. Until then the bar in progress may lag
+            behind by up to ttl.
+
+            Args:
+                ttl (float): How long, in seconds, the weekly or monthly bar in progress may miss published
+                    sessions.
+                publish_delay (float): How long after the close a session's bar is published, in seconds.
+        """
+        self.ttl = datetime.timedelta(seconds=ttl)
+        self.publish_delay = datetime.timedelta(seconds=publish_delay)
+
+    @classmethod
+    def from_settings(cls):
+        """Creates the policy from the optional [freshness] settings, see get_freshness_settings."""
+        from stock_option_strategy.config import get_freshness_settings
+
+        settings = get_freshness_settings()
+        return cls(ttl=settings["ttl_hours"] * 3600, publish_delay=settings["publish_delay_minutes"] * 60)
+
+    def latest_bar(self, now: datetime.datetime = None) -> datetime.date:
+        """Returns the date of the newest bar AlphaVantage can have, of any timeframe."""
+        return trading_calendar.latest_session(now, self.publish_delay)
+
+    def expected_next_bar(self, last_bar: datetime.date, data_enum: StockEnum) -> datetime.date:
+        """
+            Returns the date of the next final bar after a stored one: the next session for daily series, the last
+            session of the week or month holding the next session for weekly and monthly ones.
+        """
+        return trading_calendar.period_end(trading_calendar.next_trading_day(last_bar), data_enum.duration)
+
+    def is_stale(self, last_bar: datetime.date, data_enum: StockEnum, now: datetime.datetime = None) -> bool:
+        """
+            Tells whether a series should be refreshed.
+
+            Args:
+                last_bar (datetime.date): The date of the newest stored bar.
+                data_enum (StockEnum): The timeframe of the series.
+                now (datetime.datetime, optional): The time asked about, an aware datetime or a naive local one.
+                    Defaults to now.
+        """
+        latest = self.latest_bar(now)
+        if last_bar >= latest:
+            return False
+        if not trading_calendar.is_trading_day(last_bar) \
+                or trading_calendar.period_end(last_bar, data_enum.duration) <= latest:
+            # a final bar closed since, or a new period began
+            return True
+        published = trading_calendar.session_closed_at(trading_calendar.next_trading_day(last_bar)) \
+            + self.publish_delay
+        return trading_calendar.exchange_time(now) - published >= self.ttl
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_freshness_policy() -> FreshnessPolicy:
+    """Returns the policy shared by the process, created from the settings on first use."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = FreshnessPolicy.from_settings()
+        return _policy
+
+
+def set_freshness_policy(policy: FreshnessPolicy):
+    """Replaces the shared policy, e.g. FreshnessPolicy(ttl=0) to keep weekly and monthly bars in progress current."""
+    global _policy
+    with _policy_lock:
+        _policy = policy
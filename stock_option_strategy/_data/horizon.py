@@ -0,0 +1,106 @@
+import re
+
+import numpy as np
+
+from stock_option_strategy._data.ingest import build_distribution, probability_table, round2
+from stock_option_strategy._utils.enums import StockEnum, TimeFrame
+from stock_option_strategy.config._settings import get_timeframe_source
+
+# the trading days WEEKLY and MONTHLY stand for when they are derived from the daily series
+TRADING_DAYS = {"WEEKLY": 5, "MONTHLY": 21}
+_HORIZON = re.compile(r"^(\d+)D$")
+
+
+def parse_horizon(timeframe: str):
+    """
+        Parses a horizon timeframe such as "45D", a number of trading days.
+
+        Returns:
+            int: The number of trading days, or None if the timeframe isn't a horizon.
+
+        Raises:
+            ValueError: If the horizon is zero days.
+    """
+    match = _HORIZON.match(timeframe.strip().upper())
+    if match is None:
+        return None
+    days = int(match.group(1))
+    if days < 1:
+        raise ValueError(f"Horizon {timeframe} must be at least one trading day")
+    return days
+
+
+def resolve_timeframe(timeframe: str) -> tuple:
+    """
+        Maps a prediction timeframe to the series it is computed from.
+
+        "45D" is 45 trading days of the daily series. WEEKLY and MONTHLY use their own AlphaVantage series, unless
+        the [predict] source setting is "daily", in which case they are 5 and 21 trading days of the daily one, so
+        one download per ticker covers every timeframe.
+
+        Returns:
+            tuple[StockEnum, int]: The stored timeframe, and the horizon in trading days or None for the stored
+            timeframe's own bars.
+
+        Raises:
+            KeyError: If the timeframe is unknown.
+    """
+    horizon = parse_horizon(timeframe)
+    if horizon is not None:
+        return TimeFrame.DAILY.get_enum(), horizon
+    name = timeframe.strip().upper()
+    if name in TRADING_DAYS and get_timeframe_source() == "daily":
+        return TimeFrame.DAILY.get_enum(), TRADING_DAYS[name]
+    return TimeFrame[name].get_enum(), None
+
+
+def forward_returns(closes: np.ndarray, horizon: int, step: int = None) -> np.ndarray:
+    """
+        Computes the percent change over every window of `horizon` bars, without a Python loop.
+
+        Like the pairs of the stored timeframes, the windows don't overlap by default and are anchored at the newest
+        bar, so the latest move always counts.
+
+        Args:
+            closes (np.ndarray): The prices, oldest first.
+            horizon (int): The window length in bars, e.g. trading days.
+            step (int, optional): The distance between window starts, defaults to horizon. 1 gives every
+                overlapping window.
+
+        Returns:
+            np.ndarray: The percent changes rounded to two decimals, newest window first.
+    """
+    step = step or horizon
+    newest_first = np.asarray(closes, dtype=np.float64)[::-1]
+    count = len(newest_first) - horizon
+    if count <= 0:
+        return np.empty(0)
+    newer = newest_first[0:count:step]
+    older = newest_first[horizon::step]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = round2(((newer - older) / older) * 100)
+    percent[older == 0] = 0
+    return percent
+
+
+def horizon_document(dates: np.ndarray, closes: np.ndarray, horizon: int, duration: str) -> dict:
+    """
+        Builds the part of a stock document a prediction reads, for any horizon of a stored series.
+
+        Args:
+            dates (np.ndarray): The bar dates (datetime64[D]), oldest first.
+            closes (np.ndarray): The prices aligned with dates.
+            horizon (int): The horizon in bars.
+            duration (str): The timeframe of the bars, e.g. "DAILY".
+
+        Returns:
+            dict: "Distribution" and "Probabilities" of the horizon's returns, and the last bar under its year
+            like the stored documents.
+    """
+    percent = forward_returns(closes, horizon)
+    distribution = build_distribution(percent[percent >= 0].tolist(), percent[percent < 0].tolist())
+    stock = {"Probabilities": probability_table(distribution), "Distribution": distribution}
+    if len(dates):
+        last_date = str(dates[-1])
+        stock[last_date[:4]] = {duration: {last_date: float(closes[-1])}}
+    return stock
@@ -0,0 +1,185 @@
+import random
+import threading
+import time
+
+from stock_option_strategy.config._settings import get_rate_limit_settings, is_initialized
+from stock_option_strategy._data.rate_limit import Priority, RateLimitScheduler
+from stock_option_strategy._utils import metrics
+
+
+class AlphaVantageError(Exception):
+    """Base class for the errors raised while talking to AlphaVantage."""
+
+
+class AlphaVantageThrottleError(AlphaVantageError):
+    """AlphaVantage kept answering with a "Note"/"Information" throttle payload."""
+
+
+class AlphaVantageRequestError(AlphaVantageError):
+    """AlphaVantage rejected the request, e.g. an unknown symbol or an unexpected payload."""
+
+
+class AlphaVantageUnavailableError(AlphaVantageError):
+    """AlphaVantage could not be reached or kept failing with 5xx responses."""
+
+
+class AlphaVantageClient:
+    BASE_URL = "https://www.alphavantage.co/query"
+
+    def __init__(self, base_url: str = BASE_URL, timeout=(5, 60), max_retries: int = 4, backoff: float = 1.0,
+                 max_backoff: float = 60.0, pool_size: int = 16, scheduler: RateLimitScheduler = None):
+        """
+            A pooled HTTP client for the AlphaVantage query API.
+
+            The underlying session keeps connections alive between calls and negotiates gzip. Throttle payloads,
+            5xx responses and connection errors are retried with exponential backoff.
+
+            Args:
+                base_url (str): The query endpoint, overridable to point at a local stub server.
+                timeout (float | tuple): The connect and read timeouts in seconds.
+                max_retries (int): How many times a throttled or failed call is retried.
+                backoff (float): The delay before the first retry, doubled on every attempt.
+                max_backoff (float): The upper bound of a single retry delay.
+                pool_size (int): The number of keep-alive connections kept per host.
+                scheduler (RateLimitScheduler, optional): The quota every attempt has to wait for.
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.scheduler = scheduler
+
+        # requests is imported on first use, so importing the data modules stays cheap
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+    def query(self, params: dict, priority: Priority = Priority.INTERACTIVE) -> dict:
+        """
+            Sends one query and returns the decoded JSON payload.
+
+            Args:
+                params (dict): The query string parameters.
+                priority (Priority): The scheduling priority of the call when a scheduler is set.
+
+            Raises:
+                AlphaVantageRequestError: If the request is rejected; this is never retried.
+                AlphaVantageThrottleError: If every attempt was throttled.
+                AlphaVantageUnavailableError: If every attempt failed with a 5xx, a timeout or a connection error.
+        """
+        return self._with_retries(lambda: self._query_once(params), priority)
+
+    def stream(self, params: dict, parse, priority: Priority = Priority.INTERACTIVE, chunk_size: int = 1 << 16):
+        """
+            Sends one query and parses the response body while it downloads, instead of decoding it whole.
+
+            Args:
+                params (dict): The query string parameters.
+                parse (callable): Consumes an iterable of body chunks (bytes) and returns the result. It raises
+                    AlphaVantageRequestError or AlphaVantageThrottleError for error payloads, ValueError for
+                    malformed ones.
+                priority (Priority): The scheduling priority of the call when a scheduler is set.
+                chunk_size (int): The size of the chunks read from the connection.
+
+            Returns:
+                The result of parse.
+
+            Raises:
+                The same errors as query.
+        """
+        return self._with_retries(lambda: self._stream_once(params, parse, chunk_size), priority)
+
+    def _with_retries(self, attempt_once, priority: Priority):
+        for attempt in range(self.max_retries + 1):
+            if self.scheduler is not None:
+                metrics.observe("alphavantage.quota_wait", self.scheduler.acquire(priority), priority=priority.name)
+            metrics.increment("alphavantage.requests")
+            try:
+                return attempt_once()
+            except AlphaVantageThrottleError:
+                metrics.increment("alphavantage.throttled")
+                if self.scheduler is not None:
+                    self.scheduler.drain()
+                if attempt == self.max_retries:
+                    raise
+            except AlphaVantageUnavailableError:
+                metrics.increment("alphavantage.unavailable")
+                if attempt == self.max_retries:
+                    raise
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _get(self, params: dict, stream: bool = False):
+        import requests
+
+        try:
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise AlphaVantageUnavailableError(f"AlphaVantage is unreachable: {e}") from e
+
+        if response.status_code >= 400:
+            response.close()
+            if response.status_code >= 500:
+                raise AlphaVantageUnavailableError(f"AlphaVantage answered with HTTP {response.status_code}")
+            raise AlphaVantageRequestError(f"AlphaVantage answered with HTTP {response.status_code}")
+        return response
+
+    def _query_once(self, params: dict) -> dict:
+        response = self._get(params)
+        try:
+            payload = response.json()
+        except ValueError as e:
+            raise AlphaVantageUnavailableError("AlphaVantage returned a malformed JSON payload") from e
+
+        if "Error Message" in payload:
+            raise AlphaVantageRequestError(payload["Error Message"])
+        message = payload.get("Note") or payload.get("Information")
+        if message and len(payload) == 1:
+            raise AlphaVantageThrottleError(message)
+        return payload
+
+    def _stream_once(self, params: dict, parse, chunk_size: int):
+        import requests
+
+        with self._get(params, stream=True) as response:
+            try:
+                return parse(response.iter_content(chunk_size))
+            except requests.RequestException as e:
+                raise AlphaVantageUnavailableError(f"AlphaVantage dropped the connection: {e}") from e
+            except ValueError as e:
+                raise AlphaVantageUnavailableError("AlphaVantage returned a malformed JSON payload") from e
+
+    def close(self):
+        self.session.close()
+
+
+_client: AlphaVantageClient = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AlphaVantageClient:
+    """Returns the AlphaVantage client shared by the whole process, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                scheduler = None
+                if is_initialized():
+                    settings = get_rate_limit_settings()
+                    scheduler = RateLimitScheduler(settings["calls_per_minute"], settings["calls_per_day"],
+                                                   settings["state_path"])
+                _client = AlphaVantageClient(scheduler=scheduler)
+    return _client
+
+
+def set_client(client: AlphaVantageClient):
+    """Replaces the shared client, e.g. with one pointed at a stub server."""
+    global _client
+    with _client_lock:
+        _client = client
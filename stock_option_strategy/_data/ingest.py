@@ -0,0 +1,250 @@
+from operator import itemgetter
+
+from typing import List
+
+import numpy as np
+
+from stock_option_strategy._data.quantiles import QuantileTable
+from stock_option_strategy._data.summaries import filtered_values, merge, summarize_groups, summarize_year, \
+    year_summaries
+from stock_option_strategy._utils.enums import StockEnum
+
+PRICE_FIELD = "5. adjusted close"
+PROBABILITIES = [50, 60, 70, 80, 90, 99]
+
+
+def parse_series(series: dict, price_field: str = PRICE_FIELD):
+    """
+        Parses an AlphaVantage time series into parallel NumPy arrays.
+
+        Args:
+            series (dict): The "<timeframe> Adjusted Time Series" object, keyed by "YYYY-MM-DD".
+            price_field (str): The bar field holding the price, default is the adjusted close.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, list]: The bar dates (datetime64[D]), prices (float64) and the original
+            date strings, in the order AlphaVantage returned them (newest first).
+    """
+    date_keys = list(series.keys())
+    dates = np.array(date_keys, dtype="datetime64[D]")
+    closes = np.fromiter(map(float, map(itemgetter(price_field), series.values())), dtype=np.float64, count=len(date_keys))
+    return dates, closes, date_keys
+
+
+def _empty_year(duration: str) -> dict:
+    return {duration: {},
+            "WidthData": {"positiveWidth": [], "negativeWidth": [], "avgPosWidth": 0,
+                          "avgNegWidth": 0, "MaxPosWidth": 0, "MaxNegWidth": 0},
+            "PercentWidthData": {"positivePC": [], "negativePC": [], "avgPosPC": 0, "avgNegPC": 0,
+                                 "MaxPosPC": 0, "MaxNegPC": 0}
+            }
+
+
+def _get_avg(data: list):
+    if len(data) == 0:
+        return 0
+    return round(sum(data) / len(data), 2)
+
+
+def _year_runs(years: np.ndarray) -> list:
+    """Returns (year, start, end) for every run of consecutive bars that fall in the same year."""
+    if len(years) == 0:
+        return []
+    bounds = (np.flatnonzero(years[1:] != years[:-1]) + 1).tolist()
+    return [(str(years[start]), start, end) for start, end in zip([0] + bounds, bounds + [len(years)])]
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """
+        Rounds to two decimals exactly like the builtin round().
+
+        np.round scales by 100 before rounding, so values sitting on a .xx5 boundary can land on the
+        other side of it; those few are re-rounded in Python.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    suspects = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in suspects:
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def bar_pairs(closes: np.ndarray):
+    """
+        Splits the bars into consecutive, non-overlapping (newer, older) pairs starting from the newest bar.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The pair widths (newer - older), the percent changes
+            rounded to two decimals, and the index of the older bar of each pair.
+    """
+    count = (len(closes) // 2) * 2
+    newer = closes[0:count:2]
+    older = closes[1:count:2]
+    widths = newer - older
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = round2(((newer - older) / older) * 100)
+    percent[older == 0] = 0
+    return widths, percent, np.arange(1, count, 2)
+
+
+def build_years(data_enum: StockEnum, dates: np.ndarray, closes: np.ndarray, date_keys: list = None,
+                seed_years: tuple = ()) -> dict:
+    """
+        Groups parsed bars and their pair widths by year, without the per-year aggregates.
+
+        Each pair of bars is booked to the year of its older bar. The percent changes of every year are also
+        summarized, in one pass over all of them, for summarize_year.
+
+        Args:
+            data_enum (StockEnum): The timeframe the bars belong to.
+            dates (np.ndarray): Bar dates, newest first.
+            closes (np.ndarray): Bar prices aligned with dates.
+            date_keys (list, optional): The "YYYY-MM-DD" strings of dates, when the caller already has them.
+            seed_years (tuple): Years that lead the result even if they hold no bars.
+
+        Returns:
+            dict: Year data keyed by year, in order of first appearance.
+    """
+    duration = data_enum.duration
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    if date_keys is None:
+        date_keys = np.datetime_as_string(dates, unit="D").tolist()
+    prices = closes.tolist()
+
+    stock = {year: _empty_year(duration) for year in seed_years}
+    for year, start, end in _year_runs(years):
+        year_data = stock.setdefault(year, _empty_year(duration))
+        year_data[duration].update(zip(date_keys[start:end], prices[start:end]))
+
+    widths, percent, older_index = bar_pairs(closes)
+    runs = _year_runs(years[older_index])
+    # The positive pairs of the i-th year make group 2i, its negative ones group 2i + 1. A stable sort by group
+    # lines up every list in bar order, so each year only slices them.
+    groups = 2 * np.repeat(np.arange(len(runs)), [end - start for _, start, end in runs]) + (widths < 0)
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(2 * len(runs) + 1)).tolist()
+    grouped_widths, grouped_percent = widths[order].tolist(), percent[order].tolist()
+    summaries = summarize_groups(percent, groups, 2 * len(runs))
+    for index, (year, _, _) in enumerate(runs):
+        start, middle, end = bounds[2 * index:2 * index + 3]
+        width_data = stock[year]["WidthData"]
+        pc_data = stock[year]["PercentWidthData"]
+        width_data["positiveWidth"].extend(grouped_widths[start:middle])
+        width_data["negativeWidth"].extend(grouped_widths[middle:end])
+        pc_data["positivePC"].extend(grouped_percent[start:middle])
+        pc_data["negativePC"].extend(grouped_percent[middle:end])
+        pc_data["positiveSummary"], pc_data["negativeSummary"] = summaries[2 * index], summaries[2 * index + 1]
+
+    return stock
+
+
+def fill_aggregates(year_data: dict):
+    """Fills in the averages and maxima of one year's WidthData and PercentWidthData."""
+    width_data = year_data["WidthData"]
+    pc_data = year_data["PercentWidthData"]
+    width_data["avgPosWidth"] = _get_avg(width_data["positiveWidth"])
+    width_data["avgNegWidth"] = _get_avg(width_data["negativeWidth"])
+    width_data["MaxPosWidth"] = max(width_data["positiveWidth"], default=0)
+    width_data["MaxNegWidth"] = min(width_data["negativeWidth"], default=0)
+    pc_data["avgNegPC"] = _get_avg(pc_data["negativePC"])
+    pc_data["avgPosPC"] = _get_avg(pc_data["positivePC"])
+    pc_data["MaxPosPC"] = max(pc_data["positivePC"], default=0)
+    pc_data["MaxNegPC"] = min(pc_data["negativePC"], default=0)
+
+
+def build_document(symbol: str, data_enum: StockEnum, dates: np.ndarray, closes: np.ndarray, curr_year: str,
+                   date_keys: list = None) -> dict:
+    """
+        Builds the per-year stock document from parsed bars in one vectorized pass.
+
+        Every year except the oldest one gets its averages and maxima filled in, matching the document
+        AlphaData has always produced. Each year's percent changes are stored as mergeable summaries rather than
+        raw lists.
+
+        Args:
+            symbol (str): The stock symbol.
+            data_enum (StockEnum): The timeframe the bars belong to.
+            dates (np.ndarray): Bar dates, newest first.
+            closes (np.ndarray): Bar prices aligned with dates.
+            curr_year (str): The current year, which always leads the document.
+            date_keys (list, optional): The "YYYY-MM-DD" strings of dates, when the caller already has them.
+
+        Returns:
+            dict: The document keyed by "_id" and the symbol, without the probability table.
+    """
+    stock = build_years(data_enum, dates, closes, date_keys, seed_years=(curr_year,))
+
+    # The oldest year never had a following year to close it out, so its aggregates stay at zero.
+    for year in list(stock)[:-1]:
+        fill_aggregates(stock[year])
+    for year_data in stock.values():
+        summarize_year(year_data)
+
+    return {"_id": symbol, symbol: stock}
+
+
+def merge_percent_summaries(stock: dict, curr_year: str):
+    """
+        Merges the positive and negative percent change summaries of every stored year except the current one.
+
+        Returns:
+            tuple[dict, dict]: The positive and the negative summary.
+    """
+    summaries = [year_summaries(year_data.get("PercentWidthData") or {})
+                 for year, year_data in stock.items() if year != curr_year and year.isdigit()]
+    return merge(positive for positive, _ in summaries), merge(negative for _, negative in summaries)
+
+
+def remove_outliers_zscore(values: list, threshold=3) -> List:
+    """Drops the values whose z-score exceeds the threshold and returns the rest sorted."""
+    temp_data = np.array(values, dtype=np.float64)
+    if temp_data.size == 0:
+        return []
+    # same as scipy.stats.zscore (population std), without importing scipy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = (temp_data - temp_data.mean()) / temp_data.std()
+    outlier_indices = np.where(np.abs(z_scores) > threshold)
+    data_without_outliers = np.delete(temp_data, outlier_indices)
+    return sorted(list(data_without_outliers))
+
+
+def build_distribution(positive_pc: list, negative_pc: list) -> dict:
+    """
+        Builds the "Distribution" entry of a stock document: the outlier-filtered percent changes, sorted once.
+
+        Returns:
+            dict: The sorted positive ("Call") and negative ("Put") percent changes.
+    """
+    return {"Call": [float(value) for value in remove_outliers_zscore(positive_pc)],
+            "Put": [float(value) for value in remove_outliers_zscore(negative_pc)]}
+
+
+def summary_distribution(positive: dict, negative: dict) -> dict:
+    """
+        Same as build_distribution, from merged summaries instead of the raw percent changes.
+
+        Returns:
+            dict: The sorted positive ("Call") and negative ("Put") percent changes.
+    """
+    return {"Call": filtered_values(positive).tolist(), "Put": filtered_values(negative).tolist()}
+
+
+def probability_table(distribution: dict) -> dict:
+    """
+        Builds the "Probabilities" entry of a stock document from its distribution.
+
+        Returns:
+            dict: The Call and Put percent widths for each standard probability plus their overall averages.
+    """
+    table = QuantileTable(distribution["Call"], distribution["Put"])
+    call_widths = table.call(PROBABILITIES).tolist()
+    put_widths = table.put(PROBABILITIES).tolist()
+
+    probabilities = {"Call": {}, "Put": {}}
+    for probs, call_width, put_width in zip(PROBABILITIES, call_widths, put_widths):
+        probabilities["Call"][f"{probs}%"] = call_width
+        probabilities["Put"][f"{probs}%"] = put_width
+
+    probabilities["Call"]["OverallAvgPosPC"] = _get_avg(distribution["Call"])
+    probabilities["Put"]["OverallAvgNegPC"] = _get_avg(distribution["Put"])
+    return probabilities
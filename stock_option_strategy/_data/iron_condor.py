@@ -2,14 +2,17 @@ import traceback
 
 from stock_option_strategy._strategies.iron_base import IronOptionStrategyBase
 
-from stock_option_strategy._data.db_client import DB_Client
+from stock_option_strategy._data.freshness import get_freshness_policy
+from stock_option_strategy._data.horizon import horizon_document
+from stock_option_strategy._data.quantiles import QuantileTable, parse_probability
+from stock_option_strategy._data.quotes import QuoteProvider, get_quote_provider
+from stock_option_strategy._utils import metrics
 from stock_option_strategy._utils.enums import StockEnum, TimeFrame
 import datetime
-import yfinance as yf
 
 class IronCondor(IronOptionStrategyBase):
 
-    def __init__(self, symbol, data_enum: StockEnum, prob="60%"):
+    def __init__(self, symbol, data_enum: StockEnum, prob="60%", quotes: QuoteProvider = None, horizon: int = None):
         from stock_option_strategy._data.stock_db import StockDB
         """
             Initializes the IronCondor strategy.
@@ -18,9 +21,13 @@ class IronCondor(IronOptionStrategyBase):
                 symbol (str): The stock symbol for which the strategy is applied.
                 data_enum (enum): An enumeration type representing the source of _data.
                 prob (str): A string representing the probability level for the strategy, default is "60%".
+                quotes (QuoteProvider, optional): Where the ticker is validated and priced, defaults to the shared
+                    cached provider.
+                horizon (int, optional): Predict the move over this many bars of data_enum's series, e.g. 45 daily
+                    bars for a 45 trading day horizon, instead of the stored bar-to-bar moves.
 
             Attributes:
-                today (datetime.date): The current date adjusted to the last trading day.
+                today (datetime.date): The last trading day whose bar is published.
                 symbol (str): The stock symbol.
                 data_enum (enum): The _data enumeration type.
                 prob (str): The probability level for the strategy.
@@ -28,29 +35,43 @@ class IronCondor(IronOptionStrategyBase):
                 _db: The database client used for interacting with the database.
         """
 
-        self.today = datetime.date.today() - datetime.timedelta(days=1)
+        self.today = get_freshness_policy().latest_bar()
         self.symbol = symbol
-        if self.__check_ticker_exists():
+        self.horizon = horizon
+        self._quantiles = None
+        with metrics.span("iron_condor.quote"):
+            quote = (quotes or get_quote_provider()).get_quote(self.symbol)
+        if quote.exists:
             self.data_enum = data_enum
             self.prob = prob
-            self.stock_db = StockDB(DB_Client, data_enum)
-            self._db = self.stock_db.getData(self.symbol)
+            self.stock_db = StockDB(None, data_enum)
+            with metrics.span("iron_condor.load", timeframe=data_enum.duration):
+                self._db = self.__load()
             #self.curr_price = yf.Ticker(symbol).info.get('currentPrice')
-            self.curr_price = round(yf.Ticker(self.symbol).get_fast_info.last_price,2)
+            self.curr_price = quote.price
 
             if self.__is_update_required():
-                self.stock_db.updateData(self.symbol)
-                self._db = self.stock_db.getData(self.symbol)
+                with metrics.span("iron_condor.refresh", timeframe=data_enum.duration):
+                    self.stock_db.updateData(self.symbol, incremental=True)
+                    self._db = self.__load()
+                self._quantiles = None
         else:
             raise ValueError(f"The ticker {self.symbol} does not exist. Please try another ticker")
 
-    def __check_ticker_exists(self):
-        stock_info = yf.Ticker(self.symbol)
-        hist_data = stock_info.history(period="1d")
-        if hist_data.empty:
-            return False
-        else:
-            return True
+    def __load(self):
+        if self.horizon is None:
+            return self.stock_db.getData(self.symbol, self.required_fields(self.data_enum))
+        series = self.stock_db.getSeries(self.symbol)
+        if series is None:
+            return None
+        with metrics.span("iron_condor.horizon", timeframe=self.data_enum.duration):
+            return horizon_document(*series, self.horizon, self.data_enum.duration)
+
+    @staticmethod
+    def required_fields(data_enum: StockEnum) -> tuple:
+        """Returns the stored fields the strategy reads: the probability data and this year's bars for the latest price."""
+        curr_year = str(datetime.date.today().year)
+        return "Probabilities", "Distribution", f"{curr_year}.{data_enum.duration}"
 
     def __calcProb(self, data, maxValue, flag):
         if len(data) == 0:
@@ -62,16 +83,21 @@ class IronCondor(IronOptionStrategyBase):
         return count / len(data) * 100
 
     def __is_update_required(self):
-        _,recentData = self.__getCurrentPrice()
+        recentData = self.__getCurrentPrice()[1] or self.__getLastYearDate()
         if recentData is None:
             return True
         recentData = datetime.datetime.strptime(recentData, "%Y-%m-%d").date()
-        if recentData == self.today:
-            #no updates necessary
-            return False
-        else:
-            #updates required
-            return True
+        # only refresh once the exchange calendar says a newer bar can exist, see FreshnessPolicy
+        return get_freshness_policy().is_stale(recentData, self.data_enum)
+
+    def __getLastYearDate(self):
+        """Returns the newest bar of last year, for the first days of a year before it has bars of its own."""
+        last_year = str(datetime.date.today().year - 1)
+        stock = self.stock_db.getData(self.symbol, (f"{last_year}.{self.data_enum.duration}",))
+        try:
+            return max(stock[last_year][self.data_enum.duration])
+        except Exception:
+            return None
 
     def __getCurrentPrice(self):
         curr_year = str(datetime.date.today().year)
@@ -82,6 +108,27 @@ class IronCondor(IronOptionStrategyBase):
             #need to update can't find the current values and keys
             return None,None
 
+    def get_percent_widths(self, prob=None):
+        """
+            Looks up the call and put percent widths for a probability.
+
+            Any probability is answered from the stored distribution; documents stored before it existed only
+            support the standard 50/60/70/80/90/99% keys.
+
+            Args:
+                prob (str, optional): The probability such as "73%", defaults to the strategy's probability.
+
+            Returns:
+                tuple[float, float]: The call and put percent widths.
+        """
+        prob = prob or self.prob
+        if "Distribution" not in self._db:
+            return self._db["Probabilities"]["Call"][prob], self._db["Probabilities"]["Put"][prob]
+        if self._quantiles is None:
+            self._quantiles = QuantileTable.from_document(self._db)
+        percentage = parse_probability(prob)
+        return float(self._quantiles.call(percentage)), float(self._quantiles.put(percentage))
+
     def get_same_width_option_price(self) -> dict[str:str]:
         """
             Calculates the option price for the Iron Condor strategy with legs of the same width.
@@ -90,8 +137,7 @@ class IronCondor(IronOptionStrategyBase):
                 float: The calculated option price.
         """
 
-        posPC = self._db["Probabilities"]["Call"][self.prob]
-        negPC = self._db["Probabilities"]["Put"][self.prob]
+        posPC, negPC = self.get_percent_widths()
         last_updated_price, last_updated_date = self.__getCurrentPrice()
 
         if self.curr_price:
@@ -125,8 +171,7 @@ class IronCondor(IronOptionStrategyBase):
                 float: The calculated option price.
         """
 
-        posPC = self._db["Probabilities"]["Call"][self.prob]
-        negPC = self._db["Probabilities"]["Put"][self.prob]
+        posPC, negPC = self.get_percent_widths()
         last_updated_price, last_updated_date = self.__getCurrentPrice()
 
         if self.curr_price:
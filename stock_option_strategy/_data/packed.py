@@ -0,0 +1,210 @@
+import datetime
+import struct
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+from bson.binary import Binary
+
+# the user-defined BSON binary subtype marking a packed array
+BINARY_SUBTYPE = 0x80
+CODECS = ("none", "zlib")
+
+# dtype code, codec code, padding, item count: 8 bytes, so the items of a raw array stay aligned
+_HEADER = struct.Struct("<ccxxI")
+_DTYPES = {b"i": np.dtype("<i4"), b"q": np.dtype("<i8"), b"f": np.dtype("<f8")}
+_CODES = {dtype: code for code, dtype in _DTYPES.items()}
+_EPOCH = datetime.date(1970, 1, 1).toordinal()
+# Shorter lists stay BSON arrays and shorter arrays stay uncompressed: unpacking or decompressing costs microseconds
+# per array, more than the few bytes it saves on, e.g., a monthly year's widths
+_MIN_PACKED = 16
+_MIN_COMPRESSED = 64
+
+
+def pack_array(values, dtype, codec: str = "none") -> Binary:
+    """
+        Packs numbers into a BSON binary: little-endian items after a small header.
+
+        With "zlib" the bytes of arrays of 64 items or more are shuffled, so the matching bytes of every item sit
+        together, and compressed; integers are delta-encoded first. The array stays raw unless that saves a quarter
+        of its size, which leaves out most float arrays: they barely compress and take longer to inflate.
+
+        Args:
+            values: The numbers, a list or an array.
+            dtype: int32, int64 or float64.
+            codec (str): "none" or "zlib".
+    """
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    code = _CODES[array.dtype]
+    data = array.tobytes()
+    if codec == "zlib" and len(array) >= _MIN_COMPRESSED:
+        encoded = np.diff(array, prepend=array.dtype.type(0)) if array.dtype.kind == "i" else array
+        shuffled = np.frombuffer(encoded.tobytes(), dtype=np.uint8).reshape(-1, array.itemsize).T.tobytes()
+        compressed = zlib.compress(shuffled, 6)
+        if len(compressed) * 4 <= len(data) * 3:
+            return Binary(_HEADER.pack(code, b"z", len(array)) + compressed, BINARY_SUBTYPE)
+    return Binary(_HEADER.pack(code, b"r", len(array)) + data, BINARY_SUBTYPE)
+
+
+def unpack_array(packed: bytes) -> np.ndarray:
+    """
+        Unpacks a binary built by pack_array.
+
+        Returns:
+            np.ndarray: A read-only view of the binary's bytes for raw arrays, otherwise of the decompressed ones.
+    """
+    code, codec, count = _HEADER.unpack_from(packed)
+    dtype = _DTYPES[code]
+    if codec == b"r":
+        return np.frombuffer(packed, dtype=dtype, count=count, offset=_HEADER.size)
+    shuffled = np.frombuffer(zlib.decompress(memoryview(packed)[_HEADER.size:]), dtype=np.uint8)
+    array = shuffled.reshape(dtype.itemsize, count).T.copy().view(dtype).ravel()
+    if dtype.kind == "i":
+        np.cumsum(array, out=array)
+    array.flags.writeable = False
+    return array
+
+
+def is_packed(value) -> bool:
+    return isinstance(value, Binary) and value.subtype == BINARY_SUBTYPE
+
+
+class PackedSeries(Mapping):
+    __slots__ = ("days", "closes")
+
+    def __init__(self, days: np.ndarray, closes: np.ndarray):
+        """
+            The bars of a series as two arrays, in place of the legacy {"YYYY-MM-DD": close} dict.
+
+            It reads like that dict, newest date first, so the code written against the dict keeps working, while
+            the strategy code takes the arrays directly.
+
+            Args:
+                days (np.ndarray): int32 days since 1970-01-01, oldest first.
+                closes (np.ndarray): float64 closes aligned with days.
+        """
+        self.days = days
+        self.closes = closes
+
+    @classmethod
+    def from_dates(cls, dates: np.ndarray, closes: np.ndarray):
+        """Builds a series from datetime64[D] dates and closes sorted oldest first."""
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64).astype(np.int32)
+        return cls(days, np.asarray(closes, dtype=np.float64))
+
+    @classmethod
+    def from_bars(cls, bars: dict):
+        """Builds a series from a legacy {"YYYY-MM-DD": close} dict, in any order."""
+        if isinstance(bars, PackedSeries):
+            return bars
+        keys = sorted(bars)
+        return cls.from_dates(np.array(keys, dtype="datetime64[D]"), [bars[key] for key in keys])
+
+    @classmethod
+    def from_bson(cls, doc: dict):
+        return cls(unpack_array(doc["days"]), unpack_array(doc["closes"]))
+
+    def to_bson(self, codec: str = "none") -> dict:
+        return {"days": pack_array(self.days, np.int32, codec), "closes": pack_array(self.closes, np.float64, codec)}
+
+    @property
+    def dates(self) -> np.ndarray:
+        """The dates as datetime64[D], oldest first."""
+        return self.days.astype("datetime64[D]")
+
+    @staticmethod
+    def _key(day: int) -> str:
+        return datetime.date.fromordinal(day + _EPOCH).isoformat()
+
+    def _index(self, key: str) -> int:
+        day = datetime.date.fromisoformat(key).toordinal() - _EPOCH
+        index = int(np.searchsorted(self.days, day))
+        if index == len(self.days) or self.days[index] != day:
+            raise KeyError(key)
+        return index
+
+    def __getitem__(self, key: str) -> float:
+        try:
+            return float(self.closes[self._index(key)])
+        except (TypeError, ValueError):
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self._index(key)
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def __iter__(self):
+        for day in self.days[::-1].tolist():
+            yield self._key(day)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def items(self):
+        # one pass over both arrays instead of a lookup per key
+        return [(self._key(day), close) for day, close in zip(self.days[::-1].tolist(), self.closes[::-1].tolist())]
+
+    def values(self):
+        return self.closes[::-1].tolist()
+
+    def __repr__(self):
+        return f"PackedSeries({len(self)} bars)"
+
+
+def pack_value(value, codec: str = "none"):
+    """
+        Packs every array and every list of 16 numbers or more in a value, recursing into dicts. Other values are
+        kept.
+    """
+    if isinstance(value, dict):
+        return {key: pack_value(item, codec) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        return pack_array(value, np.float64 if value.dtype.kind == "f" else np.int64, codec)
+    if isinstance(value, list) and len(value) >= _MIN_PACKED \
+            and all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in value):
+        if all(isinstance(item, int) for item in value):
+            dtype = np.int32 if -2 ** 31 <= min(value) and max(value) < 2 ** 31 else np.int64
+        else:
+            dtype = np.float64
+        return pack_array(value, dtype, codec)
+    return value
+
+
+def unpack_value(value):
+    """Reverses pack_value, turning every packed array into a read-only NumPy array."""
+    if isinstance(value, dict):
+        return {key: unpack_value(item) for key, item in value.items()}
+    if is_packed(value):
+        return unpack_array(value)
+    return value
+
+
+def pack_stock(stock: dict, duration: str, codec: str = "none") -> dict:
+    """
+        Packs a stock document, or the part of one such as a few years: each year's bars become a PackedSeries
+        and the longer lists of numbers packed arrays, see pack_value.
+    """
+    packed = {}
+    for key, entry in stock.items():
+        if key.isdigit() and isinstance(entry, dict):
+            packed[key] = {name: (PackedSeries.from_bars(value).to_bson(codec) if name == duration
+                                  else pack_value(value, codec))
+                           for name, value in entry.items()}
+        else:
+            packed[key] = pack_value(entry, codec)
+    return packed
+
+
+def unpack_stock(stock: dict, duration: str) -> dict:
+    """Reverses pack_stock, with each year's bars as a PackedSeries and the packed lists as NumPy arrays."""
+    unpacked = {}
+    for key, entry in stock.items():
+        if key.isdigit() and isinstance(entry, dict):
+            unpacked[key] = {name: (PackedSeries.from_bson(value) if name == duration else unpack_value(value))
+                             for name, value in entry.items()}
+        else:
+            unpacked[key] = unpack_value(entry)
+    return unpacked
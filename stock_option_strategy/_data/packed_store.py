@@ -0,0 +1,110 @@
+import numpy as np
+
+from stock_option_strategy._data.packed import CODECS, PackedSeries, pack_stock, unpack_stock, unpack_value
+from stock_option_strategy._data.storage import DocumentStore
+from stock_option_strategy._utils.enums import StockEnum
+
+
+class PackedStore(DocumentStore):
+
+    def __init__(self, db_client, data_enum: StockEnum, codec: str = "none"):
+        """
+            The document layout with its numbers packed into BSON binaries, in its own <collection>_Packed
+            collection.
+
+            Each year's bars are stored as int32 day numbers and float64 closes instead of a {"YYYY-MM-DD": close}
+            entry per bar, and the longer lists of numbers (the widths, the percent change summaries and the
+            distribution) as packed arrays, see pack_stock. The document keeps its shape, so the same projections,
+            aggregation and per-year updates apply. Reads hand back each year's bars as a PackedSeries and the other
+            lists as read-only NumPy arrays over the loaded bytes.
+
+            Args:
+                db_client (MongoClientWrapper): The database client.
+                data_enum (StockEnum): The timeframe stored.
+                codec (str): "none", or "zlib" to also compress the arrays that get much smaller that way, which
+                    saves space but takes longer to read.
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown compression {codec}. Please use 'none' or 'zlib'.")
+        self.data_enum = data_enum
+        self.codec = codec
+        self.collection = db_client.db[f"{data_enum.collection_name}_Packed"]
+
+    def read_many(self, symbols, fields: tuple = None) -> dict:
+        return {symbol: unpack_stock(stock, self.data_enum.duration)
+                for symbol, stock in super().read_many(symbols, fields).items()}
+
+    def read_recent(self, symbol, since_year: str):
+        years = super().read_recent(symbol, since_year)
+        if years is None:
+            return None
+        for year in years.values():
+            year["PercentWidthData"] = unpack_value(year.get("PercentWidthData"))
+            if year.get("bars") is not None:
+                year["bars"] = PackedSeries.from_bson(year["bars"])
+        return years
+
+    def read_series(self, symbol):
+        stock = self.read(symbol, None)
+        if stock is None:
+            return None
+        duration = self.data_enum.duration
+        series = [stock[year][duration] for year in sorted(year for year in stock if year.isdigit())
+                  if duration in stock[year]]
+        if len(series) == 1:
+            return series[0].dates, series[0].closes
+        return (np.concatenate([year.days for year in series] or [np.empty(0, np.int32)]).astype("datetime64[D]"),
+                np.concatenate([year.closes for year in series] or [np.empty(0)]))
+
+    def write(self, symbol, stock: dict):
+        super().write(symbol, pack_stock(stock, self.data_enum.duration, self.codec))
+
+    def write_many(self, stocks: dict):
+        super().write_many({symbol: pack_stock(stock, self.data_enum.duration, self.codec)
+                            for symbol, stock in stocks.items()})
+
+    def replace_years(self, symbol, years: dict, extra: dict):
+        super().replace_years(symbol, pack_stock(years, self.data_enum.duration, self.codec),
+                              pack_stock(extra, self.data_enum.duration, self.codec))
+
+
+def migrate_to_packed(db_client, data_enum: StockEnum, codec: str = "none", batch_size: int = 50) -> int:
+    """
+        Copies every legacy one-document-per-symbol entry of a timeframe into the packed layout.
+
+        The legacy collection is left untouched, so the migration can be re-run and verified before switching over.
+
+        Args:
+            db_client (MongoClientWrapper): The database client.
+            data_enum (StockEnum): The timeframe to migrate.
+            codec (str): "none" or "zlib", see PackedStore.
+            batch_size (int): The number of legacy documents fetched per round trip.
+
+        Returns:
+            int: The number of symbols migrated.
+    """
+    store = PackedStore(db_client, data_enum, codec)
+    migrated = 0
+    for doc in db_client.db[data_enum.collection_name].find({}, batch_size=batch_size):
+        symbol = doc["_id"]
+        store.write(symbol, doc[symbol])
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    import argparse
+    from stock_option_strategy._cli import initialize_config
+    from stock_option_strategy._data.db_client import get_db_client
+    from stock_option_strategy._utils.enums import TimeFrame
+    from stock_option_strategy.config._settings import get_database_compression
+
+    parser = argparse.ArgumentParser(description="Migrate stored stock documents to the packed layout.")
+    parser.add_argument("--timeframe", choices=["weekly", "monthly", "daily"], default="weekly")
+    parser.add_argument("--config", default=None, help="Path of the config.toml file")
+    args = parser.parse_args()
+
+    initialize_config(args.config)
+    count = migrate_to_packed(get_db_client(), TimeFrame[args.timeframe.upper()].get_enum(),
+                              get_database_compression())
+    print(f"Migrated {count} symbols to the packed layout")
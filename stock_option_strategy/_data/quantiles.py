@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def parse_probability(probability) -> float:
+    """
+        Converts a probability such as "73%", "73.5%" or 73 into a percentage number.
+
+        Raises:
+            ValueError: If the probability isn't a number between 0 and 100.
+    """
+    value = float(probability.strip().rstrip("%")) if isinstance(probability, str) else float(probability)
+    if not 0 <= value <= 100:
+        raise ValueError(f"Probability {probability} must be between 0% and 100%")
+    return value
+
+
+class QuantileTable:
+
+    def __init__(self, call_values, put_values):
+        """
+            Answers percent-width lookups for any probability from a ticker's sorted, outlier-filtered distribution.
+
+            Args:
+                call_values: The positive percent changes, sorted ascending.
+                put_values: The negative percent changes, sorted ascending.
+        """
+        self.call_values = np.asarray(call_values, dtype=np.float64)
+        self.put_values = np.asarray(put_values, dtype=np.float64)
+
+    @classmethod
+    def from_document(cls, stock: dict):
+        """Builds the table from the "Distribution" entry of a stored stock document."""
+        return cls(stock["Distribution"]["Call"], stock["Distribution"]["Put"])
+
+    @staticmethod
+    def _indices(count, probabilities):
+        percentages = np.asarray(probabilities, dtype=np.float64)
+        return np.minimum(np.floor(count * (percentages / 100)).astype(np.int64), count - 1)
+
+    def call(self, probabilities):
+        """
+            Returns the call percent width that the given share of past up-moves stayed below.
+
+            Args:
+                probabilities: A percentage or an array of percentages, e.g. 70 or [50, 73, 99].
+
+            Returns:
+                float | np.ndarray: The percent widths, shaped like probabilities.
+        """
+        return self.call_values[self._indices(len(self.call_values), probabilities)]
+
+    def put(self, probabilities):
+        """
+            Returns the put percent width that the given share of past down-moves stayed above.
+
+            Args:
+                probabilities: A percentage or an array of percentages, e.g. 70 or [50, 73, 99].
+
+            Returns:
+                float | np.ndarray: The (negative) percent widths, shaped like probabilities.
+        """
+        count = len(self.put_values)
+        return self.put_values[count - 1 - self._indices(count, probabilities)]
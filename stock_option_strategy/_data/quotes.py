@@ -0,0 +1,164 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+from stock_option_strategy._data.cache import TTLCache
+from stock_option_strategy._utils import metrics
+
+
+class Quote(NamedTuple):
+    symbol: str
+    exists: bool
+    price: float = None
+
+
+class QuoteProvider(ABC):
+    """
+        Looks up whether tickers exist and what they last traded at, for many symbols at once.
+    """
+
+    @abstractmethod
+    def get_quotes(self, symbols) -> dict:
+        """
+            Looks up several symbols in one batch.
+
+            Args:
+                symbols (Iterable[str]): The ticker symbols.
+
+            Returns:
+                dict: A Quote for every requested symbol, keyed by the symbol as given.
+        """
+        pass
+
+    def get_quote(self, symbol) -> Quote:
+        return self.get_quotes([symbol])[symbol]
+
+
+class YFinanceQuoteProvider(QuoteProvider):
+
+    def __init__(self, period: str = "5d", chunk_size: int = 500):
+        """
+            Quotes from Yahoo Finance through a single yfinance download per chunk of symbols.
+
+            A ticker exists when Yahoo has daily bars for it within the period; its price is the latest close,
+            which is the current price while the market is open.
+
+            Args:
+                period (str): The history looked back on, long enough to span weekends and holidays.
+                chunk_size (int): The number of symbols sent per download.
+        """
+        self.period = period
+        self.chunk_size = chunk_size
+
+    def get_quotes(self, symbols) -> dict:
+        # yfinance pulls in pandas, so it is only imported once quotes are actually needed
+        import yfinance as yf
+
+        symbols = list(dict.fromkeys(symbols))
+        quotes = {}
+        for start in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[start:start + self.chunk_size]
+            with metrics.span("quotes.download"):
+                data = yf.download(tickers=[symbol.upper() for symbol in chunk], period=self.period, interval="1d",
+                                   group_by="ticker", progress=False)
+            for symbol in chunk:
+                closes = self.__closes(data, symbol.upper())
+                if closes is None or closes.empty:
+                    quotes[symbol] = Quote(symbol, False)
+                else:
+                    quotes[symbol] = Quote(symbol, True, round(float(closes.iloc[-1]), 2))
+        return quotes
+
+    @staticmethod
+    def __closes(data, symbol):
+        # a single-ticker download has plain columns, several tickers are grouped under a ticker level
+        if data is None or data.empty:
+            return None
+        if data.columns.nlevels == 1:
+            return data["Close"].dropna()
+        if symbol not in data.columns.get_level_values(0):
+            return None
+        return data[symbol]["Close"].dropna()
+
+
+class CachedQuoteProvider(QuoteProvider):
+
+    def __init__(self, provider: QuoteProvider, ttl: float = 60.0, negative_ttl: float = 300.0, maxsize: int = 2048):
+        """
+            Caches the quotes of another provider and only sends the symbols it misses, in one batch.
+
+            Unknown tickers are cached too (for negative_ttl), so a mistyped symbol isn't looked up again on
+            every prediction.
+
+            Args:
+                provider (QuoteProvider): The provider queried on a miss.
+                ttl (float): The number of seconds a price stays valid.
+                negative_ttl (float): The number of seconds a ticker is remembered as unknown.
+                maxsize (int): The number of symbols kept in each cache.
+        """
+        self.provider = provider
+        self.quotes = TTLCache(maxsize, ttl)
+        self.unknown = TTLCache(maxsize, negative_ttl)
+
+    def get_quotes(self, symbols) -> dict:
+        quotes = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            key = symbol.upper()
+            quote = self.quotes.get(key) or self.unknown.get(key)
+            if quote is None:
+                missing.append(symbol)
+            else:
+                quotes[symbol] = quote._replace(symbol=symbol)
+
+        metrics.increment("quotes.cache_hits", len(quotes))
+        metrics.increment("quotes.cache_misses", len(missing))
+        if missing:
+            for symbol, quote in self.provider.get_quotes(missing).items():
+                (self.quotes if quote.exists else self.unknown).put(symbol.upper(), quote)
+                quotes[symbol] = quote
+        return quotes
+
+    def clear(self):
+        self.quotes.clear()
+        self.unknown.clear()
+
+
+class FakeQuoteProvider(QuoteProvider):
+
+    def __init__(self, prices: dict = None):
+        """
+            An offline provider serving fixed prices, for tests and benchmarks. Symbols without a price don't exist.
+
+            Args:
+                prices (dict, optional): The last price of every known symbol.
+        """
+        self.prices = {symbol.upper(): price for symbol, price in (prices or {}).items()}
+        self.requests = []
+
+    def get_quotes(self, symbols) -> dict:
+        symbols = list(dict.fromkeys(symbols))
+        self.requests.append(symbols)
+        return {symbol: Quote(symbol, True, self.prices[symbol.upper()]) if symbol.upper() in self.prices
+                else Quote(symbol, False) for symbol in symbols}
+
+
+_provider: QuoteProvider = None
+_provider_lock = threading.Lock()
+
+
+def get_quote_provider() -> QuoteProvider:
+    """Returns the quote provider shared by the whole process: cached Yahoo Finance quotes by default."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = CachedQuoteProvider(YFinanceQuoteProvider())
+    return _provider
+
+
+def set_quote_provider(provider: QuoteProvider):
+    """Replaces the shared provider, e.g. with a FakeQuoteProvider to work offline."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
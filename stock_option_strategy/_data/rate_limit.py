@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """
+        Scheduling priority of an API call, lower values are served first.
+    """
+    INTERACTIVE = 0
+    BULK = 10
+
+
+class QuotaExhaustedError(Exception):
+    """The daily API quota is used up."""
+
+
+class RateLimitScheduler:
+    # waiters that haven't polled for this long belong to a dead process and are dropped
+    STALE_WAITER_SECONDS = 30.0
+
+    def __init__(self, calls_per_minute: float = 5, calls_per_day: int = 25, state_path: str = None,
+                 poll_interval: float = 0.1):
+        """
+            A token-bucket scheduler for the AlphaVantage quota, shared by every thread and process on the machine.
+
+            The bucket and the queue of waiting callers live in a SQLite file, so concurrent GUI threads and batch
+            workers draw from one quota. Among waiting callers the lowest Priority goes first, then the earliest.
+
+            Args:
+                calls_per_minute (float): The sustained call rate; also the size of a burst.
+                calls_per_day (int): The daily quota, 0 for none.
+                state_path (str, optional): The SQLite file holding the shared state. Defaults to a file in the
+                    system temp directory.
+                poll_interval (float): How often a waiting caller re-checks the queue, in seconds.
+        """
+        self.calls_per_minute = calls_per_minute
+        self.calls_per_day = calls_per_day
+        self.state_path = state_path or os.path.join(tempfile.gettempdir(), "stock_option_strategy_quota.sqlite")
+        self.poll_interval = poll_interval
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+        with self._transaction() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS bucket (id INTEGER PRIMARY KEY CHECK (id = 0), "
+                       "tokens REAL, updated REAL, day TEXT, used INTEGER)")
+            db.execute("CREATE TABLE IF NOT EXISTS waiters (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                       "priority INTEGER, heartbeat REAL)")
+            db.execute("INSERT OR IGNORE INTO bucket VALUES (0, ?, ?, ?, 0)",
+                       (float(calls_per_minute), time.time(), self.__today()))
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def __today():
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def __refill(self, db, now):
+        tokens, updated, day, used = db.execute("SELECT tokens, updated, day, used FROM bucket").fetchone()
+        tokens = min(float(self.calls_per_minute), tokens + (now - updated) * self.calls_per_minute / 60.0)
+        if day != self.__today():
+            day, used = self.__today(), 0
+        return tokens, day, used
+
+    def acquire(self, priority: Priority = Priority.INTERACTIVE, timeout: float = None) -> float:
+        """
+            Blocks until a call may be made and takes one token for it.
+
+            Args:
+                priority (Priority): The caller's priority.
+                timeout (float, optional): The longest time to wait, in seconds.
+
+            Returns:
+                float: The time spent waiting, in seconds.
+
+            Raises:
+                QuotaExhaustedError: If the daily quota is used up.
+                TimeoutError: If no token became available within the timeout.
+        """
+        start = time.time()
+        with self._transaction() as db:
+            ticket = db.execute("INSERT INTO waiters (priority, heartbeat) VALUES (?, ?)",
+                                (int(priority), start)).lastrowid
+        try:
+            while True:
+                now = time.time()
+                delay = self.poll_interval
+                with self._transaction() as db:
+                    db.execute("DELETE FROM waiters WHERE heartbeat < ?", (now - self.STALE_WAITER_SECONDS,))
+                    if db.execute("UPDATE waiters SET heartbeat = ? WHERE id = ?", (now, ticket)).rowcount == 0:
+                        # another process took this caller for dead, e.g. after a long pause; queue it again in
+                        # its old place
+                        db.execute("INSERT INTO waiters (id, priority, heartbeat) VALUES (?, ?, ?)",
+                                   (ticket, int(priority), now))
+                    head = db.execute("SELECT id FROM waiters ORDER BY priority, id LIMIT 1").fetchone()
+                    if head is not None and head[0] == ticket:
+                        tokens, day, used = self.__refill(db, now)
+                        if self.calls_per_day and used >= self.calls_per_day:
+                            raise QuotaExhaustedError(f"The daily quota of {self.calls_per_day} calls is used up")
+                        if tokens >= 1:
+                            db.execute("UPDATE bucket SET tokens = ?, updated = ?, day = ?, used = ?",
+                                       (tokens - 1, now, day, used + 1))
+                            waited = now - start
+                            self.__record(waited)
+                            return waited
+                        delay = min(delay, (1 - tokens) * 60.0 / self.calls_per_minute)
+
+                if timeout is not None and now + delay - start > timeout:
+                    raise TimeoutError(f"No API call slot became available within {timeout} seconds")
+                time.sleep(delay)
+        finally:
+            with self._transaction() as db:
+                db.execute("DELETE FROM waiters WHERE id = ?", (ticket,))
+
+    def drain(self):
+        """Empties the bucket after AlphaVantage throttled us anyway, so every process backs off."""
+        with self._transaction() as db:
+            db.execute("UPDATE bucket SET tokens = 0, updated = ?", (time.time(),))
+
+    def __record(self, waited):
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["total_wait"] += waited
+            self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+
+    def stats(self) -> dict:
+        """
+            Returns the wait times seen by this process and the shared quota usage.
+
+            Returns:
+                dict: calls, total_wait, max_wait and avg_wait for this process, plus used_today and queued
+                across all processes.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_wait"] = stats["total_wait"] / stats["calls"] if stats["calls"] else 0.0
+        with self._transaction() as db:
+            _, day, used = self.__refill(db, time.time())
+            stats["used_today"] = used
+            stats["queued"] = db.execute("SELECT COUNT(*) FROM waiters").fetchone()[0]
+        return stats
@@ -0,0 +1,258 @@
+import datetime
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from stock_option_strategy._data.freshness import get_freshness_policy
+from stock_option_strategy._data.http_client import AlphaVantageRequestError
+from stock_option_strategy._data.rate_limit import Priority, QuotaExhaustedError
+from stock_option_strategy._utils import metrics
+from stock_option_strategy._utils.enums import StockEnum
+
+
+def read_universe(path: str) -> list:
+    """
+        Reads a ticker universe file: symbols separated by newlines, commas or spaces, "#" starting a comment.
+
+        Returns:
+            list: The upper-cased symbols in file order, without duplicates.
+    """
+    symbols = []
+    with open(path, "r") as file:
+        for line in file:
+            line = line.split("#", 1)[0]
+            symbols.extend(symbol.upper() for symbol in line.replace(",", " ").split())
+    return list(dict.fromkeys(symbols))
+
+
+class Checkpoint:
+
+    def __init__(self, path: str):
+        """
+            The progress of a refresh job, one JSON line per finished ticker, so an interrupted job can resume.
+
+            Every line is flushed and synced before the next ticker is recorded, so a crash loses at most the tickers
+            in flight. A line cut off by the crash is ignored on reading. Records expire, so the next scheduled run
+            refreshes everything again instead of resuming.
+
+            Args:
+                path (str): The checkpoint file, created on the first record.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._appending = False
+
+    def load(self, max_age: float = None) -> dict:
+        """
+            Returns the latest record of every ticker in the checkpoint, keyed by symbol.
+
+            Args:
+                max_age (float, optional): Ignore the records older than this many seconds.
+        """
+        oldest = time.time() - max_age if max_age is not None else 0
+        records = {}
+        try:
+            with open(self.path, "r") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record["time"] >= oldest:
+                        records[record["symbol"]] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def record(self, symbol: str, status: str, seconds: float, error: str = None):
+        line = json.dumps({"symbol": symbol, "status": status, "seconds": round(seconds, 3), "error": error,
+                           "time": time.time()})
+        with self._lock:
+            with open(self.path, "a+b") as file:
+                if not self._appending and file.tell():
+                    # a crash may have cut the last record short; start on a line of our own
+                    file.seek(-1, os.SEEK_END)
+                    if file.read(1) != b"\n":
+                        file.write(b"\n")
+                self._appending = True
+                file.write(line.encode() + b"\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class RefreshResult:
+
+    def __init__(self, total: int, skipped: int):
+        """
+            The outcome of a refresh job.
+
+            Attributes:
+                total (int): The tickers in the universe.
+                skipped (int): The tickers a previous run already finished.
+                current (list): The tickers left alone because no bar newer than the stored ones can exist yet.
+                refreshed (list): The tickers refreshed by this run.
+                failed (dict): The error message of every ticker that failed in this run, keyed by symbol.
+                stopped (str): Why the run stopped before the end, or None if it got through the universe.
+                elapsed (float): The duration of the run in seconds.
+                quota (dict): The scheduler stats of the run, if the client has a scheduler.
+        """
+        self.total = total
+        self.skipped = skipped
+        self.current = []
+        self.refreshed = []
+        self.failed = {}
+        self.error_types = Counter()
+        self.stopped = None
+        self.elapsed = 0.0
+        self.quota = None
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.skipped - len(self.current) - len(self.refreshed) - len(self.failed)
+
+    @property
+    def throughput(self) -> float:
+        """The tickers processed per minute."""
+        done = len(self.refreshed) + len(self.failed)
+        return done * 60.0 / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        lines = [f"Refreshed {len(self.refreshed)}, failed {len(self.failed)}, skipped {self.skipped} "
+                 f"(done earlier), current {len(self.current)} (no newer bar yet), remaining {self.remaining} "
+                 f"of {self.total} tickers",
+                 f"Elapsed {self.elapsed:.1f}s, {self.throughput:.1f} tickers/min"]
+        if self.quota:
+            lines.append(f"API calls {self.quota['calls']}, average quota wait {self.quota['avg_wait']:.2f}s, "
+                         f"max {self.quota['max_wait']:.2f}s, used today {self.quota['used_today']}")
+        for error_type, count in self.error_types.most_common():
+            examples = [symbol for symbol, error in self.failed.items() if error.startswith(error_type + ":")][:5]
+            lines.append(f"  {error_type}: {count} ({', '.join(examples)}{', ...' if count > len(examples) else ''})")
+        if self.stopped:
+            lines.append(f"Stopped early: {self.stopped}. Run the same command again to resume.")
+        return "\n".join(lines)
+
+
+def refresh_universe(symbols: list, data_enum: StockEnum, checkpoint: Checkpoint = None, max_workers: int = 4,
+                     incremental: bool = True, retry_failed: bool = False, resume_within: float = 12 * 3600,
+                     progress=None, force: bool = False) -> RefreshResult:
+    """
+        Refreshes the stored data of many tickers, unattended.
+
+        Tickers run on a thread pool at BULK priority, so they share the AlphaVantage quota with every other process
+        on the machine and interactive predictions go first. Tickers whose newest stored bar the shared
+        FreshnessPolicy reports as current are left alone, so a run after the close, over a weekend or a second run
+        the same evening spends no API calls on them. A ticker that fails is recorded and the job goes on.
+        The job stops early if the daily quota is used up or it is interrupted. The checkpoint then holds every
+        finished ticker, so the next run continues with the others.
+
+        Args:
+            symbols (list): The tickers to refresh.
+            data_enum (StockEnum): The timeframe refreshed.
+            checkpoint (Checkpoint, optional): Where progress is recorded and resumed from.
+            max_workers (int): How many tickers are refreshed at once.
+            incremental (bool): Only fetch the bars newer than the stored ones, see StockDB.updateData.
+            retry_failed (bool): Also retry the tickers the checkpoint records as rejected by AlphaVantage, e.g.
+                unknown symbols. Tickers that failed for any other reason are always retried.
+            resume_within (float): How old, in seconds, the checkpoint records of a resumed run may be.
+            progress (callable, optional): Called with (symbol, error or None) after each ticker.
+            force (bool): Refresh every ticker, even the ones the freshness policy reports as current.
+
+        Returns:
+            RefreshResult: The counts, failures and throughput of the run.
+    """
+    from stock_option_strategy._data.http_client import get_client
+    from stock_option_strategy._data.stock_db import StockDB
+
+    done = checkpoint.load(resume_within) if checkpoint else {}
+    if checkpoint and not done:
+        # nothing to resume, drop the records of earlier runs
+        checkpoint.clear()
+    finished = {symbol for symbol, record in done.items()
+                if record["status"] == "ok" or (record["status"] == "rejected" and not retry_failed)}
+    pending = [symbol for symbol in symbols if symbol not in finished]
+    result = RefreshResult(len(symbols), len(symbols) - len(pending))
+
+    stock_db = StockDB(None, data_enum, priority=Priority.BULK)
+    if not force and pending:
+        policy = get_freshness_policy()
+        last_bars = stock_db.getLastBarDates(pending)
+        result.current = [symbol for symbol in pending if last_bars[symbol] is not None
+                          and not policy.is_stale(datetime.date.fromisoformat(last_bars[symbol]), data_enum)]
+        current = set(result.current)
+        pending = [symbol for symbol in pending if symbol not in current]
+    scheduler = getattr(get_client(), "scheduler", None)
+    quota_before = scheduler.stats() if scheduler is not None else None
+
+    def refresh(symbol):
+        start = time.perf_counter()
+        try:
+            stock_db.updateData(symbol, incremental=incremental, raise_errors=True)
+        except QuotaExhaustedError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            status = "rejected" if isinstance(e, AlphaVantageRequestError) else "failed"
+            if checkpoint:
+                checkpoint.record(symbol, status, time.perf_counter() - start, error)
+            return error
+        if checkpoint:
+            checkpoint.record(symbol, "ok", time.perf_counter() - start)
+        return None
+
+    start = time.perf_counter()
+    queue = iter(pending)
+    with metrics.span("refresh.universe", timeframe=data_enum.duration, tickers=len(pending)):
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        running = {}
+        try:
+            # only a few tickers are queued ahead of the workers, so stopping leaves the rest untouched
+            for symbol in queue:
+                running[executor.submit(refresh, symbol)] = symbol
+                if len(running) >= max_workers * 2:
+                    break
+            while running:
+                finished_futures, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished_futures:
+                    symbol = running.pop(future)
+                    try:
+                        error = future.result()
+                    except QuotaExhaustedError as e:
+                        result.stopped = str(e)
+                        continue
+                    if error is None:
+                        result.refreshed.append(symbol)
+                    else:
+                        result.failed[symbol] = error
+                        result.error_types[error.split(":", 1)[0]] += 1
+                    metrics.increment("refresh.tickers", status="failed" if error else "ok")
+                    if progress is not None:
+                        progress(symbol, error)
+                    if result.stopped is None:
+                        next_symbol = next(queue, None)
+                        if next_symbol is not None:
+                            running[executor.submit(refresh, next_symbol)] = next_symbol
+        except KeyboardInterrupt:
+            result.stopped = "interrupted"
+            for future in running:
+                future.cancel()
+        finally:
+            executor.shutdown(wait=True)
+    result.elapsed = time.perf_counter() - start
+
+    if scheduler is not None:
+        stats = scheduler.stats()
+        calls = stats["calls"] - quota_before["calls"]
+        total_wait = stats["total_wait"] - quota_before["total_wait"]
+        result.quota = {"calls": calls, "avg_wait": total_wait / calls if calls else 0.0,
+                        "max_wait": stats["max_wait"], "used_today": stats["used_today"]}
+    return result
@@ -0,0 +1,160 @@
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _Entry:
+    __slots__ = ("lock", "finished")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # time.time() of the last successful refresh seen by this process
+        self.finished = 0.0
+
+
+class RefreshCoordinator:
+
+    def __init__(self, state_path: str = None, lease_seconds: float = 120.0, poll_interval: float = 0.2):
+        """
+            Makes sure only one thread or process on the machine refreshes a symbol at a time.
+
+            Threads of this process queue on a lock per symbol. Across processes, the one refreshing holds a
+            lease in a SQLite file, renewed while it works, so a crashed holder's lease expires. A caller that had
+            to wait while someone else refreshed the same symbol reuses that result instead of refreshing again.
+
+            Args:
+                state_path (str, optional): The SQLite file holding the leases. Defaults to a file in the system
+                    temp directory.
+                lease_seconds (float): How long a lease outlives its holder if the holder dies.
+                poll_interval (float): How often a caller waiting on another process checks the lease, in seconds.
+        """
+        self.state_path = state_path or os.path.join(tempfile.gettempdir(), "stock_option_strategy_refresh.sqlite")
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._local = threading.local()
+        self._entries = {}
+        self._entries_lock = threading.Lock()
+
+        with self._transaction() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL, "
+                       "finished REAL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _entry(self, key: str) -> _Entry:
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    @contextmanager
+    def refreshing(self, key: str):
+        """
+            Coordinates one refresh of a key, e.g. a collection and symbol.
+
+            Yields:
+                bool: True if the caller should refresh. False if another thread or process finished refreshing the
+                key while this caller waited, so its result can be read instead.
+
+            Usage:
+                with coordinator.refreshing(key) as leader:
+                    if leader:
+                        refresh()
+        """
+        requested = time.time()
+        entry = self._entry(key)
+        with entry.lock:
+            if entry.finished >= requested:
+                yield False
+                return
+            token = self.__acquire(key, requested)
+            if token is None:
+                entry.finished = time.time()
+                yield False
+                return
+
+            stop = threading.Event()
+            renewer = threading.Thread(target=self.__renew, args=(key, token, stop), daemon=True)
+            renewer.start()
+            succeeded = False
+            try:
+                yield True
+                succeeded = True
+            finally:
+                stop.set()
+                renewer.join()
+                self.__release(key, token, succeeded)
+                if succeeded:
+                    entry.finished = time.time()
+
+    def __acquire(self, key: str, requested: float):
+        """Takes the lease of a key, or returns None once another process has refreshed it since requested."""
+        token = f"{self.owner}:{threading.get_ident()}"
+        while True:
+            now = time.time()
+            with self._transaction() as db:
+                row = db.execute("SELECT owner, expires, finished FROM leases WHERE key = ?", (key,)).fetchone()
+                if row is None or row[0] is None or row[1] < now:
+                    if row is not None and row[0] is None and row[2] is not None and row[2] >= requested:
+                        return None
+                    db.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?, ?)",
+                               (key, token, now + self.lease_seconds, row[2] if row is not None else None))
+                    return token
+            time.sleep(self.poll_interval)
+
+    def __renew(self, key: str, token: str, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3):
+            with self._transaction() as db:
+                db.execute("UPDATE leases SET expires = ? WHERE key = ? AND owner = ?",
+                           (time.time() + self.lease_seconds, key, token))
+
+    def __release(self, key: str, token: str, succeeded: bool):
+        with self._transaction() as db:
+            if succeeded:
+                db.execute("UPDATE leases SET owner = NULL, expires = 0, finished = ? WHERE key = ? AND owner = ?",
+                           (time.time(), key, token))
+            else:
+                db.execute("UPDATE leases SET owner = NULL, expires = 0 WHERE key = ? AND owner = ?", (key, token))
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_refresh_coordinator() -> RefreshCoordinator:
+    """Returns the coordinator shared by every StockDB of the process, created on first use."""
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = RefreshCoordinator()
+        return _coordinator
+
+
+def set_refresh_coordinator(coordinator: RefreshCoordinator):
+    """Replaces the shared coordinator, e.g. to keep the leases of tests apart."""
+    global _coordinator
+    with _coordinator_lock:
+        _coordinator = coordinator
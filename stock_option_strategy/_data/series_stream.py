@@ -0,0 +1,194 @@
+import codecs
+import gzip
+import json
+import re
+from array import array
+
+import numpy as np
+
+from stock_option_strategy._data.http_client import AlphaVantageRequestError, AlphaVantageThrottleError
+from stock_option_strategy._data.ingest import PRICE_FIELD
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_OBJECT_END = re.compile(r"\}[ \t\n\r]*\}")
+
+
+class _ChunkReader:
+    """Decodes JSON values one at a time from a stream of text or UTF-8 chunks, buffering only the unread part."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self) -> bool:
+        while not self.eof:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.eof = True
+                chunk = self.decoder.decode(b"", final=True)
+            elif isinstance(chunk, bytes):
+                chunk = self.decoder.decode(chunk)
+            if chunk:
+                self.buffer = self.buffer[self.pos:] + chunk
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, or "" at the end of the stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._more():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def skip(self, char: str):
+        if self.peek() == char:
+            self.pos += 1
+
+    def entries(self):
+        """
+            Decodes the complete "key": {...} entries buffered at the read position with one json.loads call.
+
+            The entries must be flat objects, like the bars of a series: every "}" then closes an entry, so the
+            complete ones end at the last "}" buffered, or where the enclosing object closes.
+
+            Returns:
+                dict: The entries, or None if the next entry isn't complete or isn't flat.
+        """
+        end = self.buffer.rfind("}", self.pos) + 1
+        closing = _OBJECT_END.search(self.buffer, self.pos, end)
+        if closing is not None:
+            end = closing.start() + 1
+        if end <= self.pos:
+            return None
+        try:
+            entries = json.loads("{" + self.buffer[self.pos:end] + "}")
+        except json.JSONDecodeError:
+            return None
+        self.pos = end
+        return entries
+
+    def value(self):
+        while True:
+            self.peek()
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # the value may continue in the next chunk
+                if self._more():
+                    continue
+                raise
+            if end == len(self.buffer) and self._more():
+                # a number at the end of the buffer may not be complete yet
+                continue
+            self.pos = end
+            return value
+
+
+def iter_series(chunks, series_name: str, price_field: str = PRICE_FIELD):
+    """
+        Parses an AlphaVantage time series response as it arrives, yielding one bar at a time.
+
+        Only the bars of the current chunk are decoded, so the nested {date: {field: value}} tree of the whole response is
+        never built. Other top-level entries such as "Meta Data" are small and decoded whole.
+
+        Args:
+            chunks: The response body as an iterable of str or UTF-8 bytes chunks of any size.
+            series_name (str): The key of the series, e.g. "Weekly Adjusted Time Series".
+            price_field (str): The bar field holding the price, default is the adjusted close.
+
+        Yields:
+            tuple[str, float]: The "YYYY-MM-DD" date and price of each bar, in the order of the response.
+
+        Raises:
+            AlphaVantageRequestError: If the response holds an error message or no series.
+            AlphaVantageThrottleError: If the response is a throttle note.
+            json.JSONDecodeError: If the response is malformed or truncated.
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    others = {}
+    found = False
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if key == series_name:
+            found = True
+            reader.expect("{")
+            while reader.peek() != "}":
+                bars = reader.entries()
+                if bars is not None:
+                    for day, bar in bars.items():
+                        yield day, float(bar[price_field])
+                    reader.skip(",")
+                    continue
+                # an entry split across chunks
+                day = reader.value()
+                reader.expect(":")
+                yield day, float(reader.value()[price_field])
+                reader.skip(",")
+            reader.pos += 1
+        else:
+            others[key] = reader.value()
+        reader.skip(",")
+
+    if not found:
+        if "Error Message" in others:
+            raise AlphaVantageRequestError(others["Error Message"])
+        message = others.get("Note") or others.get("Information")
+        if message and len(others) == 1:
+            raise AlphaVantageThrottleError(message)
+        raise AlphaVantageRequestError(f"AlphaVantage returned no {series_name}")
+
+
+def parse_series_stream(chunks, series_name: str, price_field: str = PRICE_FIELD):
+    """
+        Streaming counterpart of ingest.parse_series: parses a response body straight into NumPy arrays.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, list]: The bar dates (datetime64[D]), prices (float64) and the original
+            date strings, in the order AlphaVantage returned them (newest first).
+    """
+    date_keys = []
+    prices = array("d")
+    for day, price in iter_series(chunks, series_name, price_field):
+        date_keys.append(day)
+        prices.append(price)
+    return np.array(date_keys, dtype="datetime64[D]"), np.frombuffer(prices, dtype=np.float64), date_keys
+
+
+def iter_file_chunks(path: str, chunk_size: int = 1 << 16):
+    """Reads a file in chunks, decompressing it on the fly if it ends with .gz."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def parse_series_file(path: str, series_name: str, price_field: str = PRICE_FIELD):
+    """
+        Parses a saved AlphaVantage response, e.g. a cached download, without loading the whole file.
+
+        Args:
+            path (str): The .json file, or .json.gz for a gzip-compressed one.
+            series_name (str): The key of the series, e.g. "Weekly Adjusted Time Series".
+            price_field (str): The bar field holding the price, default is the adjusted close.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, list]: As parse_series_stream.
+    """
+    return parse_series_stream(iter_file_chunks(path), series_name, price_field)
@@ -1,44 +1,359 @@
+import copy
 import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+import numpy as np
 from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.http_client import AlphaVantageError
+from stock_option_strategy._data.rate_limit import Priority
+from stock_option_strategy._data.refresh_lock import get_refresh_coordinator
+from stock_option_strategy._data.ingest import build_years, fill_aggregates, merge_percent_summaries, \
+    summary_distribution, probability_table
+from stock_option_strategy._data.summaries import summarize_year
+from stock_option_strategy._data.cache import TTLCache
+from stock_option_strategy._data.storage import open_storage
+from stock_option_strategy._utils import metrics
 from .db_client import MongoClientWrapper
 # noinspection PyProtectedMember
 from stock_option_strategy._utils.enums import StockEnum #noinspection PyProtectedMember
-class StockDB:
 
-    today_date = datetime.date.today()
+# (collection, symbol) -> (loaded fields or None for the whole document, data), shared by every StockDB
+read_cache = TTLCache(maxsize=256, ttl=300)
+# (collection, symbol) -> (dates, closes) of every stored bar, for the horizon predictions
+series_cache = TTLCache(maxsize=64, ttl=300)
+
+class StockDB:
 
-    def __init__(self, db_client : MongoClientWrapper , data_enum: StockEnum):
-        self.db : db_client = db_client.db
+    def __init__(self, db_client : MongoClientWrapper , data_enum: StockEnum, priority: Priority = Priority.INTERACTIVE,
+                 layout: str = None):
+        """
+            Args:
+                db_client (MongoClientWrapper): The database client, or None for the shared one. It is only
+                    created when the layout is stored in MongoDB.
+                data_enum (StockEnum): The timeframe stored.
+                priority (Priority): The priority of the AlphaVantage fetches made on a cache miss or refresh.
+                layout (str, optional): "document" for one document per symbol, "bars" for the normalized
+                    BarStore layout or "columnar" for local memory-mapped files. Defaults to the [database] layout
+                    setting.
+        """
         self.data_enum = data_enum
-        self.curr_db = self.db[data_enum.collection_name]
+        self.priority = priority
+        self.store = open_storage(db_client, data_enum, layout)
 
     def isExist(self, symbol):
-        return self.curr_db.count_documents({"_id": symbol}, limit=1) != 0
+        return self.store.exists(symbol)
+
+    def __write(self, val: dict):
+        with metrics.span("stock_db.write", timeframe=self.data_enum.duration):
+            self.store.write(val["_id"], val[val["_id"]])
+
+    def __refreshing(self, symbol):
+        """
+            Coordinates fetching a symbol with the other threads and processes fetching it, see RefreshCoordinator.
+            The context yields False when another caller stored it meanwhile.
+        """
+        return get_refresh_coordinator().refreshing(f"{self.data_enum.collection_name}:{symbol}")
 
     def insertData(self,symbol):
         try:
             if not self.isExist(symbol):
-
-                val = AlphaData(self.data_enum, symbol).addData()
-                self.curr_db.insert_one(val)
+                with self.__refreshing(symbol) as leader:
+                    # another caller may have inserted it while this one waited
+                    if leader and not self.isExist(symbol):
+                        val = AlphaData(self.data_enum, symbol, priority=self.priority).addData()
+                        self.__write(val)
+                self.__invalidate(symbol)
+        except AlphaVantageError:
+            raise
         except Exception as e:
             print(f"An error occurred while inserting data for {symbol}: {str(e)}")
 
-    def updateData(self, symbol):
+    def updateData(self, symbol, incremental=False, raise_errors=False):
+        """
+            Refreshes the stored data of a symbol.
+
+            Args:
+                symbol (str): The stock symbol.
+                incremental (bool): Only fetch the bars newer than the last stored one and rewrite the affected
+                    years and the probabilities. Falls back to a full refresh when the stored history can't be
+                    extended that way.
+                raise_errors (bool): Raise every error, e.g. QuotaExhaustedError, instead of printing the ones that
+                    aren't from AlphaVantage, for jobs that report their failures.
+
+            Raises:
+                AlphaVantageError: If AlphaVantage rejected or failed the request.
+        """
+        metrics.increment("stock_db.refreshes", timeframe=self.data_enum.duration, incremental=incremental)
         try:
-            filter_data = {"_id": symbol}
-            val = AlphaData(self.data_enum, symbol).addData()
-            self.curr_db.update_one(filter_data, {"$set": val})
+            with metrics.span("stock_db.update", timeframe=self.data_enum.duration, incremental=incremental), \
+                    self.__refreshing(symbol) as leader:
+                if not leader:
+                    # another thread or process refreshed it while this one waited, its data is reused
+                    metrics.increment("stock_db.refreshes_joined", timeframe=self.data_enum.duration)
+                    return
+                if incremental and self.__update_incremental(symbol):
+                    return
+                val = AlphaData(self.data_enum, symbol, priority=self.priority).addData()
+                self.__write(val)
+        except AlphaVantageError:
+            raise
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"An error occurred while updating data for {symbol}: {str(e)}")
-    def getData(self, symbol):
+        finally:
+            self.__invalidate(symbol)
+
+    def __update_incremental(self, symbol) -> bool:
+        curr_year = AlphaData.current_year()
+        stored = self.store.read_recent(symbol, str(int(curr_year) - 1))
+        if not stored:
+            return False
+
+        stored_bars = {}
+        for year in stored.values():
+            stored_bars.update(year.get("bars") or {})
+        if not stored_bars:
+            return False
+        last_date = max(stored_bars)
+
+        dates, closes, date_keys = AlphaData(self.data_enum, symbol, outputsize="compact", priority=self.priority).getBars()
+        if not date_keys or min(date_keys) > last_date:
+            # the fetched window doesn't reach back to the stored history
+            return False
+        if max(date_keys) == last_date and stored_bars[last_date] == float(closes[date_keys.index(last_date)]):
+            return True
+
+        # Rebuild every year from the one holding the last stored bar onwards. Fetched bars replace the stored
+        # ones they overlap, which also drops a stale in-progress weekly or monthly bar.
+        first_date = f"{last_date[:4]}-01-01"
+        oldest_fetched = min(date_keys)
+        merged = {key: price for key, price in stored_bars.items() if first_date <= key < oldest_fetched}
+        merged.update((key, float(price)) for key, price in zip(date_keys, closes) if key >= first_date)
+        if (len(merged) - sum(key >= first_date for key in stored_bars)) % 2:
+            # The bars are paired from the newest one on, so an odd number of new bars shifts the pairs of the
+            # stored years too, and only a full refresh rebuilds them.
+            return False
+        merged_keys = sorted(merged, reverse=True)
+        merged_dates = np.array(merged_keys, dtype="datetime64[D]")
+        merged_closes = np.array([merged[key] for key in merged_keys], dtype=np.float64)
+
+        years = build_years(self.data_enum, merged_dates, merged_closes, merged_keys)
+        for year_data in years.values():
+            fill_aggregates(year_data)
+            summarize_year(year_data)
+
+        # The probabilities leave out the current year, so they only change when an earlier year was rebuilt,
+        # and then come from merging the small per-year summaries.
+        extra = {}
+        if any(year != curr_year for year in years):
+            stock = {year: {"PercentWidthData": data.get("PercentWidthData")} for year, data in stored.items()}
+            stock.update(years)
+            distribution = summary_distribution(*merge_percent_summaries(stock, curr_year))
+            extra = {"Probabilities": probability_table(distribution), "Distribution": distribution}
+        self.store.replace_years(symbol, years, extra)
+        return True
+
+    def getData(self, symbol, fields: tuple = None):
+        """
+            Returns the stored data of a symbol, fetching and inserting it first if it doesn't exist yet.
+
+            Reads are served from an in-process cache shared by every StockDB, and otherwise take a single
+            read of the storage backend that only pulls the requested fields. The cache keeps its own copy and
+            hands out copies, so callers may modify what they get back.
+
+            Args:
+                symbol (str): The stock symbol.
+                fields (tuple, optional): Dotted paths under the symbol to load, e.g. ("Probabilities", "2024.WEEKLY").
+                    Loads the whole document when omitted.
+
+            Returns:
+                dict: The symbol's data, or None if it could not be retrieved.
+        """
         try:
-            self.insertData(symbol)
-            return self.curr_db.find_one({"_id": symbol}, projection={"_id": 0, symbol: 1})[symbol]
+            stock = self.__cached(symbol, fields)
+            if stock is not None:
+                return stock
+
+            stock = self.__find_many([symbol], fields).get(symbol)
+            if stock is None:
+                with self.__refreshing(symbol) as leader:
+                    # another caller may have inserted it while this one waited
+                    stock = self.__find_many([symbol], fields).get(symbol)
+                    if stock is None and leader:
+                        val = AlphaData(self.data_enum, symbol, priority=self.priority).addData()
+                        self.__write(val)
+                        fields, stock = None, val[symbol]
+                if stock is None:
+                    return None
+            self.__cache(symbol, fields, stock)
+            return stock
+        except AlphaVantageError:
+            raise
         except Exception as e:
             print(f"An error occurred while retrieving data for {symbol}: {str(e)}")
             return None
 
+    def getSeries(self, symbol):
+        """
+            Returns every stored bar of a symbol as arrays, fetching and inserting it first if it doesn't exist yet.
+
+            Returns:
+                tuple[np.ndarray, np.ndarray]: The dates (datetime64[D]) and closes, oldest first, or None if the
+                symbol could not be retrieved.
+        """
+        key = (self.data_enum.collection_name, symbol)
+        series = series_cache.get(key)
+        if series is not None:
+            metrics.increment("stock_db.cache_hits", timeframe=self.data_enum.duration)
+            return series
+        metrics.increment("stock_db.cache_misses", timeframe=self.data_enum.duration)
+
+        with metrics.span("stock_db.read", timeframe=self.data_enum.duration):
+            series = self.store.read_series(symbol)
+        if series is None:
+            self.insertData(symbol)
+            series = self.store.read_series(symbol)
+        if series is not None:
+            series_cache.put(key, series)
+        return series
+
+    def getMany(self, symbols, fields: tuple = None, max_workers: int = 4) -> dict:
+        """
+            Batch version of getData.
+
+            Cached symbols are served from memory, the rest are read with a single batch read (one $in query on
+            MongoDB), and the missing ones are fetched concurrently and bulk written. Their data comes straight
+            from the computed values.
+
+            Args:
+                symbols (list): The stock symbols.
+                fields (tuple, optional): Dotted paths under each symbol to load, as for getData.
+                max_workers (int): How many missing symbols are fetched from AlphaVantage at once.
+
+            Returns:
+                dict: The data of each symbol keyed by symbol, None for the ones that could not be retrieved.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        results = {symbol: self.__cached(symbol, fields) for symbol in symbols}
+        pending = [symbol for symbol, stock in results.items() if stock is None]
+        if pending:
+            found = self.__find_many(pending, fields)
+            for symbol, stock in found.items():
+                self.__cache(symbol, fields, stock)
+                results[symbol] = stock
+            for symbol, stock in self.__fetch_many([symbol for symbol in pending if symbol not in found],
+                                                   max_workers).items():
+                self.__cache(symbol, None, stock)
+                results[symbol] = stock
+        return results
+
+    def ensureMany(self, symbols, max_workers: int = 4) -> list:
+        """
+            Makes sure every symbol is stored, checking existence with a single batch lookup and fetching the
+            missing ones concurrently.
+
+            Returns:
+                list: The symbols that had to be fetched and were stored.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        existing = self.store.exists_many(symbols)
+        return list(self.__fetch_many([symbol for symbol in symbols if symbol not in existing], max_workers))
+
+    def getLastBarDates(self, symbols) -> dict:
+        """
+            Looks up the newest stored bar of many symbols with a single batch read, without fetching anything.
+
+            Only this year's and last year's bars are read, like IronCondor does before deciding on a refresh.
+
+            Returns:
+                dict: The "YYYY-MM-DD" date of each symbol's newest bar keyed by symbol, None for the symbols that
+                    aren't stored or have no bars in those years.
+        """
+        this_year = datetime.date.today().year
+        years = (str(this_year), str(this_year - 1))
+        stocks = self.store.read_many(list(symbols), tuple(f"{year}.{self.data_enum.duration}" for year in years))
+        last_bars = {}
+        for symbol in symbols:
+            stock = stocks.get(symbol) or {}
+            dates = [max(stock[year][self.data_enum.duration]) for year in years
+                     if len(stock.get(year, {}).get(self.data_enum.duration, ()))]
+            last_bars[symbol] = max(dates) if dates else None
+        return last_bars
+
+    def __cached(self, symbol, fields):
+        cached = read_cache.get((self.data_enum.collection_name, symbol))
+        if cached is not None and (cached[0] is None or (fields is not None and set(fields) <= set(cached[0]))):
+            metrics.increment("stock_db.cache_hits", timeframe=self.data_enum.duration)
+            return copy.deepcopy(cached[1])
+        metrics.increment("stock_db.cache_misses", timeframe=self.data_enum.duration)
+        return None
+
+    def __invalidate(self, symbol):
+        read_cache.invalidate((self.data_enum.collection_name, symbol))
+        series_cache.invalidate((self.data_enum.collection_name, symbol))
+
+    def __cache(self, symbol, fields, stock):
+        read_cache.put((self.data_enum.collection_name, symbol),
+                       (tuple(fields) if fields is not None else None, copy.deepcopy(stock)))
+
+    def __find_many(self, symbols, fields) -> dict:
+        with metrics.span("stock_db.read", timeframe=self.data_enum.duration):
+            return self.store.read_many(symbols, fields)
+
+    def __fetch_many(self, symbols, max_workers) -> dict:
+        """
+            Fetches and computes symbols concurrently, then stores them with one bulk write.
+
+            The fetch of each computed symbol stays coordinated until the bulk write is done, so other callers
+            waiting on it read it instead of fetching it again. The symbols another caller stored meanwhile are read.
+        """
+        if not symbols:
+            return {}
+        metrics.increment("stock_db.fetches", len(symbols), timeframe=self.data_enum.duration)
+
+        def fetch(symbol):
+            # returns the computed data and the lease still held on it, or None if another caller stored it
+            lease = ExitStack()
+            try:
+                if not lease.enter_context(self.__refreshing(symbol)) or self.isExist(symbol):
+                    lease.close()
+                    return None
+                return AlphaData(self.data_enum, symbol, priority=self.priority).addData(), lease
+            except BaseException:
+                # released as failed, so a waiter fetches it itself
+                lease.__exit__(*sys.exc_info())
+                raise
+
+        computed, joined = {}, []
+        with ExitStack() as leases:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as executor:
+                futures = {executor.submit(fetch, symbol): symbol for symbol in symbols}
+                for future in as_completed(futures):
+                    try:
+                        fetched = future.result()
+                    except Exception as e:
+                        print(f"An error occurred while fetching data for {futures[future]}: {str(e)}")
+                        continue
+                    if fetched is None:
+                        joined.append(futures[future])
+                    else:
+                        computed[futures[future]] = fetched[0]
+                        leases.enter_context(fetched[1])
+            if computed:
+                with metrics.span("stock_db.write", timeframe=self.data_enum.duration):
+                    self.store.write_many({symbol: val[symbol] for symbol, val in computed.items()})
+
+        for symbol in computed:
+            self.__invalidate(symbol)
+        fetched = {symbol: val[symbol] for symbol, val in computed.items()}
+        if joined:
+            fetched.update(self.__find_many(joined, None))
+        return fetched
+
     def delete_all(self):
         print("Deleting all the _data")
-        self.curr_db.delete_many({})
+        self.store.delete_all()
+        read_cache.clear()
+        series_cache.clear()
@@ -0,0 +1,189 @@
+from abc import ABC, abstractmethod
+
+from stock_option_strategy._utils.enums import StockEnum
+from stock_option_strategy.config._settings import get_database_compression, get_database_layout, get_storage_path
+
+
+class StorageBackend(ABC):
+    """
+        Where StockDB keeps the computed data of its symbols.
+
+        Every backend reads and writes the legacy stock document shape: {year: {duration: {date: close},
+        "WidthData": ..., "PercentWidthData": ...}, "Probabilities": ..., "Distribution": ...}, however it lays
+        the data out underneath.
+    """
+
+    @abstractmethod
+    def exists_many(self, symbols) -> set:
+        """Returns which of the symbols are stored."""
+        pass
+
+    @abstractmethod
+    def read_many(self, symbols, fields: tuple = None) -> dict:
+        """
+            Reads several symbols.
+
+            Args:
+                symbols (list): The stock symbols.
+                fields (tuple, optional): Dotted paths to load, e.g. ("Probabilities", "2024.WEEKLY"). Loads
+                    everything when omitted.
+
+            Returns:
+                dict: The data of every stored symbol, keyed by symbol.
+        """
+        pass
+
+    @abstractmethod
+    def read_recent(self, symbol, since_year: str):
+        """
+            Reads every stored year's PercentWidthData and the bars of the years >= since_year.
+
+            Returns:
+                dict: {year: {"PercentWidthData", "bars"}} where bars is None for the older years, or None if the
+                symbol isn't stored.
+        """
+        pass
+
+    @abstractmethod
+    def write(self, symbol, stock: dict):
+        """Replaces everything stored for a symbol."""
+        pass
+
+    @abstractmethod
+    def replace_years(self, symbol, years: dict, extra: dict):
+        """
+            Replaces the bars and summaries of the given years and everything after them, and sets other top-level
+            entries such as Probabilities.
+
+            Args:
+                symbol (str): The stock symbol.
+                years (dict): The rebuilt years, keyed by year.
+                extra (dict): Other entries of the stock document to set.
+        """
+        pass
+
+    @abstractmethod
+    def delete_all(self):
+        pass
+
+    def exists(self, symbol) -> bool:
+        return symbol in self.exists_many([symbol])
+
+    def read(self, symbol, fields: tuple = None):
+        """Reads one symbol, returning None if it isn't stored."""
+        return self.read_many([symbol], fields).get(symbol)
+
+    def write_many(self, stocks: dict):
+        """Stores several symbols at once, keyed by symbol."""
+        for symbol, stock in stocks.items():
+            self.write(symbol, stock)
+
+    def read_series(self, symbol):
+        """
+            Reads every stored bar of a symbol as arrays.
+
+            Returns:
+                tuple[np.ndarray, np.ndarray]: The dates (datetime64[D]) and closes, oldest first, or None if the
+                symbol isn't stored.
+        """
+        import numpy as np
+
+        stock = self.read(symbol, None)
+        if stock is None:
+            return None
+        bars = sorted((day, close) for year, year_data in stock.items() if year.isdigit()
+                      for day, close in year_data.get(self.data_enum.duration, {}).items())
+        return (np.array([day for day, _ in bars], dtype="datetime64[D]"),
+                np.array([close for _, close in bars], dtype=np.float64))
+
+
+class DocumentStore(StorageBackend):
+
+    def __init__(self, db_client, data_enum: StockEnum):
+        """
+            The original MongoDB layout: one {"_id": symbol, symbol: stock} document per symbol and timeframe.
+
+            Args:
+                db_client (MongoClientWrapper): The database client.
+                data_enum (StockEnum): The timeframe stored.
+        """
+        self.data_enum = data_enum
+        self.collection = db_client.db[data_enum.collection_name]
+
+    def exists_many(self, symbols) -> set:
+        return {doc["_id"] for doc in self.collection.find({"_id": {"$in": list(symbols)}}, {"_id": 1})}
+
+    def read_many(self, symbols, fields: tuple = None) -> dict:
+        projection = {"_id": 1}
+        for symbol in symbols:
+            if fields is None:
+                projection[symbol] = 1
+            else:
+                projection.update({f"{symbol}.{field}": 1 for field in fields})
+        return {doc["_id"]: doc.get(doc["_id"], {})
+                for doc in self.collection.find({"_id": {"$in": list(symbols)}}, projection)}
+
+    def read_recent(self, symbol, since_year: str):
+        # a single round trip that leaves the older bars on the server
+        duration = self.data_enum.duration
+        pipeline = [
+            {"$match": {"_id": symbol}},
+            {"$project": {"_id": 0, "years": {"$map": {
+                "input": {"$objectToArray": f"${symbol}"},
+                "as": "year",
+                "in": {"k": "$$year.k",
+                       "PercentWidthData": "$$year.v.PercentWidthData",
+                       "bars": {"$cond": [{"$gte": ["$$year.k", since_year]}, f"$$year.v.{duration}", None]}}
+            }}}}
+        ]
+        docs = list(self.collection.aggregate(pipeline))
+        if not docs:
+            return None
+        return {year["k"]: year for year in docs[0]["years"] if year["k"].isdigit()}
+
+    def write(self, symbol, stock: dict):
+        self.collection.replace_one({"_id": symbol}, {"_id": symbol, symbol: stock}, upsert=True)
+
+    def write_many(self, stocks: dict):
+        from pymongo import ReplaceOne
+
+        if stocks:
+            self.collection.bulk_write([ReplaceOne({"_id": symbol}, {"_id": symbol, symbol: stock}, upsert=True)
+                                        for symbol, stock in stocks.items()], ordered=False)
+
+    def replace_years(self, symbol, years: dict, extra: dict):
+        changes = {f"{symbol}.{key}": value for key, value in {**years, **extra}.items()}
+        self.collection.update_one({"_id": symbol}, {"$set": changes})
+
+    def delete_all(self):
+        self.collection.delete_many({})
+
+
+def open_storage(db_client, data_enum: StockEnum, layout: str = None) -> StorageBackend:
+    """
+        Opens the storage backend of a timeframe.
+
+        Args:
+            db_client (MongoClientWrapper): The database client, or None for the shared one. Only the MongoDB
+                layouts create it, so the columnar layout runs without a MongoDB server.
+            data_enum (StockEnum): The timeframe stored.
+            layout (str, optional): "document", "bars", "columnar" or "packed". Defaults to the [database] layout
+                setting.
+    """
+    layout = layout or get_database_layout()
+    if layout == "columnar":
+        from stock_option_strategy._data.columnar_store import ColumnarStore
+        return ColumnarStore(get_storage_path(), data_enum)
+
+    if db_client is None:
+        from stock_option_strategy._data.db_client import get_db_client
+        db_client = get_db_client()
+    if layout == "bars":
+        from stock_option_strategy._data.bar_store import BarStore
+        return BarStore(db_client, data_enum)
+    if layout == "packed":
+        from stock_option_strategy._data.packed_store import PackedStore
+        return PackedStore(db_client, data_enum, get_database_compression())
+    if layout == "document":
+        return DocumentStore(db_client, data_enum)
+    raise ValueError(f"Unknown storage layout {layout}. Please use 'document', 'bars', 'columnar' or 'packed'.")
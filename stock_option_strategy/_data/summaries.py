@@ -0,0 +1,111 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+
+def summarize(values) -> dict:
+    """
+        Summarizes percent changes, which are rounded to two decimals, as an exact histogram in 0.01 buckets.
+
+        The histogram is small, mergeable by adding counts, and holds everything the probability computation
+        needs: the moments for the z-score filter and the exact quantiles.
+
+        Returns:
+            dict: {"cents": the distinct values times 100, ascending, "counts": how often each occurs}.
+    """
+    # a year holds a few dozen values at most, where a Counter beats NumPy's call overhead
+    counter = Counter([round(value * 100) for value in values])
+    cents = sorted(counter)
+    return {"cents": cents, "counts": [counter[cent] for cent in cents]}
+
+
+def summarize_groups(values: np.ndarray, groups: np.ndarray, count: int) -> list:
+    """
+        Summarizes many groups of percent changes at once, e.g. the positive and negative ones of every year, the
+        way summarize does each group.
+
+        Args:
+            values (np.ndarray): The percent changes, rounded to two decimals.
+            groups (np.ndarray): The group of each value, from 0 to count - 1.
+            count (int): The number of groups.
+
+        Returns:
+            list: The summary of every group, in group order.
+    """
+    # np.rint rounds half to even like round(), on the same products
+    cents = np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+    if len(cents) == 0:
+        return [{"cents": [], "counts": []} for _ in range(count)]
+    order = np.lexsort((cents, groups))
+    cents, groups = cents[order], groups[order]
+    starts = np.flatnonzero(np.concatenate(([True], (cents[1:] != cents[:-1]) | (groups[1:] != groups[:-1]))))
+    counts = np.diff(np.append(starts, len(cents)))
+    bounds = np.searchsorted(groups[starts], np.arange(count + 1)).tolist()
+    distinct = cents[starts]
+    return [{"cents": distinct[start:end].tolist(), "counts": counts[start:end].tolist()}
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _arrays(summary: dict) -> tuple:
+    return np.asarray(summary["cents"], dtype=np.int64), np.asarray(summary["counts"], dtype=np.int64)
+
+
+def merge(summaries) -> dict:
+    """Merges histograms built by summarize, e.g. one per year, into one."""
+    arrays = [_arrays(summary) for summary in summaries]
+    if not arrays:
+        return {"cents": [], "counts": []}
+    cents = np.concatenate([cents for cents, _ in arrays])
+    counts = np.concatenate([counts for _, counts in arrays])
+    unique, inverse = np.unique(cents, return_inverse=True)
+    merged = np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int64)
+    return {"cents": unique.tolist(), "counts": merged.tolist()}
+
+
+def filtered_values(summary: dict, threshold=3) -> np.ndarray:
+    """
+        Drops the values whose z-score exceeds the threshold, like ingest.remove_outliers_zscore, and expands the
+        rest in ascending order.
+
+        The mean and population standard deviation come from integer sums over the buckets, so they are exact
+        however many summaries were merged.
+    """
+    cents, counts = _arrays(summary)
+    count = int(counts.sum())
+    if count == 0:
+        return np.empty(0)
+    total = int((cents * counts).sum())
+    squares = int((cents * cents * counts).sum())
+    mean = total / count / 100
+    std = math.sqrt(squares * count - total * total) / count / 100
+    values = cents / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = (values - mean) / std
+    keep = ~(np.abs(z_scores) > threshold)
+    return np.repeat(values[keep], counts[keep])
+
+
+def year_summaries(percent_width_data: dict) -> tuple:
+    """
+        Returns the positive and negative summaries of one year's PercentWidthData, summarizing the raw
+        positivePC/negativePC lists of documents stored before the summaries existed.
+    """
+    if "positiveSummary" in percent_width_data:
+        return percent_width_data["positiveSummary"], percent_width_data["negativeSummary"]
+    # the lists may be arrays in the packed layout, which have no truth value
+    positive, negative = percent_width_data.get("positivePC"), percent_width_data.get("negativePC")
+    return (summarize(positive if positive is not None else []),
+            summarize(negative if negative is not None else []))
+
+
+def summarize_year(year_data: dict):
+    """
+        Replaces the raw percent change lists of a built year with their summaries, once its aggregates are filled.
+        The lists are only summarized here when build_years didn't already.
+    """
+    pc_data = year_data["PercentWidthData"]
+    positive, negative = pc_data.pop("positivePC"), pc_data.pop("negativePC")
+    if "positiveSummary" not in pc_data:
+        pc_data["positiveSummary"] = summarize(positive)
+        pc_data["negativeSummary"] = summarize(negative)
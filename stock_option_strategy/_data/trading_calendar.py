@@ -0,0 +1,168 @@
+import datetime
+from functools import lru_cache
+
+REGULAR_CLOSE = datetime.time(16, 0)
+EARLY_CLOSE = datetime.time(13, 0)
+
+# Unscheduled closures: national days of mourning and weather
+_SPECIAL_CLOSURES = {
+    datetime.date(2001, 9, 11), datetime.date(2001, 9, 12), datetime.date(2001, 9, 13), datetime.date(2001, 9, 14),
+    datetime.date(2004, 6, 11), datetime.date(2007, 1, 2), datetime.date(2012, 10, 29), datetime.date(2012, 10, 30),
+    datetime.date(2018, 12, 5), datetime.date(2025, 1, 9),
+}
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> datetime.date:
+    """Returns the n-th weekday (0 is Monday) of a month, counting from the end when n is negative."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+
+def _easter(year: int) -> datetime.date:
+    """Returns Western Easter Sunday (the anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _observed(day: datetime.date) -> datetime.date:
+    """Moves a holiday falling on a Saturday to the Friday before and one on a Sunday to the Monday after."""
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> frozenset:
+    """
+        Returns the weekdays of a year the NYSE is closed, from its current holiday rules plus past unscheduled
+        closures.
+
+        New Year's Day falling on a Saturday isn't observed, the exchange stays open on the Friday before.
+    """
+    days = {
+        _nth_weekday(year, 2, 0, 3),                # Washington's Birthday
+        _easter(year) - datetime.timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),               # Memorial Day
+        _observed(datetime.date(year, 7, 4)),       # Independence Day
+        _nth_weekday(year, 9, 0, 1),                # Labor Day
+        _nth_weekday(year, 11, 3, 4),               # Thanksgiving
+        _observed(datetime.date(year, 12, 25)),     # Christmas
+    }
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 1998:
+        days.add(_nth_weekday(year, 1, 0, 3))       # Martin Luther King Jr. Day
+    if year >= 2022:
+        days.add(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    days.update(day for day in _SPECIAL_CLOSURES if day.year == year)
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year: int) -> frozenset:
+    """Returns the days of a year the NYSE closes at 1 pm: July 3, the day after Thanksgiving and Christmas Eve."""
+    days = {_nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1)}
+    for day in (datetime.date(year, 7, 3), datetime.date(year, 12, 24)):
+        # on a Friday they are the observed holiday or, for July 3, the exchange closes the normal time
+        if day.weekday() <= 3:
+            days.add(day)
+    return frozenset(days - holidays(year))
+
+
+def is_trading_day(day: datetime.date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def close_time(day: datetime.date) -> datetime.time:
+    """Returns when the session of a day closes in New York time, or None if the exchange is closed."""
+    if not is_trading_day(day):
+        return None
+    return EARLY_CLOSE if day in early_closes(day.year) else REGULAR_CLOSE
+
+
+def previous_trading_day(day: datetime.date) -> datetime.date:
+    """Returns the last trading day before a day."""
+    day -= datetime.timedelta(days=1)
+    while not is_trading_day(day):
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def next_trading_day(day: datetime.date) -> datetime.date:
+    """Returns the first trading day after a day."""
+    day += datetime.timedelta(days=1)
+    while not is_trading_day(day):
+        day += datetime.timedelta(days=1)
+    return day
+
+
+def exchange_time(moment: datetime.datetime = None) -> datetime.datetime:
+    """
+        Converts a moment to New York time, without needing a time zone database.
+
+        Args:
+            moment (datetime.datetime, optional): An aware datetime, or a naive one in the local time zone.
+                Defaults to now.
+
+        Returns:
+            datetime.datetime: The naive New York wall time, daylight saving time applied (the US rules since 2007).
+    """
+    utc = (moment or datetime.datetime.now(datetime.timezone.utc)).astimezone(datetime.timezone.utc)
+    utc = utc.replace(tzinfo=None)
+    # 2 am local time on the second Sunday of March and the first Sunday of November
+    dst_start = datetime.datetime.combine(_nth_weekday(utc.year, 3, 6, 2), datetime.time(7))
+    dst_end = datetime.datetime.combine(_nth_weekday(utc.year, 11, 6, 1), datetime.time(6))
+    return utc - datetime.timedelta(hours=4 if dst_start <= utc < dst_end else 5)
+
+
+def session_closed_at(day: datetime.date) -> datetime.datetime:
+    """Returns the New York time a trading day's session closes."""
+    return datetime.datetime.combine(day, close_time(day))
+
+
+def latest_session(moment: datetime.datetime = None, delay: datetime.timedelta = datetime.timedelta()) -> datetime.date:
+    """
+        Returns the newest trading day whose session has closed.
+
+        Args:
+            moment (datetime.datetime, optional): The time asked about, as for exchange_time. Defaults to now.
+            delay (datetime.timedelta): How long after the close a session counts as closed, e.g. until its bar is
+                published.
+    """
+    now = exchange_time(moment)
+    day = now.date()
+    while not is_trading_day(day) or session_closed_at(day) + delay > now:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def period_end(day: datetime.date, duration: str) -> datetime.date:
+    """
+        Returns the last trading day of the bar period holding a day, the date its final bar carries.
+
+        Args:
+            day (datetime.date): A trading day.
+            duration (str): "DAILY", "WEEKLY" (Monday to Friday) or "MONTHLY".
+    """
+    if duration == "WEEKLY":
+        end = day + datetime.timedelta(days=4 - day.weekday())
+    elif duration == "MONTHLY":
+        end = datetime.date(day.year + day.month // 12, day.month % 12 + 1, 1) - datetime.timedelta(days=1)
+    else:
+        return day
+    while end > day and not is_trading_day(end):
+        end -= datetime.timedelta(days=1)
+    return end
@@ -0,0 +1,269 @@
+import asyncio
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from stock_option_strategy import _cli
+from stock_option_strategy._data.cache import TTLCache
+from stock_option_strategy._utils import metrics
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            422: "Unprocessable Entity", 500: "Internal Server Error"}
+_MAX_BODY = 1 << 20
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class PredictionServer:
+
+    def __init__(self, max_workers: int = 8, cache_ttl: float = 60.0, cache_size: int = 1024):
+        """
+            Serves predict and predict_multiple_stocks over HTTP/JSON from one long-lived process.
+
+            The loaded data of every (ticker, timeframe), the IronCondor holding its distribution and price, is kept
+            in a hot cache, so a warm request only prices a probability. Concurrent requests for data that isn't
+            loaded yet share one in-flight load (singleflight) instead of each downloading and computing it.
+            Loading runs on a thread pool; parsing requests and pricing run on the event loop.
+
+            Args:
+                max_workers (int): How many tickers are loaded at once.
+                cache_ttl (float): How long loaded data is served, in seconds. Like the quote cache, this bounds
+                    how stale the current price can get.
+                cache_size (int): How many (ticker, timeframe) entries are kept.
+
+            Attributes:
+                stats (Counter): The requests served, and how the loads they needed were answered: "hot" from the
+                    cache, "coalesced" by joining an in-flight load, "loads" by loading.
+        """
+        self.max_workers = max_workers
+        self.loaded = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.inflight = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prediction-server")
+        self.stats = Counter()
+        self._server = None
+
+    async def load(self, ticker: str, timeframe: str):
+        """
+            Returns the loaded IronCondor of a ticker and timeframe, joining the load in flight if there is one.
+
+            Raises:
+                Exception: What loading raised, see _cli._load_iron_condor.
+        """
+        key = (ticker.upper(), timeframe.upper())
+        iron_condor = self.loaded.get(key)
+        if iron_condor is not None:
+            self.stats["hot"] += 1
+            return iron_condor
+
+        future = self.inflight.get(key)
+        if future is None:
+            self.stats["loads"] += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, _cli._load_iron_condor, *key)
+            self.inflight[key] = future
+            future.add_done_callback(lambda done: self.__loaded(key, done))
+        else:
+            self.stats["coalesced"] += 1
+        # a client that hangs up mustn't cancel the load the other requests wait for
+        return await asyncio.shield(future)
+
+    def __loaded(self, key, future):
+        self.inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            # only successes are cached, a failed load is retried by the next request
+            self.loaded.put(key, future.result())
+
+    async def predict(self, ticker: str, timeframe: str, probability: str):
+        """
+            Predicts one ticker like predict_multiple_stocks does.
+
+            Returns:
+                dict: The prediction, or {"Ticker", "Error"}.
+        """
+        self.stats["predictions"] += 1
+        error = _cli._validate_request(timeframe, probability)
+        if error:
+            return {"Ticker": ticker, "Error": error}
+        try:
+            iron_condor = await self.load(ticker, timeframe)
+        except Exception as e:
+            return {"Ticker": ticker, "Error": _cli._load_error(e)}
+        # the cached IronCondor is only priced here, on the event loop, so setting its probability is safe
+        result = _cli._price_probabilities(iron_condor, timeframe, [probability])[0]
+        return {"Ticker": ticker, "Error": result} if isinstance(result, str) else result
+
+    async def predict_multiple(self, stock_list: list) -> list:
+        """
+            Predicts many tickers like predict_multiple_stocks, results in request order.
+
+            The tickers that aren't loaded yet are first validated and loaded in batch, as predict_multiple_stocks
+            does.
+        """
+        cold = {}
+        for stock_params in stock_list:
+            if isinstance(stock_params, list) and len(stock_params) == 3 and all(isinstance(value, str)
+                                                                                 for value in stock_params):
+                ticker, timeframe, probability = stock_params
+                key = (ticker.upper(), timeframe.upper())
+                if (not _cli._validate_request(timeframe, probability) and key not in self.inflight
+                        and self.loaded.get(key) is None):
+                    cold.setdefault(key, []).append(stock_params)
+        if len(cold) > 1:
+            await asyncio.get_running_loop().run_in_executor(self.executor, _cli._prefetch, cold, self.max_workers)
+
+        async def one(stock_params):
+            if not isinstance(stock_params, list) or len(stock_params) != 3 \
+                    or not all(isinstance(value, str) for value in stock_params):
+                return {"Error": "Invalid number of parameters provided. Expected ['Ticker', 'Timeframe', 'Probability']."}
+            return await self.predict(*stock_params)
+
+        return list(await asyncio.gather(*(one(stock_params) for stock_params in stock_list)))
+
+    async def route(self, method: str, target: str, body: bytes):
+        """
+            Answers one request.
+
+            GET /predict?ticker=AAPL&timeframe=Monthly&probability=70%, or POST /predict with the same fields as
+            JSON, predicts one ticker. POST /predict_multiple with a JSON list of [ticker, timeframe, probability]
+            lists predicts many. GET /health and GET /stats report on the server.
+
+            Returns:
+                tuple[int, object]: The HTTP status and the JSON response.
+        """
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok"}
+        if url.path == "/stats":
+            return 200, {**self.stats, "cached": len(self.loaded), "inflight": len(self.inflight)}
+        if url.path == "/predict":
+            if method == "GET":
+                fields = dict(parse_qsl(url.query))
+            elif method == "POST":
+                fields = _json_body(body)
+            else:
+                raise HTTPError(405, "Use GET or POST")
+            if not isinstance(fields, dict) or not isinstance(fields.get("ticker"), str):
+                raise HTTPError(400, "Expected a ticker, and optionally a timeframe and probability")
+            result = await self.predict(fields["ticker"], str(fields.get("timeframe", "MONTHLY")),
+                                        str(fields.get("probability", "70%")))
+            return (422 if "Error" in result else 200), result
+        if url.path == "/predict_multiple":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            stock_list = _json_body(body)
+            if isinstance(stock_list, dict):
+                stock_list = stock_list.get("stocks")
+            if not isinstance(stock_list, list):
+                raise HTTPError(400, "Expected a list of ['Ticker', 'Timeframe', 'Probability'] lists")
+            return 200, await self.predict_multiple(stock_list)
+        raise HTTPError(404, f"No such endpoint {url.path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves one connection, keeping it open between requests unless the client asks to close it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    await self.__respond(writer, 400, {"Error": "Malformed request line"}, False)
+                    return
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    # the body can't be found without its length, so the connection can't be reused
+                    await self.__respond(writer, 400, {"Error": "Invalid Content-Length"}, False)
+                    return
+                try:
+                    if length < 0:
+                        raise HTTPError(400, "Invalid Content-Length")
+                    if length > _MAX_BODY:
+                        raise HTTPError(413, "The request body is too large")
+                    body = await reader.readexactly(length) if length > 0 else b""
+                    with metrics.span("server.request", path=urlsplit(target).path):
+                        status, response = await self.route(method, target, body)
+                except HTTPError as e:
+                    status, response = e.status, {"Error": str(e)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except Exception as e:
+                    status, response = 500, {"Error": f"An error occurred: {str(e)}"}
+                self.stats["requests"] += 1
+                await self.__respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def __respond(writer, status: int, response, keep_alive: bool):
+        payload = json.dumps(response).encode()
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}"
+                     f"\r\n\r\n".encode() + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        """Starts listening. With port 0 the system picks a free one, see the port property."""
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8765):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _json_body(body: bytes):
+    try:
+        return json.loads(body or b"null")
+    except ValueError:
+        raise HTTPError(400, "The request body is not valid JSON")
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, max_workers: int = 8, cache_ttl: float = 60.0):
+    """
+        Runs a prediction server until interrupted. The configuration must be initialized first.
+
+        Args:
+            host (str): The interface to listen on, the local machine only by default.
+            port (int): The TCP port.
+            max_workers (int): How many tickers are loaded at once.
+            cache_ttl (float): How long loaded data is served, in seconds.
+    """
+    server = PredictionServer(max_workers=max_workers, cache_ttl=cache_ttl)
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
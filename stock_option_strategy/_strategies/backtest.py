@@ -0,0 +1,279 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from stock_option_strategy._data.ingest import bar_pairs, round2
+from stock_option_strategy._data.quantiles import parse_probability
+from stock_option_strategy._utils import metrics
+
+# test rows per block of the expanding order statistics, bounding the (rows, samples) work matrices
+_BLOCK_CELLS = 1 << 22
+
+
+def _expanding_quantiles(values: np.ndarray, counts: np.ndarray, fractions: np.ndarray, threshold: float,
+                         from_top: bool) -> np.ndarray:
+    """
+        Looks up quantiles of every prefix of a sequence, like QuantileTable over build_distribution of the prefix.
+
+        Each prefix is z-score filtered with its own mean and population standard deviation, then indexed at
+        floor(n * fraction) of its sorted values (counted from the top for the put side). All prefixes are answered
+        together: the values are sorted once, and a prefix is a mask over that order whose running count locates
+        the wanted rank.
+
+        Args:
+            values (np.ndarray): The sequence, oldest first.
+            counts (np.ndarray): The prefix lengths to answer, one per test.
+            fractions (np.ndarray): The probabilities as fractions.
+            threshold (float): The z-score above which values are dropped.
+            from_top (bool): Index from the largest value down, as QuantileTable.put does.
+
+        Returns:
+            np.ndarray: (tests, probabilities) quantiles, NaN where the filtered prefix is empty.
+    """
+    result = np.full((len(counts), len(fractions)), np.nan)
+    size = len(values)
+    if size == 0 or len(counts) == 0:
+        return result
+
+    # moves are rounded to cents, so integer sums give the exact moments like summaries.filtered_values
+    cents = np.round(values * 100).astype(np.int64)
+    sums = np.concatenate(([0], np.cumsum(cents)))
+    squares = np.concatenate(([0], np.cumsum(cents * cents)))
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+
+    rows = max(1, _BLOCK_CELLS // size)
+    for start in range(0, len(counts), rows):
+        block = counts[start:start + rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = sums[block] / block / 100
+            stds = np.sqrt(squares[block] * block - sums[block] * sums[block]) / block / 100
+            z_scores = (sorted_values[None, :] - means[:, None]) / stds[:, None]
+        mask = (order[None, :] < block[:, None]) & ~(np.abs(z_scores) > threshold)
+        running = np.cumsum(mask, axis=1)
+        kept = running[:, -1]
+        ranks = np.minimum(np.floor(kept[:, None] * fractions[None, :]).astype(np.int64), kept[:, None] - 1)
+        if from_top:
+            ranks = kept[:, None] - 1 - ranks
+        # the running counts rise by row, so offsetting each row lets one searchsorted find every rank
+        rows_index = np.arange(len(block))[:, None]
+        offsets = rows_index * (size + 1)
+        positions = np.searchsorted((running + offsets).ravel(), ranks + 1 + offsets)
+        columns = np.clip(positions - rows_index * size, 0, size - 1)
+        result[start:start + len(block)] = np.where(kept[:, None] > 0, sorted_values[columns], np.nan)
+    return result
+
+
+def _pair_moves(closes: np.ndarray, dates) -> tuple:
+    """
+        Splits a series into the moves the stored probabilities are built from: the disjoint pairs of
+        ingest.bar_pairs, anchored at the newest bar.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The older and newer price, the
+            percent change and the direction of every pair, oldest pair first, and how many of the pairs before each
+            one a prediction made at its older bar knows.
+    """
+    newest_first = closes[::-1]
+    widths, percent, older_index = bar_pairs(newest_first)
+    older = newest_first[older_index][::-1]
+    newer = newest_first[older_index - 1][::-1]
+    known = np.arange(len(older_index))
+    if dates is not None:
+        # the stored probabilities leave out the pairs booked to the current year, see merge_percent_summaries
+        years = np.asarray(dates, dtype="datetime64[D]")[::-1][older_index][::-1].astype("datetime64[Y]")
+        known = np.searchsorted(years, years, side="left")
+    return older, newer, percent[::-1], ~(widths[::-1] < 0), known
+
+
+def _horizon_moves(closes: np.ndarray, horizon: int) -> tuple:
+    """
+        Splits a series into the moves a horizon prediction is built from: every window of horizon.forward_returns,
+        which follow each other from the newest bar back.
+
+        Returns:
+            tuple: As _pair_moves; every earlier window is known.
+    """
+    samples = closes[(len(closes) - 1) % horizon::horizon] if len(closes) else closes
+    older, newer = samples[:-1], samples[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moves = round2(((newer - older) / older) * 100)
+    moves[older == 0] = 0
+    return older, newer, moves, moves >= 0, np.arange(len(moves))
+
+
+def backtest_series(closes, probabilities, horizon: int = None, min_samples: int = 20, threshold: float = 3,
+                    dates=None) -> dict:
+    """
+        Replays the Iron Condor predictions over one price series, sampled the way the predictions sample it.
+
+        Without a horizon the moves are those of the stored probabilities: the disjoint (newer, older) pairs of
+        ingest.bar_pairs, from the newest bar back, so every other bar-to-bar move is left out. With the bar
+        dates, each prediction also leaves out the pairs of its own year, as the stored probabilities leave out
+        the current year. With a horizon the moves are the consecutive windows of `horizon` bars that
+        horizon.forward_returns takes, all of them known.
+
+        Each move is a test: the strikes come from its older price and the moves known before it, and the test
+        holds when its newer price closes within them, bounds included.
+
+        Args:
+            closes: The prices, oldest first.
+            probabilities: The probabilities, e.g. ["60%", "70%", 80].
+            horizon (int, optional): The bars between a prediction and its expiry, for horizon predictions.
+            min_samples (int): The fewest past up-moves and down-moves a prediction needs.
+            threshold (float): The z-score filter of the distribution.
+            dates (optional): The bar dates aligned with closes, to leave out each prediction's own year when
+                there is no horizon.
+
+        Returns:
+            dict: "tests", and per probability the hits of both width modes ("same", "different") and how often
+            the price closed above the call ("call_breaches") or below the put ("put_breaches") of the different
+            width strikes.
+    """
+    fractions = np.array([parse_probability(probability) for probability in probabilities], dtype=np.float64) / 100
+    closes = np.asarray(closes, dtype=np.float64)
+    empty = np.zeros(len(fractions), dtype=np.int64)
+    result = {"tests": 0, "same": empty, "different": empty, "call_breaches": empty, "put_breaches": empty}
+    if horizon is None:
+        older, newer, moves, up, known = _pair_moves(closes, dates)
+    else:
+        older, newer, moves, up, known = _horizon_moves(closes, horizon)
+    if len(moves) == 0:
+        return result
+
+    # the moves known when predicting at move i are moves[:known[i]], of which up_seen[i] went up
+    up_seen = np.concatenate(([0], np.cumsum(up)))[known]
+    down_seen = known - up_seen
+    tests = np.flatnonzero((up_seen >= min_samples) & (down_seen >= min_samples))
+    if len(tests) == 0:
+        return result
+
+    call_widths = _expanding_quantiles(moves[up], up_seen[tests], fractions, threshold, from_top=False)
+    put_widths = _expanding_quantiles(moves[~up], down_seen[tests], fractions, threshold, from_top=True)
+
+    price = older[tests][:, None]
+    expiry = newer[tests][:, None]
+    different_call = np.round(((price * call_widths) / 100) + price)
+    different_put = np.round(price + ((price * put_widths) / 100))
+    same_widths = np.where(put_widths > call_widths, put_widths, call_widths)
+    same_call = np.round(((price * same_widths) / 100) + price)
+    same_put = np.round(price - ((price * same_widths) / 100))
+
+    return {"tests": len(tests),
+            "same": ((expiry >= same_put) & (expiry <= same_call)).sum(axis=0),
+            "different": ((expiry >= different_put) & (expiry <= different_call)).sum(axis=0),
+            "call_breaches": (expiry > different_call).sum(axis=0),
+            "put_breaches": (expiry < different_put).sum(axis=0)}
+
+
+def _backtest_chunk(chunk: list, probabilities: list, horizon: int, min_samples: int) -> list:
+    return [(symbol, backtest_series(closes, probabilities, horizon, min_samples, dates=dates))
+            for symbol, closes, dates in chunk]
+
+
+class BacktestReport:
+
+    def __init__(self, probabilities: list, results: dict):
+        """
+            The realized hit rates of a backtest, overall and per ticker.
+
+            Args:
+                probabilities (list): The probabilities tested.
+                results (dict): The backtest_series result of every ticker, keyed by symbol.
+        """
+        self.probabilities = probabilities
+        self.results = results
+        self.tests = sum(result["tests"] for result in results.values())
+        totals = {key: np.zeros(len(probabilities), dtype=np.int64)
+                  for key in ("same", "different", "call_breaches", "put_breaches")}
+        for result in results.values():
+            for key, total in totals.items():
+                total += result[key]
+        self.totals = totals
+
+    def hit_rates(self, same_width: bool = False) -> np.ndarray:
+        """Returns the share of tests, per probability, whose expiry price stayed within the strikes."""
+        hits = self.totals["same" if same_width else "different"]
+        return hits / self.tests if self.tests else np.full(len(self.probabilities), np.nan)
+
+    def summary(self) -> list:
+        """
+            Returns one dictionary per probability with the number of tests and the realized hit rates in percent.
+        """
+        same, different = self.hit_rates(True), self.hit_rates(False)
+        breaches = {key: self.totals[key] / self.tests if self.tests else np.full(len(self.probabilities), np.nan)
+                    for key in ("call_breaches", "put_breaches")}
+        return [{"Probability of Success": probability,
+                 "Tests": self.tests,
+                 "Hit Rate (Different Width) %": round(float(different[index]) * 100, 2),
+                 "Hit Rate (Same Width) %": round(float(same[index]) * 100, 2),
+                 "Call Breached %": round(float(breaches["call_breaches"][index]) * 100, 2),
+                 "Put Breached %": round(float(breaches["put_breaches"][index]) * 100, 2)}
+                for index, probability in enumerate(self.probabilities)]
+
+
+def run_backtest(series: dict, probabilities: list, horizon: int = None, min_samples: int = 20,
+                 max_workers: int = None, chunk_size: int = 16, dates: dict = None) -> BacktestReport:
+    """
+        Backtests many tickers, fanning them out over a process pool.
+
+        Args:
+            series (dict): The closes of every ticker, oldest first, keyed by symbol.
+            probabilities (list): The probabilities, e.g. ["60%", "70%", "80%"].
+            horizon (int, optional): The bars between a prediction and its expiry for horizon predictions, None
+                for the pairs of the stored probabilities, see backtest_series.
+            min_samples (int): The fewest past up-moves and down-moves a prediction needs.
+            max_workers (int, optional): The number of processes, defaults to the CPU count. 1 runs in-process.
+            chunk_size (int): The tickers sent to a process at once.
+            dates (dict, optional): The bar dates of the tickers, keyed by symbol, see backtest_series.
+
+        Returns:
+            BacktestReport: The hit rates.
+    """
+    probabilities = list(probabilities)
+    items = [(symbol, closes, (dates or {}).get(symbol)) for symbol, closes in series.items()]
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+    results = {}
+    with metrics.span("backtest.run", horizon=horizon or "pairs"):
+        if max_workers == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                results.update(_backtest_chunk(chunk, probabilities, horizon, min_samples))
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+                for chunk_results in executor.map(_backtest_chunk, chunks, [probabilities] * len(chunks),
+                                                  [horizon] * len(chunks), [min_samples] * len(chunks)):
+                    results.update(chunk_results)
+    return BacktestReport(probabilities, results)
+
+
+def load_backtest(symbols: list, data_enum, probabilities: list, horizon: int = None, min_samples: int = 20,
+                  max_workers: int = None) -> BacktestReport:
+    """
+        Backtests stored tickers, fetching the missing ones first.
+
+        Args:
+            symbols (list): The stock symbols.
+            data_enum (StockEnum): The stored timeframe whose series is replayed.
+            probabilities (list): The probabilities, e.g. ["60%", "70%", "80%"].
+            horizon (int, optional): The bars between a prediction and its expiry for horizon predictions. By
+                default the pairs of bars the stored probabilities come from are replayed.
+            min_samples (int): The fewest past up-moves and down-moves a prediction needs.
+            max_workers (int, optional): The number of processes.
+
+        Returns:
+            BacktestReport: The hit rates. Tickers that could not be loaded are left out.
+    """
+    from stock_option_strategy._data.stock_db import StockDB
+
+    stock_db = StockDB(None, data_enum)
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    with metrics.span("backtest.load", timeframe=data_enum.duration):
+        stock_db.ensureMany(symbols)
+        series, dates = {}, {}
+        for symbol in symbols:
+            loaded = stock_db.getSeries(symbol)
+            if loaded is not None:
+                dates[symbol], series[symbol] = np.array(loaded[0]), np.array(loaded[1])
+    return run_backtest(series, probabilities, horizon, min_samples, max_workers, dates=dates)
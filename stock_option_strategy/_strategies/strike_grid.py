@@ -0,0 +1,232 @@
+import datetime
+
+import numpy as np
+
+from stock_option_strategy._data.quantiles import parse_probability
+from stock_option_strategy._utils import metrics
+from stock_option_strategy._utils.enums import StockEnum
+
+
+class StrikeGrid:
+
+    def __init__(self, symbols: list, probabilities: list, prices, dates: list, call_widths, put_widths):
+        """
+            The Iron Condor strikes of N tickers at M probabilities, as numeric (N, M) arrays.
+
+            Strikes are rounded to whole dollars like get_same_width_option_price and
+            get_different_width_option_price. Tickers that don't exist or have no data are NaN rows.
+
+            Args:
+                symbols (list): The N stock symbols, the rows.
+                probabilities (list): The M probabilities as given, e.g. "70%", the columns.
+                prices (np.ndarray): The (N,) prices the strikes are computed from.
+                dates (list): The date of each ticker's last stored bar, or None.
+                call_widths (np.ndarray): The (N, M) call percent widths.
+                put_widths (np.ndarray): The (N, M) (negative) put percent widths.
+
+            Attributes:
+                same_call, same_put (np.ndarray): The strikes with legs of the same width, the wider of the two.
+                different_call, different_put (np.ndarray): The strikes with legs of different widths.
+        """
+        self.symbols = symbols
+        self.probabilities = probabilities
+        self.prices = prices
+        self.dates = dates
+        self.call_widths = call_widths
+        self.put_widths = put_widths
+
+        price = prices[:, None]
+        self.different_call = np.round(((price * call_widths) / 100) + price)
+        self.different_put = np.round(price + ((price * put_widths) / 100))
+        same_widths = np.where(put_widths > call_widths, put_widths, call_widths)
+        self.same_call = np.round(((price * same_widths) / 100) + price)
+        self.same_put = np.round(price - ((price * same_widths) / 100))
+
+    @property
+    def valid(self) -> np.ndarray:
+        """The (N, M) mask of the cells that have strikes."""
+        return ~np.isnan(self.different_call)
+
+    def strikes(self, same_width: bool = False) -> tuple:
+        """Returns the (N, M) call and put strikes of one width mode."""
+        if same_width:
+            return self.same_call, self.same_put
+        return self.different_call, self.different_put
+
+    def records(self, same_width: bool = False) -> list:
+        """
+            Formats the grid like the single-ticker predictions, one dictionary per ticker and probability.
+
+            This is only a presentation step, the numbers are best read from the arrays.
+
+            Returns:
+                list: The prediction dictionaries, ticker by ticker. Cells without data are left out.
+        """
+        calls, puts = self.strikes(same_width)
+        valid = self.valid
+        results = []
+        for row, symbol in enumerate(self.symbols):
+            for column, probability in enumerate(self.probabilities):
+                if not valid[row, column]:
+                    continue
+                results.append({
+                    "Symbol": symbol,
+                    "Last Updated Date": self.dates[row],
+                    "Predicted Option Put": f"${int(puts[row, column])}",
+                    "Last Updated Price": f"${self.prices[row].item()}",
+                    "Predicted Option Call": f"${int(calls[row, column])}",
+                    "Call Width %": f"{self.call_widths[row, column].item()}%",
+                    "Put Width %": f"{self.put_widths[row, column].item()}%",
+                    "Probability of Success": probability
+                })
+        return results
+
+    def to_frame(self):
+        """
+            Returns the grid as a long pandas DataFrame, one row per ticker and probability.
+
+            Raises:
+                ImportError: If pandas isn't installed.
+        """
+        import pandas as pd
+
+        rows, columns = len(self.symbols), len(self.probabilities)
+        return pd.DataFrame({
+            "symbol": np.repeat(np.asarray(self.symbols, dtype=object), columns),
+            "probability": np.tile(np.asarray(self.probabilities, dtype=object), rows),
+            "price": np.repeat(self.prices, columns),
+            "call_width": self.call_widths.ravel(),
+            "put_width": self.put_widths.ravel(),
+            "same_call": self.same_call.ravel(),
+            "same_put": self.same_put.ravel(),
+            "different_call": self.different_call.ravel(),
+            "different_put": self.different_put.ravel(),
+        })
+
+
+def _padded(distributions: list) -> tuple:
+    """Stacks sorted distributions of different lengths into one NaN-padded matrix and their lengths."""
+    counts = np.fromiter((len(values) for values in distributions), dtype=np.int64, count=len(distributions))
+    matrix = np.full((len(distributions), max(1, counts.max(initial=0))), np.nan)
+    for row, values in enumerate(distributions):
+        matrix[row, :counts[row]] = values
+    return matrix, counts
+
+
+def _last_bar(stock: dict, duration: str) -> tuple:
+    """Returns the newest (date, close) of the current year's bars, like IronCondor, or (None, None)."""
+    bars = stock.get(str(datetime.date.today().year), {}).get(duration) or {}
+    for day, close in bars.items():
+        return day, close
+    return None, None
+
+
+def build_strike_grid(stocks: dict, prices: dict, probabilities: list, duration: str = None) -> StrikeGrid:
+    """
+        Computes the strike grid of preloaded stock documents in one vectorized pass.
+
+        Every ticker's sorted distribution becomes a row of a padded matrix, so the quantile indices of all the
+        tickers and probabilities are computed at once, with the same lookup as QuantileTable.
+
+        Args:
+            stocks (dict): The stored documents keyed by symbol, as returned by StockDB.getMany. None for missing
+                tickers.
+            prices (dict): The current price of each symbol; a missing or empty price falls back to the last stored
+                close.
+            probabilities (list): The probabilities, e.g. ["50%", "70%", "73.5%"].
+            duration (str, optional): The timeframe of the documents, e.g. "WEEKLY", used to find the last stored
+                close and its date.
+
+        Returns:
+            StrikeGrid: The grid, rows in the order of stocks.
+
+        Raises:
+            ValueError: If a probability isn't between 0% and 100%.
+    """
+    symbols = list(stocks)
+    probabilities = list(probabilities)
+    percentages = np.array([parse_probability(probability) for probability in probabilities], dtype=np.float64)
+    rows = len(symbols)
+
+    price_column = np.full(rows, np.nan)
+    dates = [None] * rows
+    call_distributions, put_distributions = [], []
+    legacy = []
+    for row, symbol in enumerate(symbols):
+        stock = stocks[symbol] or {}
+        last_date, last_close = _last_bar(stock, duration) if duration else (None, None)
+        dates[row] = last_date
+        price = prices.get(symbol) or last_close
+        if price is not None:
+            price_column[row] = price
+        distribution = stock.get("Distribution")
+        if distribution is None:
+            legacy.append(row)
+            distribution = {"Call": (), "Put": ()}
+        call_distributions.append(distribution["Call"])
+        put_distributions.append(distribution["Put"])
+
+    with metrics.span("strike_grid.build"):
+        call_matrix, call_counts = _padded(call_distributions)
+        put_matrix, put_counts = _padded(put_distributions)
+        fraction = percentages[None, :] / 100
+        call_index = np.minimum(np.floor(call_counts[:, None] * fraction).astype(np.int64), call_counts[:, None] - 1)
+        put_index = put_counts[:, None] - 1 - np.minimum(np.floor(put_counts[:, None] * fraction).astype(np.int64),
+                                                          put_counts[:, None] - 1)
+        row_index = np.arange(rows)[:, None]
+        # empty distributions index -1; those cells are masked to NaN
+        call_widths = np.where(call_counts[:, None] > 0, call_matrix[row_index, np.maximum(call_index, 0)], np.nan)
+        put_widths = np.where(put_counts[:, None] > 0, put_matrix[row_index, np.clip(put_index, 0, None)], np.nan)
+
+    for row in legacy:
+        # documents stored before the distribution existed only know the standard probabilities
+        table = (stocks[symbols[row]] or {}).get("Probabilities", {})
+        for column, probability in enumerate(probabilities):
+            call_widths[row, column] = table.get("Call", {}).get(probability, np.nan)
+            put_widths[row, column] = table.get("Put", {}).get(probability, np.nan)
+
+    return StrikeGrid(symbols, probabilities, price_column, dates, call_widths, put_widths)
+
+
+def load_strike_grid(symbols: list, data_enum: StockEnum, probabilities: list, quotes=None,
+                     max_workers: int = 4, horizon: int = None) -> StrikeGrid:
+    """
+        Loads the data of many tickers in batch and computes their strike grid.
+
+        The tickers are validated and priced with one quote lookup and their documents read with one StockDB.getMany,
+        so no IronCondor is constructed per ticker. Unknown tickers are NaN rows.
+
+        Args:
+            symbols (list): The stock symbols.
+            data_enum (StockEnum): The timeframe of the prediction.
+            probabilities (list): The probabilities, e.g. ["50%", "70%", "90%"].
+            quotes (QuoteProvider, optional): Defaults to the shared cached provider.
+            max_workers (int): How many missing tickers are fetched from AlphaVantage at once.
+            horizon (int, optional): Predict the move over this many bars of data_enum's series, see
+                IronCondor.
+
+        Returns:
+            StrikeGrid: The grid, rows in the order of symbols.
+    """
+    from stock_option_strategy._data.horizon import horizon_document
+    from stock_option_strategy._data.iron_condor import IronCondor
+    from stock_option_strategy._data.quotes import get_quote_provider
+    from stock_option_strategy._data.stock_db import StockDB
+
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    with metrics.span("strike_grid.load", timeframe=data_enum.duration):
+        found = (quotes or get_quote_provider()).get_quotes(symbols)
+        existing = [symbol for symbol in symbols if found[symbol].exists]
+        stock_db = StockDB(None, data_enum)
+        if horizon is None:
+            loaded = stock_db.getMany(existing, IronCondor.required_fields(data_enum), max_workers) if existing else {}
+        else:
+            stock_db.ensureMany(existing, max_workers)
+            loaded = {}
+            for symbol in existing:
+                series = stock_db.getSeries(symbol)
+                if series is not None:
+                    loaded[symbol] = horizon_document(*series, horizon, data_enum.duration)
+    stocks = {symbol: loaded.get(symbol) for symbol in symbols}
+    prices = {symbol: found[symbol].price for symbol in existing}
+    return build_strike_grid(stocks, prices, probabilities, data_enum.duration)
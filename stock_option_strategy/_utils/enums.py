@@ -30,4 +30,4 @@ class TimeFrame(Enum):
         elif self == TimeFrame.WEEKLY:
             return StockEnum("TIME_SERIES_WEEKLY_ADJUSTED", "Weekly Adjusted Time Series", "StockData_Weekly","WEEKLY")
         elif self == TimeFrame.DAILY:
-            return StockEnum("TIME_SERIES_DAILY_ADJUSTED", "Daily", "StockData_Daily","DAILY")
+            return StockEnum("TIME_SERIES_DAILY_ADJUSTED", "Time Series (Daily)", "StockData_Daily","DAILY")
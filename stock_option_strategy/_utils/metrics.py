@@ -0,0 +1,298 @@
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+
+
+class MetricsSink(ABC):
+    """
+        Receives the timings and counters recorded while metrics are enabled.
+    """
+
+    @abstractmethod
+    def record_span(self, name: str, seconds: float, labels: dict):
+        pass
+
+    @abstractmethod
+    def increment(self, name: str, value: float, labels: dict):
+        pass
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class InMemorySink(MetricsSink):
+
+    def __init__(self):
+        """Keeps every span duration and counter in memory, for tests, benchmarks and ad-hoc profiling."""
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+
+    def record_span(self, name, seconds, labels):
+        with self._lock:
+            self.spans.setdefault(_key(name, labels), []).append(seconds)
+
+    def increment(self, name, value, labels):
+        with self._lock:
+            key = _key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def summary(self) -> dict:
+        """
+            Summarizes the spans per name, across labels.
+
+            Returns:
+                dict: {name: {"count", "total_ms", "p50_ms", "p95_ms", "max_ms"}}
+        """
+        by_name = {}
+        with self._lock:
+            for (name, _), durations in self.spans.items():
+                by_name.setdefault(name, []).extend(durations)
+        summary = {}
+        for name, durations in by_name.items():
+            durations.sort()
+            summary[name] = {"count": len(durations), "total_ms": sum(durations) * 1000,
+                             "p50_ms": durations[len(durations) // 2] * 1000,
+                             "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+                             "max_ms": durations[-1] * 1000}
+        return summary
+
+    def counter(self, name: str) -> float:
+        """Returns the total of a counter across labels."""
+        with self._lock:
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+class LogSink(MetricsSink):
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO):
+        """
+            Writes one JSON line per span or counter increment to a logger, for log-based pipelines.
+
+            Args:
+                logger (logging.Logger, optional): Defaults to the "stock_option_strategy.metrics" logger.
+                level (int): The level the lines are logged at.
+        """
+        self.logger = logger or logging.getLogger("stock_option_strategy.metrics")
+        self.level = level
+
+    def record_span(self, name, seconds, labels):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps({"type": "span", "name": name, "ms": round(seconds * 1000, 3),
+                                                    **labels}))
+
+    def increment(self, name, value, labels):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps({"type": "counter", "name": name, "value": value, **labels}))
+
+
+class PrometheusSink(MetricsSink):
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, namespace: str = "stock_option_strategy", buckets: tuple = BUCKETS):
+        """
+            Aggregates spans into one histogram and counters into totals, rendered in the Prometheus text format.
+
+            Spans become stock_option_strategy_stage_seconds{stage="<name>", ...}; a counter "cache.hits" becomes
+            stock_option_strategy_cache_hits_total.
+
+            Args:
+                namespace (str): The prefix of every metric name.
+                buckets (tuple): The histogram bucket bounds, in seconds.
+        """
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def record_span(self, name, seconds, labels):
+        with self._lock:
+            key = _key(name, labels)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def increment(self, name, value, labels):
+        with self._lock:
+            key = _key(name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @staticmethod
+    def _escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def _labels(self, pairs) -> str:
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{self._escape(value)}"' for name, value in pairs) + "}"
+
+    def _metric_name(self, name):
+        return f"{self.namespace}_" + "".join(char if char.isalnum() else "_" for char in name)
+
+    def exposition(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = {key: ([*value[0]], value[1], value[2]) for key, value in self._histograms.items()}
+            counters = dict(self._counters)
+
+        if histograms:
+            family = f"{self.namespace}_stage_seconds"
+            lines += [f"# HELP {family} Time spent per pipeline stage.", f"# TYPE {family} histogram"]
+            for (name, labels), (bucket_counts, count, total) in sorted(histograms.items()):
+                pairs = (("stage", name),) + labels
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{family}_bucket{self._labels(pairs + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{family}_bucket{self._labels(pairs + (('le', '+Inf'),))} {count}")
+                lines.append(f"{family}_sum{self._labels(pairs)} {total}")
+                lines.append(f"{family}_count{self._labels(pairs)} {count}")
+
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(self._metric_name(name) + "_total", []).append((labels, value))
+        for family, samples in sorted(families.items()):
+            lines.append(f"# TYPE {family} counter")
+            lines += [f"{family}{self._labels(labels)} {value}" for labels, value in sorted(samples)]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Atomically writes the exposition to a file, e.g. for the node_exporter textfile collector."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            file.write(self.exposition())
+        os.replace(tmp_path, path)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.labels["error"] = exc_type.__name__
+        for sink in _sinks:
+            sink.record_span(self.name, seconds, self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_sinks: tuple = ()
+
+
+def enable(*sinks: MetricsSink):
+    """Starts sending spans and counters to the given sinks, replacing the previous ones."""
+    global _sinks
+    _sinks = tuple(sinks)
+
+
+def disable():
+    """Stops recording; spans and counters are then close to free."""
+    global _sinks
+    _sinks = ()
+
+
+def is_enabled() -> bool:
+    return bool(_sinks)
+
+
+def sinks() -> tuple:
+    return _sinks
+
+
+def span(name: str, **labels):
+    """
+        Times a block of code as a named stage:
+
+            with metrics.span("stock_db.read", timeframe="WEEKLY"):
+                ...
+
+        A span that raised is recorded with an "error" label holding the exception type.
+    """
+    if not _sinks:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+def timed(name: str):
+    """Decorator form of span for whole functions."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return function(*args, **kwargs)
+            with _Span(name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name: str, value: float = 1, **labels):
+    """Adds to a counter such as "stock_db.cache_hits"."""
+    for sink in _sinks:
+        sink.increment(name, value, labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    """Records a duration measured elsewhere, e.g. the time spent waiting for the API quota."""
+    for sink in _sinks:
+        sink.record_span(name, seconds, labels)
+
+
+def configure(sink_name: str = None, log_level: int = logging.INFO):
+    """
+        Enables one of the built-in sinks by name, as set by the [metrics] sink config key.
+
+        Args:
+            sink_name (str, optional): "memory", "log" or "prometheus"; None or "" disables metrics.
+            log_level (int): The level of the log sink.
+
+        Returns:
+            MetricsSink: The enabled sink, or None.
+    """
+    if not sink_name:
+        disable()
+        return None
+    factories = {"memory": InMemorySink, "log": lambda: LogSink(level=log_level), "prometheus": PrometheusSink}
+    if sink_name not in factories:
+        raise ValueError(f"Unknown metrics sink {sink_name}. Please use 'memory', 'log' or 'prometheus'.")
+    sink = factories[sink_name]()
+    enable(sink)
+    return sink
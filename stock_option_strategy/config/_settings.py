@@ -1,6 +1,6 @@
 import os
+import sys
 import toml
-import inspect
 class _ConfigReader:
     def __init__(self,config_path=None):
         if config_path is None:
@@ -11,14 +11,11 @@ class _ConfigReader:
         self.config_path = config_path
         self.config = toml.load(self.config_path)
     def _get_caller_module_name(self):
-        # Skip frames to find the module name of the actual caller
-        frame = inspect.currentframe()
-        while frame:
-            module = inspect.getmodule(frame)
-            if module and module.__name__ != __name__:
-                return module.__name__
+        # Skip this module's frames (at most the two getters) to find the module name of the actual caller
+        frame = sys._getframe(1)
+        while frame and frame.f_globals.get("__name__") == __name__:
             frame = frame.f_back
-        return None
+        return frame.f_globals.get("__name__") if frame else None
 
     def _get_api_key(self):
         caller_name = self._get_caller_module_name()
@@ -52,4 +49,62 @@ def get_database_uri():
     if _config_reader is not None:
         return _config_reader._get_database_uri()
     else:
-        raise RuntimeError("ConfigReader not initialized. Please call initialize_config() first.")
\ No newline at end of file
+        raise RuntimeError("ConfigReader not initialized. Please call initialize_config() first.")
+
+def is_initialized() -> bool:
+    return _config_reader is not None
+
+def get_rate_limit_settings() -> dict:
+    """
+        Returns the AlphaVantage quota from the optional [alphavantage] calls_per_minute, calls_per_day and
+        rate_limit_state keys. These aren't secrets, so unlike the api key any module may read them.
+    """
+    if _config_reader is None:
+        raise RuntimeError("ConfigReader not initialized. Please call initialize_config() first.")
+    section = _config_reader.config.get("alphavantage", {})
+    return {"calls_per_minute": section.get("calls_per_minute", 5),
+            "calls_per_day": section.get("calls_per_day", 25),
+            "state_path": section.get("rate_limit_state")}
+
+def get_database_layout() -> str:
+    """Returns the optional [database] layout: "document" (the default), "bars", "columnar" or "packed"."""
+    if _config_reader is None:
+        return "document"
+    return _config_reader.config.get("database", {}).get("layout", "document")
+
+def get_database_compression() -> str:
+    """Returns the optional [database] compression of the packed layout: "none" (the default) or "zlib"."""
+    if _config_reader is None:
+        return "none"
+    return _config_reader.config.get("database", {}).get("compression", "none")
+
+def get_metrics_sink() -> str:
+    """Returns the optional [metrics] sink: "memory", "log" or "prometheus", None when metrics are off."""
+    if _config_reader is None:
+        return None
+    return _config_reader.config.get("metrics", {}).get("sink")
+
+def get_timeframe_source() -> str:
+    """
+        Returns the optional [predict] source: "native" (the default) fetches the WEEKLY and MONTHLY series,
+        "daily" derives them from the daily one.
+    """
+    if _config_reader is None:
+        return "native"
+    return _config_reader.config.get("predict", {}).get("source", "native")
+
+def get_freshness_settings() -> dict:
+    """
+        Returns the optional [freshness] ttl_hours, how long a weekly or monthly bar in progress may lag behind
+        (24 by default), and publish_delay_minutes, how long after the close a session's bar is published (30).
+    """
+    section = _config_reader.config.get("freshness", {}) if _config_reader is not None else {}
+    return {"ttl_hours": float(section.get("ttl_hours", 24)),
+            "publish_delay_minutes": float(section.get("publish_delay_minutes", 30))}
+
+def get_storage_path() -> str:
+    """Returns the optional [database] path holding the columnar layout's files."""
+    default = os.path.join("~", ".stock_option_strategy", "data")
+    if _config_reader is None:
+        return default
+    return _config_reader.config.get("database", {}).get("path", default)
\ No newline at end of file
@@ -0,0 +1,42 @@
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeAlphaVantageClient, InMemoryClient
+from benchmarks.pipeline import write_config
+from stock_option_strategy._cli import initialize_config
+from stock_option_strategy._data import db_client, freshness, http_client, quotes, refresh_lock, stock_db
+from stock_option_strategy._utils.enums import TimeFrame
+
+
+@pytest.fixture
+def offline(tmp_path):
+    """
+        Points the package at offline stand-ins: synthetic AlphaVantage payloads, an in-memory database and leases
+        kept in tmp_path. Call offline.serve(timeframe, years) to choose the payloads.
+    """
+    def serve(timeframe: str = "WEEKLY", years: int = 5):
+        client = FakeAlphaVantageClient(TimeFrame[timeframe].get_enum(), years)
+        http_client.set_client(client)
+        return client
+
+    initialize_config(write_config(str(tmp_path), "document"))
+    db = InMemoryClient()
+    db_client.set_db_client(db)
+    refresh_lock.set_refresh_coordinator(refresh_lock.RefreshCoordinator(str(tmp_path / "refresh.sqlite"),
+                                                                         poll_interval=0.01))
+    stock_db.read_cache.clear()
+    stock_db.series_cache.clear()
+    yield types.SimpleNamespace(db=db, serve=serve, path=tmp_path)
+    stock_db.read_cache.clear()
+    stock_db.series_cache.clear()
+    http_client.set_client(None)
+    db_client.set_db_client(None)
+    quotes.set_quote_provider(None)
+    freshness.set_freshness_policy(None)
+    refresh_lock.set_refresh_coordinator(None)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from stock_option_strategy._data.horizon import forward_returns
+from stock_option_strategy._data.ingest import bar_pairs, build_distribution, build_document, \
+    merge_percent_summaries, summary_distribution
+from stock_option_strategy._data.quantiles import QuantileTable
+from stock_option_strategy._strategies.backtest import backtest_series, run_backtest
+from stock_option_strategy._utils.enums import TimeFrame
+
+PROBABILITIES = ["60%", "80%", "95%"]
+
+
+def weekly_series(count: int, seed: int):
+    dates = np.datetime64("2026-10-16") - np.arange(count)[::-1] * 7
+    closes = np.round(100 * np.cumprod(1 + np.random.default_rng(seed).normal(0.001, 0.03, count)), 2)
+    return dates, closes
+
+
+def naive_backtest(tests: list, min_samples: int) -> dict:
+    """Scores (price, expiry, known moves) tests one by one through QuantileTable."""
+    result = {"tests": 0, "different": np.zeros(len(PROBABILITIES), dtype=np.int64)}
+    for price, expiry, known in tests:
+        positive = [move for move, up in known if up]
+        negative = [move for move, up in known if not up]
+        if len(positive) < min_samples or len(negative) < min_samples:
+            continue
+        distribution = build_distribution(positive, negative)
+        table = QuantileTable(distribution["Call"], distribution["Put"])
+        result["tests"] += 1
+        for index, probability in enumerate((60, 80, 95)):
+            call = round(price * table.call(probability) / 100 + price)
+            put = round(price + price * table.put(probability) / 100)
+            result["different"][index] += put <= expiry <= call
+    return result
+
+
+def pair_tests(dates, closes, by_year: bool) -> list:
+    newest_first_dates, newest_first = dates[::-1], closes[::-1]
+    widths, percent, older_index = bar_pairs(newest_first)
+    pairs = [(newest_first[index], newest_first[index - 1], move, not width < 0,
+              newest_first_dates[index].astype(object).year)
+             for width, move, index in zip(widths, percent, older_index)][::-1]
+    return [(older, newer, [(move, up) for _, _, move, up, known_year in pairs[:index]
+                            if not by_year or known_year < year])
+            for index, (older, newer, _, _, year) in enumerate(pairs)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("by_year", [False, True])
+def test_pairs_replay_the_stored_pairing(seed, by_year):
+    dates, closes = weekly_series(521, seed)
+    result = backtest_series(closes, PROBABILITIES, min_samples=10, dates=dates if by_year else None)
+    expected = naive_backtest(pair_tests(dates, closes, by_year), 10)
+    assert result["tests"] == expected["tests"] > 0
+    assert result["different"].tolist() == expected["different"].tolist()
+
+
+@pytest.mark.parametrize("horizon", [1, 4])
+def test_horizons_replay_the_forward_returns(horizon):
+    _, closes = weekly_series(400, 5)
+    windows = forward_returns(closes, horizon)[::-1].tolist()
+    samples = closes[(len(closes) - 1) % horizon::horizon]
+    tests = [(samples[index], samples[index + 1], [(move, move >= 0) for move in windows[:index]])
+             for index in range(len(windows))]
+    result = backtest_series(closes, PROBABILITIES, horizon, min_samples=10)
+    expected = naive_backtest(tests, 10)
+    assert result["tests"] == expected["tests"] > 0
+    assert result["different"].tolist() == expected["different"].tolist()
+
+
+def test_newest_pair_uses_the_stored_probabilities():
+    # the document stored one bar before the newest pair holds exactly the moves that pair is tested against
+    dates, closes = weekly_series(300, 9)
+    data_enum = TimeFrame.WEEKLY.get_enum()
+    newest_year = str(dates[-2].astype(object).year)
+    stock = build_document("SYM", data_enum, dates[:-2][::-1], closes[:-2][::-1], newest_year)["SYM"]
+    stored = summary_distribution(*merge_percent_summaries(stock, newest_year))
+    known = pair_tests(dates, closes, True)[-1][2]
+    assert stored == build_distribution([move for move, up in known if up], [move for move, up in known if not up])
+
+
+def test_run_backtest_passes_the_dates():
+    series, dates = {}, {}
+    for seed in range(3):
+        dates[f"S{seed}"], series[f"S{seed}"] = weekly_series(300, seed)
+    report = run_backtest(series, PROBABILITIES, min_samples=10, max_workers=1, dates=dates)
+    assert report.tests == sum(backtest_series(series[symbol], PROBABILITIES, min_samples=10,
+                                               dates=dates[symbol])["tests"] for symbol in series)
+    assert [row["Tests"] for row in report.summary()] == [report.tests] * len(PROBABILITIES)
+
+
+def test_short_series_have_no_tests():
+    assert backtest_series([], PROBABILITIES)["tests"] == 0
+    assert backtest_series([1.0], PROBABILITIES, 3)["tests"] == 0
@@ -0,0 +1,52 @@
+import pytest
+
+from stock_option_strategy._data import bar_store
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.bar_store import BarStore
+from stock_option_strategy._data.db_client import MongoClientWrapper
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    monkeypatch.setattr(bar_store, "_indexed_collections", set())
+    client = MongoClientWrapper.__new__(MongoClientWrapper)
+    client.db = mongomock.MongoClient().db
+    return client
+
+
+def spy(monkeypatch, target, name: str, calls: list, label):
+    """Replaces target.name with a wrapper that appends label to calls before calling through."""
+    method = getattr(target, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(label(*args) if callable(label) else label)
+        return method(*args, **kwargs)
+
+    monkeypatch.setattr(target, name, wrapper)
+
+
+def test_the_bar_index_is_created_once_per_collection(mongo, monkeypatch):
+    created = []
+    spy(monkeypatch, type(mongo.db[BarStore.BARS_COLLECTION]), "create_index", created, lambda self, *_: self.name)
+
+    BarStore(mongo, WEEKLY)
+    BarStore(mongo, TimeFrame.DAILY.get_enum())
+    assert created == [BarStore.BARS_COLLECTION]
+    assert any(index.get("unique") for index in mongo.db[BarStore.BARS_COLLECTION].index_information().values())
+
+
+def test_bars_are_written_before_the_summary(offline, mongo, monkeypatch):
+    offline.serve("WEEKLY", 3)
+    stock = AlphaData(WEEKLY, "SYM").addData()["SYM"]
+    store = BarStore(mongo, WEEKLY)
+    writes = []
+    for collection in (store.bars, store.summaries):
+        spy(monkeypatch, collection, "bulk_write", writes, collection.name)
+
+    store.write("SYM", stock)
+    assert writes == [BarStore.BARS_COLLECTION, BarStore.SUMMARY_COLLECTION]
+    assert store.read_many(["SYM"])["SYM"] == stock
@@ -0,0 +1,16 @@
+from stock_option_strategy._cli import predict_multiple_stocks
+from stock_option_strategy._data.quotes import FakeQuoteProvider, set_quote_provider
+
+
+def test_invalid_items_are_answered_one_by_one(offline):
+    offline.serve("WEEKLY", 3)
+    set_quote_provider(FakeQuoteProvider({"AAA": 100.0}))
+    results = predict_multiple_stocks([["AAA", "WEEKLY", 70], [None, "WEEKLY", "70%"], ["AAA", 7, "70%"],
+                                       ["AAA", "WEEKLY"], ["AAA", "DECADE", "70%"], ["AAA", "Weekly", "70%"]])
+    assert results[0]["Ticker"] == "AAA" and results[0]["Error"].startswith("An error occurred during prediction")
+    assert results[1]["Ticker"] is None and results[1]["Error"].startswith("An error occurred during prediction")
+    assert results[2]["Ticker"] == "AAA" and results[2]["Error"].startswith("An error occurred during prediction")
+    assert results[3] == {"Error": "Invalid number of parameters provided. "
+                                   "Expected ['Ticker', 'Timeframe', 'Probability']."}
+    assert results[4]["Error"].startswith("Invalid timeframe")
+    assert "Error" not in results[5] and results[5]["Symbol"] == "AAA"
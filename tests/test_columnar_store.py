@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pytest
+
+from stock_option_strategy._data import stock_db
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.columnar_store import ColumnarStore, file_name
+from stock_option_strategy._data.stock_db import StockDB
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ColumnarStore(str(tmp_path), WEEKLY)
+
+
+def document(offline, symbol: str) -> dict:
+    offline.serve("WEEKLY", 3)
+    return AlphaData(WEEKLY, symbol).addData()[symbol]
+
+
+@pytest.mark.parametrize("symbol, name", [("AAPL", "AAPL"), ("BRK/B", "BRK%2FB"), ("BRK.B", "BRK.B"),
+                                          ("CON", "%43ON"), ("lpt1", "%6Cpt1"), ("nul.x", "%6Eul.x"),
+                                          ("..", "%2E."), ("../../etc/passwd", "%2E.%2F..%2Fetc%2Fpasswd"),
+                                          ("a\\b:c", "a%5Cb%3Ac"), ("CONS", "CONS")])
+def test_file_name_escapes_symbols(symbol, name):
+    assert file_name(symbol) == name
+
+
+def test_file_name_rejects_an_empty_symbol():
+    with pytest.raises(ValueError):
+        file_name("")
+
+
+@pytest.mark.parametrize("symbol", ["BRK/B", "../escape", "CON", "a\\b"])
+def test_symbols_stay_inside_the_data_directory(offline, store, symbol):
+    stock = document(offline, "SYM")
+    store.write(symbol, stock)
+    names = sorted(os.listdir(store.directory))
+    bars = [name for name in names if name.endswith(".bars")]
+    assert [name for name in names if name not in bars] == [f"{file_name(symbol)}{ext}" for ext in (".index", ".json")]
+    assert len(bars) == 1 and bars[0].startswith(f"{file_name(symbol)}.")
+    assert store.exists_many([symbol, "SYM"]) == {symbol}
+    assert store.read_many([symbol])[symbol] == stock
+
+
+def bar_files(store) -> list:
+    return sorted(name for name in os.listdir(store.directory) if name.endswith(".bars"))
+
+
+def test_read_series_maps_without_copying(offline, store):
+    store.write("SYM", document(offline, "SYM"))
+    dates, closes = store.read_series("SYM")
+    assert isinstance(dates.base, np.memmap) and dates.base is closes.base
+    assert not dates.flags.writeable and not closes.flags.writeable
+
+
+def test_new_bars_are_appended(offline, store):
+    store.write("SYM", document(offline, "SYM"))
+    dates, closes = store.read_series("SYM")
+    files, size = bar_files(store), os.path.getsize(os.path.join(store.directory, bar_files(store)[0]))
+    # rebuild the year of the newest bar, repeating its stored bars and adding two weeks
+    year = str(dates[-1])[:4]
+    new_bars = {str(dates[-1] + 7): 1.0, str(dates[-1] + 14): 2.0}
+    years = {}
+    for day, close in [*((str(day), float(close)) for day, close in zip(dates, closes)), *new_bars.items()]:
+        if day[:4] >= year:
+            years.setdefault(day[:4], {"WEEKLY": {}})["WEEKLY"][day] = close
+    store.replace_years("SYM", years, {})
+
+    assert bar_files(store) == files
+    assert os.path.getsize(os.path.join(store.directory, files[0])) == size + len(new_bars) * 16
+    new_dates, new_closes = store.read_series("SYM")
+    np.testing.assert_array_equal(new_dates[:len(dates)], dates)
+    assert new_closes[len(dates):].tolist() == list(new_bars.values())
+    # the views handed out before still see the rows they mapped
+    assert len(dates) == len(new_dates) - len(new_bars)
+
+
+def test_changed_bars_move_to_a_new_file(offline, store):
+    store.write("SYM", document(offline, "SYM"))
+    dates, closes = store.read_series("SYM")
+    files = bar_files(store)
+    store.replace_years("SYM", {"2026": {"WEEKLY": {"2026-10-16": 1.0}}}, {})
+
+    assert len(bar_files(store)) == 1 and bar_files(store) != files
+    new_dates, new_closes = store.read_series("SYM")
+    assert new_dates[-1] == np.datetime64("2026-10-16") and new_closes[-1] == 1.0
+    assert (new_dates < np.datetime64("2026-01-01")).sum() == (dates < np.datetime64("2026-01-01")).sum()
+    # the old mapping outlives its removed file
+    assert np.isfinite(closes).all()
+
+
+def test_rows_past_the_index_are_ignored(offline, store):
+    stock = document(offline, "SYM")
+    store.write("SYM", stock)
+    with open(os.path.join(store.directory, bar_files(store)[0]), "ab") as file:
+        # an append interrupted before the index was swapped
+        file.write(b"\xff" * 24)
+    assert store.read_many(["SYM"])["SYM"] == stock
+
+
+def test_cached_series_survive_a_rewrite(offline, tmp_path):
+    offline.serve("WEEKLY", 3)
+    db = StockDB(None, WEEKLY, layout="columnar")
+    dates, closes = db.getSeries("BRK/B")
+    assert stock_db.series_cache.get((WEEKLY.collection_name, "BRK/B")) is not None
+
+    db.store.replace_years("BRK/B", {"2026": {"WEEKLY": {"2026-10-16": 1.0}}}, {})
+    stored_dates, stored_closes = db.store.read_series("BRK/B")
+    assert stored_dates[-1] == np.datetime64("2026-10-16") and stored_closes[-1] == 1.0
+    # the copy handed out earlier is unaffected by the replaced file
+    assert len(dates) == len(closes) and np.isfinite(closes).all()
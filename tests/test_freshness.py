@@ -0,0 +1,114 @@
+import datetime
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeAlphaVantageClient, synthetic_series
+from benchmarks.pipeline import write_config
+from stock_option_strategy._cli import initialize_config
+from stock_option_strategy._data import trading_calendar
+from stock_option_strategy._data.freshness import FreshnessPolicy, get_freshness_policy
+from stock_option_strategy._data.iron_condor import IronCondor
+from stock_option_strategy._data.quotes import FakeQuoteProvider
+from stock_option_strategy._utils.enums import TimeFrame
+
+DAILY, WEEKLY, MONTHLY = (TimeFrame[name].get_enum() for name in ("DAILY", "WEEKLY", "MONTHLY"))
+
+
+def day(text: str) -> datetime.date:
+    return datetime.date.fromisoformat(text)
+
+
+def utc(*args) -> datetime.datetime:
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+SUNDAY = utc(2026, 10, 18, 16)
+
+
+@pytest.mark.parametrize("data_enum", [DAILY, WEEKLY, MONTHLY], ids=lambda data_enum: data_enum.duration)
+def test_nothing_is_refreshed_over_the_weekend(data_enum):
+    assert not FreshnessPolicy().is_stale(day("2026-10-16"), data_enum, SUNDAY)
+
+
+@pytest.mark.parametrize("data_enum", [DAILY, WEEKLY, MONTHLY], ids=lambda data_enum: data_enum.duration)
+def test_a_bar_before_the_last_session_is_stale(data_enum):
+    # Thursday's bar: Friday closed the day, the week, and moved the month's bar along
+    policy = FreshnessPolicy(ttl=0)
+    assert policy.is_stale(day("2026-10-15"), data_enum, SUNDAY)
+
+
+def test_a_daily_bar_is_stale_once_a_session_closed():
+    # Monday's bar on Wednesday morning: Tuesday's session closed
+    assert FreshnessPolicy().is_stale(day("2026-10-19"), DAILY, utc(2026, 10, 21, 14))
+
+
+def test_the_bar_in_progress_may_lag_by_the_ttl():
+    policy = FreshnessPolicy()
+    # Monday's weekly bar: Tuesday's session was published at 4:30 pm, 17.5 hours before Wednesday 10 am
+    assert not policy.is_stale(day("2026-10-19"), WEEKLY, utc(2026, 10, 21, 14))
+    # and 24.5 hours before Wednesday 5 pm
+    assert policy.is_stale(day("2026-10-19"), WEEKLY, utc(2026, 10, 21, 21))
+    assert FreshnessPolicy(ttl=0).is_stale(day("2026-10-19"), WEEKLY, utc(2026, 10, 21, 14))
+
+
+def test_a_closed_week_is_stale_at_once():
+    # Thursday's weekly bar on Saturday: Friday's session ended the week
+    assert FreshnessPolicy().is_stale(day("2026-10-15"), WEEKLY, utc(2026, 10, 17, 16))
+
+
+def test_a_bar_dated_on_a_holiday_is_stale():
+    # bars only carry trading days, so such a bar isn't a session's
+    assert FreshnessPolicy().is_stale(day("2026-10-17"), WEEKLY, utc(2026, 10, 21, 14))
+
+
+def test_publish_delay():
+    thursday_close = utc(2026, 10, 15, 20, 10)
+    assert not FreshnessPolicy().is_stale(day("2026-10-14"), DAILY, thursday_close)
+    assert FreshnessPolicy(publish_delay=0).is_stale(day("2026-10-14"), DAILY, thursday_close)
+
+
+@pytest.mark.parametrize("last_bar, data_enum, expected", [
+    ("2026-10-16", WEEKLY, "2026-10-23"),
+    ("2026-10-14", WEEKLY, "2026-10-16"),
+    ("2026-10-30", MONTHLY, "2026-11-30"),
+    ("2026-12-31", DAILY, "2027-01-04"),
+])
+def test_expected_next_bar(last_bar, data_enum, expected):
+    assert FreshnessPolicy().expected_next_bar(day(last_bar), data_enum) == day(expected)
+
+
+def test_the_shared_policy_reads_the_settings(offline):
+    policy = get_freshness_policy()
+    assert policy.ttl == datetime.timedelta(hours=24)
+    assert policy.publish_delay == datetime.timedelta(minutes=30)
+    assert get_freshness_policy() is policy
+
+
+def serve_until(offline, last_bar: datetime.date) -> FakeAlphaVantageClient:
+    """Serves a daily series whose newest bar is last_bar, stored in the columnar layout."""
+    initialize_config(write_config(str(offline.path), "columnar"))
+    client = offline.serve("DAILY", 2)
+    client.payloads = [{DAILY.data_name: synthetic_series(DAILY, 2, 0, last_date=last_bar)}]
+    client.bodies = [json.dumps(payload).encode() for payload in client.payloads]
+    return client
+
+
+def predict_three_times():
+    quotes = FakeQuoteProvider({"AAA": 100.0})
+    for _ in range(3):
+        IronCondor("AAA", DAILY, quotes=quotes)
+
+
+def test_current_data_is_not_refreshed(offline):
+    client = serve_until(offline, get_freshness_policy().latest_bar())
+    predict_three_times()
+    assert client.calls == 1
+
+
+def test_stale_data_is_refreshed(offline):
+    latest = get_freshness_policy().latest_bar()
+    client = serve_until(offline, trading_calendar.previous_trading_day(latest))
+    predict_three_times()
+    # the first prediction stores the series and finds it stale, as do the next ones
+    assert client.calls == 4
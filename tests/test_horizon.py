@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from stock_option_strategy._cli import initialize_config
+from stock_option_strategy._data.horizon import forward_returns, horizon_document, parse_horizon, resolve_timeframe
+from stock_option_strategy._data.iron_condor import IronCondor
+from stock_option_strategy._data.quotes import FakeQuoteProvider
+from stock_option_strategy._utils.enums import TimeFrame
+
+DAILY = TimeFrame.DAILY.get_enum()
+
+
+def naive_returns(closes, horizon, step):
+    newest_first = list(closes)[::-1]
+    returns = []
+    for start in range(0, len(newest_first) - horizon, step):
+        newer, older = newest_first[start], newest_first[start + horizon]
+        returns.append(0 if older == 0 else round((newer - older) / older * 100, 2))
+    return returns
+
+
+@pytest.mark.parametrize("timeframe, days", [("45D", 45), (" 5d", 5), ("WEEKLY", None), ("10", None)])
+def test_parse_horizon(timeframe, days):
+    assert parse_horizon(timeframe) == days
+
+
+def test_parse_horizon_rejects_zero_days():
+    with pytest.raises(ValueError):
+        parse_horizon("0D")
+
+
+def test_resolve_timeframe(offline):
+    assert resolve_timeframe("45D") == (DAILY, 45)
+    assert resolve_timeframe("weekly") == (TimeFrame.WEEKLY.get_enum(), None)
+    config = offline.path / "config.toml"
+    config.write_text(config.read_text() + '\n[predict]\nsource = "daily"\n')
+    initialize_config(str(config))
+    assert resolve_timeframe("WEEKLY") == (DAILY, 5)
+    assert resolve_timeframe("MONTHLY") == (DAILY, 21)
+    with pytest.raises(KeyError):
+        resolve_timeframe("YEARLY")
+
+
+@pytest.mark.parametrize("horizon, step", [(1, None), (5, None), (21, None), (5, 1), (45, 3)])
+def test_forward_returns_match_a_loop(horizon, step):
+    closes = 100 * np.cumprod(1 + np.random.default_rng(horizon).normal(0, 0.02, 500))
+    closes[17] = 0
+    assert forward_returns(closes, horizon, step).tolist() == naive_returns(closes, horizon, step or horizon)
+
+
+def test_forward_returns_of_a_short_series():
+    assert len(forward_returns(np.array([1.0, 2.0]), 2)) == 0
+
+
+def test_horizon_document():
+    dates = np.arange(np.datetime64("2025-11-03"), np.datetime64("2026-03-02"))
+    closes = np.round(100 + 10 * np.sin(np.arange(len(dates)) / 7), 2)
+    document = horizon_document(dates, closes, 5, "DAILY")
+    returns = forward_returns(closes, 5)
+    assert document["2026"] == {"DAILY": {"2026-03-01": closes[-1]}}
+    assert document["Distribution"]["Call"] == sorted(returns[returns >= 0].tolist())
+    assert document["Distribution"]["Put"] == sorted(returns[returns < 0].tolist())
+    calls = document["Distribution"]["Call"]
+    assert document["Probabilities"]["Call"]["50%"] == calls[len(calls) // 2]
+
+
+def test_iron_condor_predicts_a_horizon_from_the_daily_series(offline):
+    offline.serve("DAILY", 3)
+    quotes = FakeQuoteProvider({"SYM": 100.0})
+    condor = IronCondor("SYM", DAILY, "70%", quotes=quotes, horizon=21)
+    dates, closes = condor.stock_db.getSeries("SYM")
+    expected = horizon_document(dates, closes, 21, "DAILY")
+    assert condor.get_percent_widths() == (expected["Probabilities"]["Call"]["70%"],
+                                           expected["Probabilities"]["Put"]["70%"])
+    daily_widths = IronCondor("SYM", DAILY, "70%", quotes=quotes).get_percent_widths()
+    assert condor.get_percent_widths()[0] > daily_widths[0]
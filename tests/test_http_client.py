@@ -0,0 +1,207 @@
+import gzip
+import json
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from stock_option_strategy._data import http_client
+from stock_option_strategy._data.http_client import AlphaVantageClient, AlphaVantageRequestError, \
+    AlphaVantageThrottleError, AlphaVantageUnavailableError
+from stock_option_strategy._data.ingest import parse_series
+from stock_option_strategy._data.rate_limit import QuotaExhaustedError, RateLimitScheduler
+from stock_option_strategy._data.series_stream import iter_series, parse_series_file, parse_series_stream
+
+SERIES_NAME = "Weekly Adjusted Time Series"
+THROTTLE = {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}
+INVALID_SYMBOL = {"Error Message": "Invalid API call. Please retry or visit the documentation."}
+
+
+def payload(count: int = 40) -> dict:
+    series = {}
+    for week in range(count):
+        day = np.datetime64("2026-10-16") - np.timedelta64(7 * week, "D")
+        series[str(day)] = {"1. open": "1.0000", "5. adjusted close": f"{100 + week * 0.37:.4f}",
+                            "6. volume": "1000"}
+    return {"Meta Data": {"1. Information": "Weekly Adjusted Prices and Volumes", "2. Symbol": "SYMé"},
+            SERIES_NAME: series}
+
+
+class StubServer:
+    """A local HTTP server answering each request with the next scripted (status, body), repeating the last one."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                status, body = stub.responses[min(len(stub.requests), len(stub.responses)) - 1]
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/query"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def script(self, *responses):
+        self.responses = list(responses)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    # record the backoff delays instead of sleeping, taking the upper end of the jitter
+    slept = []
+    monkeypatch.setattr(http_client, "time", types.SimpleNamespace(sleep=slept.append))
+    monkeypatch.setattr(http_client, "random", types.SimpleNamespace(uniform=lambda low, high: high))
+    return slept
+
+
+def client(stub, **kwargs) -> AlphaVantageClient:
+    return AlphaVantageClient(base_url=stub.url, timeout=5, **kwargs)
+
+
+def parse(chunks):
+    return parse_series_stream(chunks, SERIES_NAME)
+
+
+def test_retries_server_errors_with_exponential_backoff(stub, delays):
+    stub.script((503, b""), (500, b""), (502, b""), (200, payload()))
+    assert client(stub, backoff=1.0, max_backoff=3.0).query({"symbol": "SYM"}) == payload()
+    assert len(stub.requests) == 4
+    assert delays == [1.0, 2.0, 3.0]
+    assert "symbol=SYM" in stub.requests[0]
+
+
+def test_gives_up_after_max_retries(stub, delays):
+    stub.script((503, b""))
+    with pytest.raises(AlphaVantageUnavailableError):
+        client(stub, max_retries=2, backoff=0.5).query({"symbol": "SYM"})
+    assert len(stub.requests) == 3
+    assert delays == [0.5, 1.0]
+
+
+def test_malformed_json_is_retried(stub, delays):
+    stub.script((200, b"{not json"), (200, payload()))
+    assert client(stub).query({"symbol": "SYM"}) == payload()
+    assert len(stub.requests) == 2
+
+
+def test_connection_errors_are_unavailable(delays):
+    unreachable = AlphaVantageClient(base_url="http://127.0.0.1:1/query", timeout=1, max_retries=1)
+    with pytest.raises(AlphaVantageUnavailableError):
+        unreachable.query({"symbol": "SYM"})
+    assert len(delays) == 1
+
+
+def test_throttle_is_retried_and_drains_the_quota(stub, delays, tmp_path):
+    scheduler = RateLimitScheduler(calls_per_minute=6000, calls_per_day=0, state_path=str(tmp_path / "quota"),
+                                   poll_interval=0.001)
+    stub.script((200, THROTTLE), (200, payload()))
+    assert client(stub, scheduler=scheduler).query({"symbol": "SYM"}) == payload()
+    assert len(stub.requests) == 2
+    assert scheduler.stats()["calls"] == 2
+
+
+def test_persistent_throttle_raises_throttle_error(stub, delays):
+    stub.script((200, {"Information": "Our standard API rate limit is 25 requests per day."}))
+    with pytest.raises(AlphaVantageThrottleError, match="25 requests per day"):
+        client(stub, max_retries=3).query({"symbol": "SYM"})
+    assert len(stub.requests) == 4
+
+
+@pytest.mark.parametrize("response", [(200, INVALID_SYMBOL), (404, b"")])
+def test_invalid_symbol_is_not_retried(stub, delays, response):
+    stub.script(response)
+    with pytest.raises(AlphaVantageRequestError):
+        client(stub).query({"symbol": "NOPE"})
+    assert len(stub.requests) == 1
+    assert delays == []
+
+
+def test_daily_quota_stops_before_calling(stub, delays, tmp_path):
+    scheduler = RateLimitScheduler(calls_per_minute=6000, calls_per_day=2, state_path=str(tmp_path / "quota"),
+                                   poll_interval=0.001)
+    stub.script((200, payload()))
+    api = client(stub, scheduler=scheduler)
+    api.query({"symbol": "A"})
+    api.query({"symbol": "B"})
+    with pytest.raises(QuotaExhaustedError):
+        api.query({"symbol": "C"})
+    assert len(stub.requests) == 2
+
+
+def test_stream_matches_the_decoded_payload(stub, delays):
+    stub.script((200, payload()))
+    dates, closes, date_keys = client(stub).stream({"symbol": "SYM"}, parse, chunk_size=7)
+    expected = parse_series(payload()[SERIES_NAME])
+    assert date_keys == expected[2]
+    np.testing.assert_array_equal(dates, expected[0])
+    np.testing.assert_array_equal(closes, expected[1])
+
+
+def test_stream_raises_typed_errors(stub, delays):
+    stub.script((200, INVALID_SYMBOL))
+    with pytest.raises(AlphaVantageRequestError, match="Invalid API call"):
+        client(stub).stream({"symbol": "NOPE"}, parse)
+    assert len(stub.requests) == 1
+
+    stub.requests.clear()
+    stub.script((200, THROTTLE))
+    with pytest.raises(AlphaVantageThrottleError):
+        client(stub, max_retries=1).stream({"symbol": "SYM"}, parse)
+    assert len(stub.requests) == 2
+
+
+def test_stream_retries_a_truncated_body(stub, delays):
+    body = json.dumps(payload()).encode()
+    stub.script((200, body[:len(body) // 2]), (200, body))
+    dates, closes, date_keys = client(stub).stream({"symbol": "SYM"}, parse)
+    assert len(date_keys) == 40
+    assert len(stub.requests) == 2
+
+
+def test_iter_series_handles_any_chunking():
+    body = json.dumps(payload(12), indent=2).encode()
+    expected = [(day, float(bar["5. adjusted close"])) for day, bar in payload(12)[SERIES_NAME].items()]
+    for size in range(1, 40):
+        chunks = [body[start:start + size] for start in range(0, len(body), size)]
+        assert list(iter_series(chunks, SERIES_NAME)) == expected
+
+
+def test_iter_series_errors():
+    with pytest.raises(AlphaVantageRequestError, match="no Weekly"):
+        list(iter_series([json.dumps({"Meta Data": {}}).encode()], SERIES_NAME))
+    with pytest.raises(ValueError):
+        list(iter_series([json.dumps(payload())[:-20].encode()], SERIES_NAME))
+
+
+def test_parse_series_file_reads_gzip(tmp_path):
+    path = tmp_path / "series.json.gz"
+    with gzip.open(path, "wt") as file:
+        json.dump(payload(), file)
+    dates, closes, date_keys = parse_series_file(str(path), SERIES_NAME)
+    assert date_keys == list(payload()[SERIES_NAME])
+    assert closes[1] == pytest.approx(100.37)
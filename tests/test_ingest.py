@@ -0,0 +1,155 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from stock_option_strategy._data import alphavantage
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.ingest import build_document, parse_series
+from stock_option_strategy._data.summaries import summarize_year
+from stock_option_strategy._utils.enums import TimeFrame
+
+STEP_DAYS = {"DAILY": 1, "WEEKLY": 7, "MONTHLY": 30}
+
+
+def random_series(duration: str, count: int, seed: int, last_date: datetime.date) -> dict:
+    rng = np.random.default_rng(seed)
+    closes = 100.0 * np.cumprod(1 + rng.normal(0, 0.03, count))
+    series, day = {}, last_date
+    for close in closes:
+        series[day.isoformat()] = {"1. open": "1", "5. adjusted close": f"{close:.4f}"}
+        day -= datetime.timedelta(days=STEP_DAYS[duration])
+    return series
+
+
+def _empty_year(duration: str) -> dict:
+    return {duration: {},
+            "WidthData": {"positiveWidth": [], "negativeWidth": [], "avgPosWidth": 0, "avgNegWidth": 0,
+                          "MaxPosWidth": 0, "MaxNegWidth": 0},
+            "PercentWidthData": {"positivePC": [], "negativePC": [], "avgPosPC": 0, "avgNegPC": 0, "MaxPosPC": 0,
+                                 "MaxNegPC": 0}}
+
+
+def _avg(values: list):
+    return round(sum(values) / len(values), 2) if values else 0
+
+
+def _without_outliers(values: list) -> list:
+    data = np.array(values)
+    z_scores = (data - data.mean()) / data.std()
+    return sorted(np.delete(data, np.where(np.abs(z_scores) > 3)).tolist())
+
+
+def baseline_document(symbol: str, duration: str, series: dict, curr_year: str) -> dict:
+    """The document the row-by-row AlphaData.addData built before the vectorized ingest, probabilities included."""
+    stock = {curr_year: _empty_year(duration)}
+    prices, temp_year = [], curr_year
+    for key, value in series.items():
+        year, price = key.split("-")[0], float(value["5. adjusted close"])
+        if year not in stock:
+            width_data, pc_data = stock[temp_year]["WidthData"], stock[temp_year]["PercentWidthData"]
+            width_data["avgPosWidth"] = _avg(width_data["positiveWidth"])
+            width_data["avgNegWidth"] = _avg(width_data["negativeWidth"])
+            width_data["MaxPosWidth"] = max(width_data["positiveWidth"], default=0)
+            width_data["MaxNegWidth"] = min(width_data["negativeWidth"], default=0)
+            pc_data["avgNegPC"] = _avg(pc_data["negativePC"])
+            pc_data["avgPosPC"] = _avg(pc_data["positivePC"])
+            pc_data["MaxPosPC"] = max(pc_data["positivePC"], default=0)
+            pc_data["MaxNegPC"] = min(pc_data["negativePC"], default=0)
+            stock[year] = _empty_year(duration)
+            temp_year = year
+        stock[year][duration][key] = price
+        prices.append(price)
+        if len(prices) == 2:
+            older, newer = prices.pop(), prices.pop()
+            change = 0 if older == 0 else round((newer - older) / older * 100, 2)
+            side = "negative" if newer - older < 0 else "positive"
+            stock[year]["WidthData"][f"{side}Width"].append(newer - older)
+            stock[year]["PercentWidthData"][f"{side}PC"].append(change)
+
+    positive, negative = [], []
+    for year in list(stock)[1:]:
+        positive.extend(stock[year]["PercentWidthData"]["positivePC"])
+        negative.extend(stock[year]["PercentWidthData"]["negativePC"])
+    positive, negative = _without_outliers(positive), _without_outliers(negative)
+    probabilities = {"Call": {}, "Put": {}}
+    for probs in [50, 60, 70, 80, 90, 99]:
+        probabilities["Call"][f"{probs}%"] = positive[int(len(positive) * probs / 100)]
+        probabilities["Put"][f"{probs}%"] = sorted(negative, reverse=True)[int(len(negative) * probs / 100)]
+    probabilities["Call"]["OverallAvgPosPC"] = _avg(positive)
+    probabilities["Put"]["OverallAvgNegPC"] = _avg(negative)
+    stock["Probabilities"] = probabilities
+    return {"_id": symbol, symbol: stock}
+
+
+def add_data(tmp_path, data_enum, series: dict, curr_year: str, monkeypatch) -> dict:
+    path = tmp_path / "series.json"
+    path.write_text(json.dumps({data_enum.data_name: series}))
+    monkeypatch.setattr(AlphaData, "current_year", staticmethod(lambda: curr_year))
+    return AlphaData(data_enum, "SYM", source=str(path)).addData()
+
+
+def assert_matches_baseline(document: dict, series: dict, duration: str, curr_year: str):
+    expected = baseline_document("SYM", duration, series, curr_year)
+    for year, year_data in expected["SYM"].items():
+        if year.isdigit():
+            summarize_year(year_data)
+    stock = dict(document["SYM"])
+    assert "Distribution" in stock
+    stock.pop("Distribution")
+    assert stock["Probabilities"] == expected["SYM"]["Probabilities"]
+    assert list(stock) == list(expected["SYM"])
+    assert stock == expected["SYM"]
+
+
+@pytest.mark.parametrize("timeframe, count", [("DAILY", 2600), ("WEEKLY", 521), ("MONTHLY", 121)])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_add_data_matches_baseline(tmp_path, monkeypatch, timeframe, count, seed):
+    data_enum = TimeFrame[timeframe].get_enum()
+    series = random_series(timeframe, count, seed, datetime.date(2026, 10, 16))
+    document = add_data(tmp_path, data_enum, series, "2026", monkeypatch)
+    assert_matches_baseline(document, series, timeframe, "2026")
+    assert document["SYM"]["2026"][timeframe]
+
+
+def test_current_year_without_bars_leads_the_document(tmp_path, monkeypatch):
+    # a series whose newest bar is from an earlier year still gets the empty current year first, left out of the
+    # probabilities
+    data_enum = TimeFrame.WEEKLY.get_enum()
+    series = random_series("WEEKLY", 300, 2, datetime.date(2024, 6, 14))
+    document = add_data(tmp_path, data_enum, series, "2026", monkeypatch)
+    assert_matches_baseline(document, series, "WEEKLY", "2026")
+    assert list(document["SYM"])[0] == "2026"
+    assert document["SYM"]["2026"]["WEEKLY"] == {}
+
+
+def test_years_without_pairs(tmp_path, monkeypatch):
+    # yearly bars: each pair is booked to its older bar's year, so even years hold a bar but no percent change
+    data_enum = TimeFrame.MONTHLY.get_enum()
+    rng = np.random.default_rng(3)
+    series = {f"{year}-06-30": {"5. adjusted close": f"{close:.4f}"}
+              for year, close in zip(range(2026, 1985, -1), 50 + rng.random(41) * 100)}
+    document = add_data(tmp_path, data_enum, series, "2026", monkeypatch)
+    assert_matches_baseline(document, series, "MONTHLY", "2026")
+    empty = {"cents": [], "counts": []}
+    assert document["SYM"]["2024"]["PercentWidthData"]["positiveSummary"] == empty
+    assert document["SYM"]["2024"]["PercentWidthData"]["negativeSummary"] == empty
+
+
+def test_build_document_accepts_parsed_bars_without_date_keys():
+    data_enum = TimeFrame.DAILY.get_enum()
+    series = random_series("DAILY", 800, 4, datetime.date(2026, 3, 2))
+    dates, closes, date_keys = parse_series(series)
+    assert build_document("SYM", data_enum, dates, closes, "2026") == \
+        build_document("SYM", data_enum, dates, closes, "2026", date_keys)
+
+
+def test_current_year_is_read_on_every_call(monkeypatch):
+    class NewYear(datetime.date):
+        @classmethod
+        def today(cls):
+            return cls(2031, 1, 1)
+
+    monkeypatch.setattr(alphavantage, "date", NewYear)
+    assert AlphaData.current_year() == "2031"
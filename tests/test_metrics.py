@@ -0,0 +1,101 @@
+import json
+import logging
+
+import pytest
+
+from stock_option_strategy._utils import metrics
+from stock_option_strategy._utils.metrics import InMemorySink, LogSink, PrometheusSink
+
+
+@pytest.fixture(autouse=True)
+def disabled():
+    metrics.disable()
+    yield
+    metrics.disable()
+
+
+def test_disabled_spans_record_nothing():
+    assert metrics.span("stage") is metrics.span("other")
+    metrics.increment("counter")
+    assert not metrics.is_enabled()
+
+
+def test_in_memory_sink_summarizes_spans_and_counters():
+    sink = InMemorySink()
+    metrics.enable(sink)
+    for seconds in (0.001, 0.002, 0.003, 0.004):
+        metrics.observe("stock_db.read", seconds, timeframe="WEEKLY")
+    metrics.observe("stock_db.read", 0.010, timeframe="DAILY")
+    metrics.increment("stock_db.cache_hits", timeframe="WEEKLY")
+    metrics.increment("stock_db.cache_hits", 2, timeframe="DAILY")
+
+    summary = sink.summary()["stock_db.read"]
+    assert summary["count"] == 5
+    assert summary["total_ms"] == pytest.approx(20.0)
+    assert summary["p50_ms"] == pytest.approx(3.0)
+    assert summary["max_ms"] == pytest.approx(10.0)
+    assert sink.counter("stock_db.cache_hits") == 3
+    sink.clear()
+    assert sink.summary() == {} and sink.counter("stock_db.cache_hits") == 0
+
+
+def test_spans_label_errors():
+    sink = InMemorySink()
+    metrics.enable(sink)
+    with pytest.raises(KeyError):
+        with metrics.span("load", timeframe="WEEKLY"):
+            raise KeyError("missing")
+
+    @metrics.timed("decorated")
+    def work():
+        return 42
+
+    assert work() == 42
+    assert set(sink.spans) == {("load", (("error", "KeyError"), ("timeframe", "WEEKLY"))), ("decorated", ())}
+
+
+def test_log_sink_writes_json_lines(caplog):
+    metrics.enable(LogSink())
+    with caplog.at_level(logging.INFO, logger="stock_option_strategy.metrics"):
+        metrics.observe("quotes.download", 0.0125, timeframe="DAILY")
+        metrics.increment("quotes.cache_hits", 3)
+    lines = [json.loads(record.getMessage()) for record in caplog.records]
+    assert lines == [{"type": "span", "name": "quotes.download", "ms": 12.5, "timeframe": "DAILY"},
+                     {"type": "counter", "name": "quotes.cache_hits", "value": 3}]
+
+
+def test_log_sink_skips_disabled_levels(caplog):
+    metrics.enable(LogSink(level=logging.DEBUG))
+    with caplog.at_level(logging.INFO, logger="stock_option_strategy.metrics"):
+        metrics.increment("ignored")
+    assert caplog.records == []
+
+
+def test_prometheus_exposition(tmp_path):
+    sink = PrometheusSink(buckets=(0.01, 0.1))
+    metrics.enable(sink)
+    metrics.observe("stock_db.read", 0.005, timeframe="WEEKLY")
+    metrics.observe("stock_db.read", 0.05, timeframe="WEEKLY")
+    metrics.observe("stock_db.read", 5.0, timeframe="WEEKLY")
+    metrics.increment("cache.hits", 2, symbol='A"B')
+
+    lines = sink.exposition().splitlines()
+    family = "stock_option_strategy_stage_seconds"
+    assert f'{family}_bucket{{stage="stock_db.read",timeframe="WEEKLY",le="0.01"}} 1' in lines
+    assert f'{family}_bucket{{stage="stock_db.read",timeframe="WEEKLY",le="0.1"}} 2' in lines
+    assert f'{family}_bucket{{stage="stock_db.read",timeframe="WEEKLY",le="+Inf"}} 3' in lines
+    assert f'{family}_count{{stage="stock_db.read",timeframe="WEEKLY"}} 3' in lines
+    assert "# TYPE stock_option_strategy_cache_hits_total counter" in lines
+    assert 'stock_option_strategy_cache_hits_total{symbol="A\\"B"} 2' in lines
+
+    path = tmp_path / "metrics.prom"
+    sink.write_textfile(str(path))
+    assert path.read_text() == sink.exposition()
+
+
+def test_configure_by_name():
+    assert isinstance(metrics.configure("prometheus"), PrometheusSink)
+    assert metrics.is_enabled()
+    assert metrics.configure("") is None and not metrics.is_enabled()
+    with pytest.raises(ValueError):
+        metrics.configure("statsd")
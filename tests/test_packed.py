@@ -0,0 +1,138 @@
+import bson
+import numpy as np
+import pytest
+
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.db_client import MongoClientWrapper
+from stock_option_strategy._data.packed import PackedSeries, pack_array, pack_stock, pack_value, unpack_array, \
+    unpack_stock, unpack_value
+from stock_option_strategy._data.packed_store import PackedStore, migrate_to_packed
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+CODECS = ["none", "zlib"]
+
+
+def plain(value):
+    """Turns the PackedSeries and arrays of an unpacked document back into the dicts and lists it was built from."""
+    if isinstance(value, PackedSeries):
+        return dict(value.items())
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+@pytest.fixture
+def mongo():
+    mongomock = pytest.importorskip("mongomock")
+    client = MongoClientWrapper.__new__(MongoClientWrapper)
+    client.db = mongomock.MongoClient().db
+    return client
+
+
+@pytest.fixture
+def stock(offline):
+    offline.serve("WEEKLY", 5)
+    return AlphaData(WEEKLY, "SYM").addData()["SYM"]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("values, dtype", [
+    (np.random.default_rng(0).normal(size=1000), np.float64),
+    (np.sort(np.random.default_rng(1).integers(-2 ** 31, 2 ** 31 - 1, 500)), np.int32),
+    (np.random.default_rng(2).integers(-2 ** 62, 2 ** 62, 100), np.int64),
+    (np.arange(0, 7000, 7), np.int32),
+    ([], np.float64),
+    ([5], np.int32),
+], ids=["float64", "int32", "int64", "days", "empty", "one"])
+def test_arrays_round_trip(values, dtype, codec):
+    array = unpack_array(pack_array(values, dtype, codec))
+    assert array.dtype == np.dtype(dtype)
+    assert np.array_equal(array, np.asarray(values, dtype=dtype))
+    assert not array.flags.writeable
+
+
+def test_zlib_only_compresses_what_it_shrinks():
+    days = np.arange(0, 7000, 7)
+    assert len(pack_array(days, np.int32, "zlib")) < len(pack_array(days, np.int32, "none")) / 4
+    noise = np.random.default_rng(0).normal(size=1000)
+    assert pack_array(noise, np.float64, "zlib") == pack_array(noise, np.float64, "none")
+
+
+def test_short_lists_and_other_values_are_kept():
+    value = {"short": [1, 2, 3], "flags": [True] * 20, "text": "x", "mixed": [1, 2.5] * 10, "ints": list(range(20))}
+    packed = pack_value(value)
+    assert packed["short"] == [1, 2, 3] and packed["flags"] == [True] * 20 and packed["text"] == "x"
+    assert unpack_value(packed)["mixed"].dtype == np.float64
+    assert unpack_value(packed)["ints"].dtype == np.int32
+    assert plain(unpack_value(packed)) == value
+
+
+def test_packed_series_reads_like_the_bar_dict():
+    bars = {"2024-01-05": 1.0, "2024-01-03": 2.0, "2023-12-29": 3.5}
+    series = PackedSeries.from_bars(bars)
+    assert list(series) == ["2024-01-05", "2024-01-03", "2023-12-29"]
+    assert series["2024-01-03"] == 2.0
+    assert "2024-01-04" not in series and "not a date" not in series
+    assert series.get("2024-01-04") is None
+    assert dict(series) == bars and series.items() == list(bars.items()) and series.values() == list(bars.values())
+    assert max(series) == "2024-01-05"
+    assert PackedSeries.from_bson(series.to_bson("zlib")).items() == series.items()
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_stock_documents_round_trip(stock, codec):
+    packed = pack_stock(stock, "WEEKLY", codec)
+    assert len(bson.encode(packed)) < len(bson.encode(stock))
+    unpacked = unpack_stock(bson.decode(bson.encode(packed)), "WEEKLY")
+    assert plain(unpacked) == stock
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_store_round_trip(mongo, stock, codec):
+    store = PackedStore(mongo, WEEKLY, codec)
+    store.write("SYM", stock)
+    assert plain(store.read("SYM", None)) == stock
+    assert store.exists_many(["SYM", "OTHER"]) == {"SYM"}
+
+    year = max(year for year in stock if year.isdigit() and stock[year]["WEEKLY"])
+    fields = ("Probabilities", f"{year}.WEEKLY")
+    assert plain(store.read_many(["SYM"], fields)["SYM"]) == {"Probabilities": stock["Probabilities"],
+                                                              year: {"WEEKLY": stock[year]["WEEKLY"]}}
+
+    bars = sorted((day, close) for key, entry in stock.items() if key.isdigit()
+                  for day, close in entry["WEEKLY"].items())
+    dates, closes = store.read_series("SYM")
+    assert np.datetime_as_string(dates).tolist() == [day for day, _ in bars]
+    assert closes.tolist() == [close for _, close in bars]
+
+    recent = store.read_recent("SYM", year)
+    assert dict(recent[year]["bars"].items()) == stock[year]["WEEKLY"]
+    assert all(recent[key]["bars"] is None for key in recent if key < year)
+
+
+def test_store_replaces_years(mongo, stock):
+    store = PackedStore(mongo, WEEKLY, "zlib")
+    store.write("SYM", stock)
+    year = max(year for year in stock if year.isdigit())
+    years = {year: {**stock[year], "WEEKLY": {f"{year}-12-31": 1.0}}}
+    store.replace_years("SYM", years, {"Distribution": stock["Distribution"]})
+    assert plain(store.read("SYM", None))[year]["WEEKLY"] == {f"{year}-12-31": 1.0}
+
+
+def test_unknown_codec_is_rejected(mongo):
+    with pytest.raises(ValueError, match="Unknown compression"):
+        PackedStore(mongo, WEEKLY, "lz4")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_migration_copies_the_legacy_documents(mongo, stock, codec):
+    legacy = mongo.db[WEEKLY.collection_name]
+    for symbol in ("AAA", "BBB", "CCC"):
+        legacy.insert_one({"_id": symbol, symbol: stock})
+    assert migrate_to_packed(mongo, WEEKLY, codec, batch_size=2) == 3
+    store = PackedStore(mongo, WEEKLY, codec)
+    assert all(plain(store.read(symbol, None)) == stock for symbol in ("AAA", "BBB", "CCC"))
+    assert legacy.count_documents({}) == 3
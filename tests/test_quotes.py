@@ -0,0 +1,90 @@
+import types
+
+import pytest
+
+from stock_option_strategy._data import cache
+from stock_option_strategy._data.iron_condor import IronCondor
+from stock_option_strategy._data.quotes import CachedQuoteProvider, FakeQuoteProvider, Quote, set_quote_provider
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drives the TTL caches from a fake monotonic clock, advanced by setting clock.now."""
+    fake = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def test_iron_condor_prices_from_the_provider(offline):
+    offline.serve()
+    provider = FakeQuoteProvider({"SYM": 123.45})
+    result = IronCondor("SYM", WEEKLY, quotes=provider).get_same_width_option_price()
+    assert result["Last Updated Price"] == "$123.45"
+    assert provider.requests == [["SYM"]]
+
+
+def test_iron_condor_uses_the_shared_provider(offline):
+    offline.serve()
+    set_quote_provider(FakeQuoteProvider({"sym": 50.0}))
+    assert IronCondor("sym", WEEKLY).curr_price == 50.0
+
+
+def test_unknown_ticker_is_rejected_before_loading(offline):
+    client = offline.serve()
+    with pytest.raises(ValueError, match="does not exist"):
+        IronCondor("NOPE", WEEKLY, quotes=FakeQuoteProvider({"SYM": 1.0}))
+    assert client.calls == 0
+
+
+def test_missing_price_falls_back_to_the_last_stored_close(offline):
+    offline.serve()
+    condor = IronCondor("SYM", WEEKLY, quotes=FakeQuoteProvider({"SYM": None}))
+    result = condor.get_same_width_option_price()
+    year = result["Last Updated Date"][:4]
+    stored = condor.stock_db.getData("SYM", (f"{year}.WEEKLY",))[year]["WEEKLY"]
+    assert result["Last Updated Price"] == f"${stored[result['Last Updated Date']]}"
+
+
+def test_cached_provider_sends_only_the_misses(clock):
+    provider = FakeQuoteProvider({"AAA": 1.0, "BBB": 2.0})
+    cached = CachedQuoteProvider(provider, ttl=60, negative_ttl=300)
+    cached.get_quotes(["AAA"])
+    result = cached.get_quotes(["aaa", "BBB", "ZZZ", "BBB"])
+    assert provider.requests == [["AAA"], ["BBB", "ZZZ"]]
+    assert result == {"aaa": Quote("aaa", True, 1.0), "BBB": Quote("BBB", True, 2.0), "ZZZ": Quote("ZZZ", False)}
+
+
+def test_cached_provider_expires_prices_and_unknown_tickers(clock):
+    provider = FakeQuoteProvider({"AAA": 1.0})
+    cached = CachedQuoteProvider(provider, ttl=60, negative_ttl=300)
+    cached.get_quotes(["AAA", "ZZZ"])
+    clock.now += 59
+    cached.get_quotes(["AAA", "ZZZ"])
+    assert len(provider.requests) == 1
+
+    provider.prices["AAA"] = 1.5
+    clock.now += 2
+    assert cached.get_quote("AAA").price == 1.5
+    # the unknown ticker is remembered longer than the price
+    cached.get_quote("ZZZ")
+    assert provider.requests[1:] == [["AAA"]]
+    clock.now += 240
+    cached.get_quote("ZZZ")
+    assert provider.requests[2:] == [["ZZZ"]]
+
+
+def test_iron_condors_share_cached_quotes_until_they_expire(offline, clock):
+    offline.serve()
+    provider = FakeQuoteProvider({"SYM": 10.0})
+    cached = CachedQuoteProvider(provider, ttl=60)
+    IronCondor("SYM", WEEKLY, quotes=cached)
+    IronCondor("SYM", WEEKLY, quotes=cached)
+    assert provider.requests == [["SYM"]]
+
+    provider.prices["SYM"] = 11.0
+    clock.now += 61
+    assert IronCondor("SYM", WEEKLY, quotes=cached).curr_price == 11.0
+    assert provider.requests == [["SYM"], ["SYM"]]
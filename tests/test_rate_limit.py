@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from stock_option_strategy._data.rate_limit import Priority, RateLimitScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return RateLimitScheduler(calls_per_minute=600, calls_per_day=0, state_path=str(tmp_path / "quota.sqlite"),
+                              poll_interval=0.01)
+
+
+def waiters(scheduler) -> list:
+    with scheduler._transaction() as db:
+        return db.execute("SELECT id, priority FROM waiters ORDER BY id").fetchall()
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.time() + timeout
+    while not (result := condition()):
+        if time.time() > deadline:
+            raise TimeoutError("The condition didn't hold in time")
+        time.sleep(0.005)
+    return result
+
+
+def block(scheduler):
+    with scheduler._transaction() as db:
+        # a waiter ahead of every priority, holding the others in the queue until it is removed
+        db.execute("INSERT INTO waiters (priority, heartbeat) VALUES (-1, 1e12)")
+
+
+def unblock(scheduler):
+    with scheduler._transaction() as db:
+        db.execute("DELETE FROM waiters WHERE priority = -1")
+
+
+def test_a_purged_ticket_is_queued_again(scheduler):
+    block(scheduler)
+    tickets = []
+
+    def purge():
+        tickets.extend(wait_for(lambda: waiters(scheduler)[1:]))
+        with scheduler._transaction() as db:
+            # what another process does when it takes the caller for dead
+            db.execute("DELETE FROM waiters WHERE id = ?", (tickets[0][0],))
+        tickets.extend(wait_for(lambda: waiters(scheduler)[1:]))
+        unblock(scheduler)
+
+    thread = threading.Thread(target=purge)
+    thread.start()
+    scheduler.acquire(Priority.BULK, timeout=5)
+    thread.join()
+    assert tickets[0] == tickets[1] and tickets[0][1] == Priority.BULK
+    assert waiters(scheduler) == []
+
+
+def test_interactive_callers_go_before_bulk_ones(scheduler):
+    # one token every 0.1 seconds, so the callers finish one after the other
+    scheduler.drain()
+    block(scheduler)
+    order = []
+
+    def call(priority, name):
+        scheduler.acquire(priority, timeout=5)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=(Priority.BULK, f"bulk{i}")) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: len(waiters(scheduler)) == 3)
+    threads.append(threading.Thread(target=call, args=(Priority.INTERACTIVE, "interactive")))
+    threads[-1].start()
+    wait_for(lambda: len(waiters(scheduler)) == 4)
+    unblock(scheduler)
+    for thread in threads:
+        thread.join()
+    assert order[0] == "interactive" and sorted(order[1:]) == ["bulk0", "bulk1"]
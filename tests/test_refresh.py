@@ -0,0 +1,73 @@
+import datetime
+
+from stock_option_strategy._data.freshness import set_freshness_policy
+from stock_option_strategy._data.refresh import Checkpoint, refresh_universe
+from stock_option_strategy._data.stock_db import StockDB
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+
+
+class StubPolicy:
+    """A freshness policy answering every series alike, recording the newest bars it was asked about."""
+
+    def __init__(self, stale: bool):
+        self.stale = stale
+        self.asked = []
+
+    def is_stale(self, last_bar: datetime.date, data_enum, now=None) -> bool:
+        self.asked.append(last_bar)
+        return self.stale
+
+
+def store(symbols):
+    StockDB(None, WEEKLY).ensureMany(symbols)
+
+
+def test_current_tickers_are_left_alone(offline):
+    client = offline.serve()
+    store(["AAA", "BBB"])
+    policy = StubPolicy(stale=False)
+    set_freshness_policy(policy)
+    calls = client.calls
+    checkpoint = Checkpoint(str(offline.path / "universe.checkpoint"))
+    result = refresh_universe(["AAA", "BBB", "NEW"], WEEKLY, checkpoint, max_workers=2, incremental=False)
+    assert result.current == ["AAA", "BBB"]
+    assert result.refreshed == ["NEW"]
+    assert result.remaining == 0
+    assert client.calls == calls + 1
+    assert set(checkpoint.load()) == {"NEW"}
+    assert "current 2 (no newer bar yet)" in result.summary()
+
+
+def test_the_policy_sees_the_newest_stored_bar(offline):
+    offline.serve()
+    store(["AAA"])
+    policy = StubPolicy(stale=False)
+    set_freshness_policy(policy)
+    dates, _ = StockDB(None, WEEKLY).getSeries("AAA")
+    refresh_universe(["AAA"], WEEKLY, incremental=False)
+    assert policy.asked == [datetime.date.fromisoformat(str(dates[-1]))]
+
+
+def test_stale_tickers_are_refreshed(offline):
+    client = offline.serve()
+    store(["AAA", "BBB"])
+    set_freshness_policy(StubPolicy(stale=True))
+    calls = client.calls
+    result = refresh_universe(["AAA", "BBB"], WEEKLY, max_workers=2, incremental=False)
+    assert result.current == []
+    assert sorted(result.refreshed) == ["AAA", "BBB"]
+    assert client.calls == calls + 2
+
+
+def test_force_refreshes_current_tickers(offline):
+    client = offline.serve()
+    store(["AAA", "BBB"])
+    policy = StubPolicy(stale=False)
+    set_freshness_policy(policy)
+    calls = client.calls
+    result = refresh_universe(["AAA", "BBB"], WEEKLY, max_workers=2, incremental=False, force=True)
+    assert sorted(result.refreshed) == ["AAA", "BBB"]
+    assert policy.asked == []
+    assert client.calls == calls + 2
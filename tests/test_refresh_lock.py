@@ -0,0 +1,155 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeAlphaVantageClient
+from stock_option_strategy._data import http_client
+from stock_option_strategy._data.refresh_lock import RefreshCoordinator
+from stock_option_strategy._data.stock_db import StockDB
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+
+
+@pytest.fixture
+def state(tmp_path):
+    return str(tmp_path / "leases.sqlite")
+
+
+def hold(coordinator: RefreshCoordinator, key: str, release: threading.Event, fail: bool = False):
+    """Starts a thread that leads a refresh of key until release is set, returning once it leads."""
+    leading = threading.Event()
+
+    def run():
+        try:
+            with coordinator.refreshing(key) as leader:
+                assert leader
+                leading.set()
+                release.wait(5)
+                if fail:
+                    raise RuntimeError("refresh failed")
+        except RuntimeError:
+            pass
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert leading.wait(5)
+    return thread
+
+
+def wait_for(coordinator: RefreshCoordinator, key: str, outcome: list):
+    def run():
+        with coordinator.refreshing(key) as leader:
+            outcome.append(leader)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("processes", [1, 2], ids=["threads", "processes"])
+def test_a_waiter_reuses_the_refresh_it_waited_for(state, processes):
+    # a second coordinator on the same file stands in for another process
+    coordinators = [RefreshCoordinator(state, poll_interval=0.01) for _ in range(processes)]
+    release, outcome = threading.Event(), []
+    leader = hold(coordinators[0], "WEEKLY:AAA", release)
+    waiter = wait_for(coordinators[-1], "WEEKLY:AAA", outcome)
+    time.sleep(0.05)
+    assert outcome == []
+    release.set()
+    leader.join()
+    waiter.join()
+    assert outcome == [False]
+
+
+@pytest.mark.parametrize("processes", [1, 2], ids=["threads", "processes"])
+def test_a_failed_refresh_lets_the_waiter_refresh(state, processes):
+    coordinators = [RefreshCoordinator(state, poll_interval=0.01) for _ in range(processes)]
+    release, outcome = threading.Event(), []
+    leader = hold(coordinators[0], "WEEKLY:AAA", release, fail=True)
+    waiter = wait_for(coordinators[-1], "WEEKLY:AAA", outcome)
+    release.set()
+    leader.join()
+    waiter.join()
+    assert outcome == [True]
+
+
+def test_a_later_request_refreshes_again(state):
+    coordinator = RefreshCoordinator(state, poll_interval=0.01)
+    for _ in range(2):
+        with coordinator.refreshing("WEEKLY:AAA") as leader:
+            assert leader
+
+
+def test_keys_are_independent(state):
+    coordinator = RefreshCoordinator(state, poll_interval=0.01)
+    release = threading.Event()
+    leader = hold(coordinator, "WEEKLY:AAA", release)
+    with RefreshCoordinator(state, poll_interval=0.01).refreshing("WEEKLY:BBB") as other:
+        assert other
+    release.set()
+    leader.join()
+
+
+def test_the_lease_of_a_dead_holder_expires(state):
+    coordinator = RefreshCoordinator(state, lease_seconds=0.3, poll_interval=0.01)
+    with sqlite3.connect(state) as db:
+        db.execute("INSERT INTO leases VALUES ('WEEKLY:AAA', 'dead-host:1:1', ?, NULL)", (time.time() + 0.3,))
+    start = time.time()
+    with coordinator.refreshing("WEEKLY:AAA") as leader:
+        assert leader
+    assert time.time() - start >= 0.25
+
+
+def test_a_live_holder_renews_its_lease(state):
+    holder = RefreshCoordinator(state, lease_seconds=0.15, poll_interval=0.01)
+    release, outcome = threading.Event(), []
+    leader = hold(holder, "WEEKLY:AAA", release)
+    waiter = wait_for(RefreshCoordinator(state, lease_seconds=0.15, poll_interval=0.01), "WEEKLY:AAA", outcome)
+    # well past the lease, which the holder keeps renewing
+    time.sleep(0.5)
+    assert outcome == []
+    release.set()
+    leader.join()
+    waiter.join()
+    assert outcome == [False]
+
+
+class SlowClient(FakeAlphaVantageClient):
+    def stream(self, params: dict, parse, priority=None, chunk_size: int = 1 << 16):
+        time.sleep(0.1)
+        return super().stream(params, parse, priority, chunk_size)
+
+
+def test_concurrent_updates_download_once(offline):
+    client = SlowClient(WEEKLY, 5)
+    http_client.set_client(client)
+    stock_db = StockDB(None, WEEKLY)
+    threads = [threading.Thread(target=stock_db.updateData, args=("AAA",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.calls == 1
+    assert stock_db.getData("AAA") is not None
+
+
+def test_fetched_symbols_are_bulk_written_under_their_leases(offline, monkeypatch):
+    client = SlowClient(WEEKLY, 5)
+    http_client.set_client(client)
+    stock_db = StockDB(None, WEEKLY)
+    writes = []
+    write_many = stock_db.store.write_many
+    monkeypatch.setattr(stock_db.store, "write_many", lambda stocks: writes.append(sorted(stocks)) or write_many(stocks))
+    monkeypatch.setattr(stock_db.store, "write", lambda symbol, stock: pytest.fail("written one by one"))
+    other = StockDB(None, WEEKLY)
+    threads = [threading.Thread(target=stock_db.ensureMany, args=(["AAA", "BBB", "CCC"],)),
+               threading.Thread(target=other.getData, args=("BBB",))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.calls == 3
+    assert writes == [["AAA", "BBB", "CCC"]] or writes == [["AAA", "CCC"]]
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from stock_option_strategy._server import PredictionServer
+
+
+async def exchange(server: PredictionServer, request: bytes):
+    """Sends a raw request to a started server and returns the status, the headers and the JSON body."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(request)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {name.lower(): value.strip() for name, _, value in (line.partition(":") for line in head[1:] if line)}
+    body = await reader.readexactly(int(headers["content-length"]))
+    writer.close()
+    return int(head[0].split(" ")[1]), headers, json.loads(body)
+
+
+def serve_one(request: bytes, server: PredictionServer = None):
+    server = server or PredictionServer(max_workers=1)
+
+    async def main():
+        await server.start("127.0.0.1", 0)
+        try:
+            return await exchange(server, request)
+        finally:
+            server._server.close()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        server.close()
+
+
+def test_health():
+    status, headers, body = serve_one(b"GET /health HTTP/1.1\r\nHost: test\r\n\r\n")
+    assert (status, body) == (200, {"status": "ok"})
+    assert headers["connection"] == "keep-alive"
+
+
+def test_invalid_content_length_closes_the_connection():
+    status, headers, body = serve_one(b"POST /predict HTTP/1.1\r\nContent-Length: ten\r\n\r\n")
+    assert (status, body) == (400, {"Error": "Invalid Content-Length"})
+    assert headers["connection"] == "close"
+
+
+def test_negative_content_length_is_rejected():
+    status, _, body = serve_one(b"POST /predict HTTP/1.1\r\nContent-Length: -1\r\n\r\n")
+    assert (status, body) == (400, {"Error": "Invalid Content-Length"})
+
+
+def test_invalid_json_body():
+    status, _, body = serve_one(b"POST /predict HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops")
+    assert (status, body) == (400, {"Error": "The request body is not valid JSON"})
+
+
+def test_a_value_error_while_routing_isnt_blamed_on_the_request():
+    server = PredictionServer(max_workers=1)
+
+    async def route(method, target, body):
+        raise ValueError("could not convert string to float")
+
+    server.route = route
+    status, _, body = serve_one(b"GET /predict?ticker=AAA HTTP/1.1\r\n\r\n", server)
+    assert (status, body) == (500, {"Error": "An error occurred: could not convert string to float"})
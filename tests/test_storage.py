@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.fakes import InMemoryCollection
+from stock_option_strategy._data.stock_db import StockDB
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+
+
+def test_bulk_writes_reach_the_in_memory_database(offline):
+    client = offline.serve("WEEKLY", 3)
+    db = StockDB(None, WEEKLY, layout="document")
+    assert sorted(db.ensureMany(["AAA", "BBB"])) == ["AAA", "BBB"]
+    assert client.calls == 2
+    assert sorted(offline.db.db[WEEKLY.collection_name].docs) == ["AAA", "BBB"]
+    assert db.ensureMany(["AAA", "BBB", "CCC"]) == ["CCC"]
+    assert db.getMany(["AAA"], ("Probabilities",))["AAA"]["Probabilities"]["Call"]
+
+
+def test_cached_data_is_handed_out_as_copies(offline):
+    offline.serve("WEEKLY", 3)
+    db = StockDB(None, WEEKLY, layout="document")
+    fetched = db.getData("AAA")
+    fetched["Probabilities"]["Call"].clear()
+    cached = db.getData("AAA")
+    assert cached["Probabilities"]["Call"]
+    cached["Probabilities"].clear()
+    assert db.getMany(["AAA"], ("Probabilities",))["AAA"]["Probabilities"]["Call"]
+
+
+def test_in_memory_collection_rejects_unknown_requests():
+    from pymongo import DeleteMany
+
+    with pytest.raises(TypeError):
+        InMemoryCollection().bulk_write([DeleteMany({})])
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from stock_option_strategy._data.iron_condor import IronCondor
+from stock_option_strategy._data.quotes import FakeQuoteProvider
+from stock_option_strategy._strategies.strike_grid import build_strike_grid, load_strike_grid
+from stock_option_strategy._utils.enums import TimeFrame
+
+WEEKLY = TimeFrame.WEEKLY.get_enum()
+PROBABILITIES = ["50%", "60%", "73.5%", "99%"]
+
+
+@pytest.fixture
+def provider():
+    return FakeQuoteProvider({"AAA": 101.5, "BBB": 37.25, "CCC": None})
+
+
+def test_grid_matches_iron_condor(offline, provider):
+    offline.serve("WEEKLY", 5)
+    grid = load_strike_grid(["AAA", "bbb", "CCC", "NOPE", "AAA"], WEEKLY, PROBABILITIES, quotes=provider)
+    assert grid.symbols == ["AAA", "BBB", "CCC", "NOPE"]
+    assert not grid.valid[3].any() and grid.valid[:3].all()
+
+    records = iter(grid.records())
+    same_records = iter(grid.records(same_width=True))
+    for symbol in ("AAA", "BBB", "CCC"):
+        for probability in PROBABILITIES:
+            condor = IronCondor(symbol, WEEKLY, probability, quotes=provider)
+            assert next(records) == condor.get_different_width_option_price()
+            assert next(same_records) == condor.get_same_width_option_price()
+    assert next(records, None) is None
+
+
+def test_grid_of_legacy_and_empty_documents():
+    stocks = {"OLD": {"Probabilities": {"Call": {"60%": 2.5}, "Put": {"60%": -3.0}}},
+              "EMPTY": {"Distribution": {"Call": [], "Put": [-1.0]}},
+              "MISSING": None}
+    grid = build_strike_grid(stocks, {"OLD": 100.0, "EMPTY": 50.0}, ["60%", "70%"])
+    assert grid.call_widths[0, 0] == 2.5 and grid.put_widths[0, 0] == -3.0
+    assert grid.different_call[0, 0] == 102 and grid.different_put[0, 0] == 97
+    # the standard table doesn't know 70%, the empty side has no quantile
+    assert grid.valid.tolist() == [[True, False], [False, False], [False, False]]
+    assert np.isnan(grid.prices[2])
+
+
+def test_grid_rejects_invalid_probabilities():
+    with pytest.raises(ValueError):
+        build_strike_grid({}, {}, ["101%"])
+
+
+def test_grid_to_frame(offline, provider):
+    pytest.importorskip("pandas")
+    offline.serve("WEEKLY", 5)
+    grid = load_strike_grid(["AAA", "BBB"], WEEKLY, ["50%", "90%"], quotes=provider)
+    frame = grid.to_frame()
+    assert list(frame["symbol"]) == ["AAA", "AAA", "BBB", "BBB"]
+    assert list(frame["probability"]) == ["50%", "90%", "50%", "90%"]
+    np.testing.assert_array_equal(frame["different_call"].to_numpy().reshape(2, 2), grid.different_call)
@@ -0,0 +1,104 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.fakes import synthetic_series
+from stock_option_strategy._data import http_client
+from stock_option_strategy._data.alphavantage import AlphaData
+from stock_option_strategy._data.ingest import build_distribution, merge_percent_summaries, probability_table, \
+    summary_distribution
+from stock_option_strategy._data.stock_db import StockDB
+from stock_option_strategy._data.summaries import filtered_values, merge, summarize, year_summaries
+from stock_option_strategy._utils.enums import TimeFrame
+
+DAILY = TimeFrame.DAILY.get_enum()
+
+
+class SeriesClient:
+    """Serves one series, as the full history or its newest 100 bars like outputsize=compact."""
+
+    def __init__(self, series: dict):
+        self.series = series
+        self.requests = []
+
+    def stream(self, params: dict, parse, priority=None):
+        self.requests.append(params["outputsize"])
+        series = self.series
+        if params["outputsize"] == "compact":
+            series = dict(list(series.items())[:100])
+        return parse([json.dumps({DAILY.data_name: series}).encode()])
+
+
+def percent_changes(seed: int, count: int = 300) -> list:
+    return np.round(np.random.default_rng(seed).standard_t(3, count) * 2, 2).tolist()
+
+
+def test_summarize_is_an_exact_histogram():
+    assert summarize([0.5, -1.25, 0.5, 0.0]) == {"cents": [-125, 0, 50], "counts": [1, 1, 2]}
+    assert summarize([]) == {"cents": [], "counts": []}
+
+
+def test_merge_equals_summarizing_everything():
+    parts = [percent_changes(seed) for seed in range(4)]
+    merged = merge(summarize(part) for part in parts)
+    assert merged == summarize([value for part in parts for value in part])
+    assert merge([]) == {"cents": [], "counts": []}
+    assert merge([merge([summarize(parts[0]), summarize(parts[1])]), summarize(parts[2] + parts[3])]) == merged
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_filtered_values_match_the_raw_distribution(seed):
+    positive = [abs(value) for value in percent_changes(seed)]
+    negative = [-value for value in positive]
+    expected = build_distribution(positive, negative)
+    assert filtered_values(summarize(positive)).tolist() == expected["Call"]
+    assert summary_distribution(summarize(positive), summarize(negative)) == expected
+
+
+def test_year_summaries_of_legacy_documents():
+    legacy = {"positivePC": [1.5, 0.25], "negativePC": [-2.0]}
+    assert year_summaries(legacy) == (summarize([1.5, 0.25]), summarize([-2.0]))
+    assert year_summaries({"positivePC": np.array([1.5]), "negativePC": None}) == (summarize([1.5]), summarize([]))
+    stored = {"positiveSummary": {"cents": [1], "counts": [3]}, "negativeSummary": {"cents": [], "counts": []}}
+    assert year_summaries(stored) == (stored["positiveSummary"], stored["negativeSummary"])
+
+
+def test_mixed_documents_give_the_raw_probabilities():
+    # years stored before the summaries existed merge with the summarized ones
+    years = {str(2020 + seed): percent_changes(seed) for seed in range(4)}
+    stock = {"2024": {"PercentWidthData": {"positivePC": [], "negativePC": []}}}
+    for index, (year, values) in enumerate(years.items()):
+        positive = [value for value in values if value >= 0]
+        negative = [value for value in values if value < 0]
+        pc_data = {"positivePC": positive, "negativePC": negative} if index % 2 else \
+            {"positiveSummary": summarize(positive), "negativeSummary": summarize(negative)}
+        stock[year] = {"PercentWidthData": pc_data}
+    everything = [value for values in years.values() for value in values]
+    expected = build_distribution([value for value in everything if value >= 0],
+                                  [value for value in everything if value < 0])
+    assert summary_distribution(*merge_percent_summaries(stock, "2024")) == expected
+
+
+@pytest.mark.parametrize("new_bars", [10, 9])
+def test_incremental_update_merges_the_new_years(offline, monkeypatch, new_bars):
+    # 2026-01-01 onwards and the end of 2025 arrive in one incremental update
+    series = synthetic_series(DAILY, 3, 7, last_date=datetime.date(2026, 1, 6))
+    stored = dict(list(series.items())[new_bars:])
+    monkeypatch.setattr(AlphaData, "current_year", staticmethod(lambda: "2026"))
+    client = SeriesClient(stored)
+    http_client.set_client(client)
+    db = StockDB(None, DAILY, layout="columnar")
+    db.insertData("SYM")
+
+    client.series = series
+    db.updateData("SYM", incremental=True, raise_errors=True)
+    # an odd number of new bars shifts the pairs of every stored year, so it takes a full refresh
+    assert client.requests == ["full", "compact"] + (["full"] if new_bars % 2 else [])
+    expected = AlphaData(DAILY, "SYM").addData()["SYM"]
+    stock = db.getData("SYM")
+    assert stock["Probabilities"] == expected["Probabilities"]
+    assert stock["Distribution"] == expected["Distribution"]
+    assert stock["2025"] == expected["2025"] and stock["2026"] == expected["2026"]
+    assert stock["Probabilities"] == probability_table(summary_distribution(*merge_percent_summaries(stock, "2026")))
@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+
+from stock_option_strategy._data import trading_calendar
+
+# the NYSE's published holiday calendars
+NYSE_HOLIDAYS = {
+    2022: ["2022-01-17", "2022-02-21", "2022-04-15", "2022-05-30", "2022-06-20", "2022-07-04", "2022-09-05",
+           "2022-11-24", "2022-12-26"],
+    2024: ["2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27", "2024-06-19", "2024-07-04",
+           "2024-09-02", "2024-11-28", "2024-12-25"],
+    2025: ["2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26", "2025-06-19",
+           "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25"],
+    2026: ["2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19", "2026-07-03",
+           "2026-09-07", "2026-11-26", "2026-12-25"],
+    2027: ["2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31", "2027-06-18", "2027-07-05",
+           "2027-09-06", "2027-11-25", "2027-12-24"],
+}
+
+
+def day(text: str) -> datetime.date:
+    return datetime.date.fromisoformat(text)
+
+
+def utc(*args) -> datetime.datetime:
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize("year", sorted(NYSE_HOLIDAYS))
+def test_holidays_match_the_nyse_calendar(year):
+    assert sorted(trading_calendar.holidays(year)) == [day(text) for text in NYSE_HOLIDAYS[year]]
+
+
+def test_new_year_on_a_saturday_is_not_observed():
+    # 2022-01-01 was a Saturday; the exchange stayed open on Friday 2021-12-31
+    assert trading_calendar.is_trading_day(day("2021-12-31"))
+
+
+@pytest.mark.parametrize("year, expected", [
+    (2024, ["2024-07-03", "2024-11-29", "2024-12-24"]),
+    # July 3 is the observed Independence Day, so only the day after Thanksgiving and Christmas Eve close early
+    (2026, ["2026-11-27", "2026-12-24"]),
+    # July 3 and Christmas Eve fall on a Friday
+    (2020, ["2020-11-27", "2020-12-24"]),
+    (2027, ["2027-11-26"]),
+])
+def test_early_closes(year, expected):
+    assert sorted(trading_calendar.early_closes(year)) == [day(text) for text in expected]
+
+
+def test_close_time():
+    assert trading_calendar.close_time(day("2026-10-16")) == trading_calendar.REGULAR_CLOSE
+    assert trading_calendar.close_time(day("2026-11-27")) == trading_calendar.EARLY_CLOSE
+    assert trading_calendar.close_time(day("2026-11-26")) is None
+    assert trading_calendar.close_time(day("2026-10-17")) is None
+
+
+def test_previous_and_next_trading_days_skip_weekends_and_holidays():
+    assert trading_calendar.previous_trading_day(day("2026-01-20")) == day("2026-01-16")
+    assert trading_calendar.next_trading_day(day("2026-04-02")) == day("2026-04-06")
+    assert trading_calendar.next_trading_day(day("2026-12-31")) == day("2027-01-04")
+
+
+@pytest.mark.parametrize("moment, expected", [
+    (utc(2026, 7, 1, 20), datetime.datetime(2026, 7, 1, 16)),
+    (utc(2026, 1, 15, 21), datetime.datetime(2026, 1, 15, 16)),
+    # daylight saving time starts at 2 am on 2026-03-08
+    (utc(2026, 3, 8, 6, 59), datetime.datetime(2026, 3, 8, 1, 59)),
+    (utc(2026, 3, 8, 7), datetime.datetime(2026, 3, 8, 3)),
+])
+def test_exchange_time(moment, expected):
+    assert trading_calendar.exchange_time(moment) == expected
+
+
+@pytest.mark.parametrize("moment, expected", [
+    # Sunday noon: Friday's session
+    (utc(2026, 10, 18, 16), "2026-10-16"),
+    # Wednesday 10 am: Tuesday's session
+    (utc(2026, 10, 21, 14), "2026-10-20"),
+    # the Friday after Thanksgiving closes at 1 pm: 1:10 pm is before its bar is published, 1:40 pm after
+    (utc(2026, 11, 27, 18, 10), "2026-11-25"),
+    (utc(2026, 11, 27, 18, 40), "2026-11-27"),
+])
+def test_latest_session(moment, expected):
+    assert trading_calendar.latest_session(moment, datetime.timedelta(minutes=30)) == day(expected)
+
+
+@pytest.mark.parametrize("session, duration, expected", [
+    ("2026-10-14", "DAILY", "2026-10-14"),
+    ("2026-10-14", "WEEKLY", "2026-10-16"),
+    # Good Friday closes the week on Thursday
+    ("2026-03-30", "WEEKLY", "2026-04-02"),
+    ("2026-10-14", "MONTHLY", "2026-10-30"),
+    # the last day of 2027-12 is a Friday, Christmas Eve is the observed holiday
+    ("2027-12-01", "MONTHLY", "2027-12-31"),
+])
+def test_period_end(session, duration, expected):
+    assert trading_calendar.period_end(day(session), duration) == day(expected)